@@ -0,0 +1,56 @@
+"""Compare ways of building stored tasks for reading.
+
+Usage:
+    python benchmarks/bench_deserialize.py [TASKS ...]
+
+For each task count, times against a warm snapshot cache (so only object
+construction is measured):
+    validated - TaskService.list_tasks() with full pydantic validation
+    trusted   - TaskService.list_tasks() as shipped (unvalidated models)
+    records   - TaskService.list_task_records() (read-only named tuples)
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from bench_encodings import make_dataset, median_seconds
+
+from pkm.services import task_service
+from pkm.services.task_service import TaskService
+from pkm.storage.json_store import JSONStore
+from pkm.storage.schema import deserialize_task
+
+
+def validated(data: dict, trusted: bool = False) -> object:
+    """deserialize_task with the trusted flag ignored."""
+    return deserialize_task(data)
+
+
+def main(counts: list[int]) -> None:
+    """Print the comparison table for each task count."""
+    print("| tasks | validated (ms) | trusted (ms) | records (ms) |")
+    print("|------:|---------------:|-------------:|-------------:|")
+    for tasks in counts:
+        with tempfile.TemporaryDirectory() as tmp:
+            data_dir = Path(tmp)
+            store = JSONStore(data_dir / "data.json", encoding="marshal")
+            dataset = make_dataset(tasks * 2)
+            dataset["notes"] = []
+            store.save(dataset)
+            service = TaskService(data_dir, store)
+            service.list_tasks()  # warm the snapshot cache
+
+            trusted = median_seconds(service.list_tasks)
+            records = median_seconds(service.list_task_records)
+            with mock.patch.object(task_service, "deserialize_task", validated):
+                slow = median_seconds(service.list_tasks)
+            print(
+                f"| {tasks:,} | {slow * 1000:,.1f} | {trusted * 1000:,.1f} "
+                f"| {records * 1000:,.1f} |"
+            )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [50_000])
@@ -0,0 +1,83 @@
+"""Compare data.json encodings by file size, save time and load time.
+
+Usage:
+    python benchmarks/bench_encodings.py [RECORDS ...]
+
+Generates a synthetic dataset (half notes, half tasks) for each record
+count and prints one row per encoding. Load time is the median of several
+runs of decoding the file's bytes, which is what JSONStore does on a
+snapshot cache miss.
+"""
+
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any
+
+from pkm.storage.encodings import ENCODINGS, decode, encode
+
+RUNS = 5
+
+
+def make_dataset(records: int) -> dict[str, Any]:
+    """Build a dataset shaped like real pkm data."""
+    start = datetime(2025, 9, 1, 9, 0)
+    notes = [
+        {
+            "id": f"n{i}",
+            "content": f"Lecture {i}: " + "photosynthesis converts light to energy. " * 6,
+            "created_at": (start + timedelta(minutes=i)).isoformat(),
+            "modified_at": (start + timedelta(minutes=i)).isoformat(),
+            "course": f"COURSE{i % 12}" if i % 5 else None,
+            "topics": [f"topic{i % 40}", f"topic{i % 7}"],
+            "linked_from_tasks": [f"t{i}"] if i % 10 == 0 else [],
+        }
+        for i in range(1, records // 2 + 1)
+    ]
+    tasks = [
+        {
+            "id": f"t{i}",
+            "title": f"Assignment {i}",
+            "created_at": (start + timedelta(minutes=i)).isoformat(),
+            "due_date": (start + timedelta(days=i % 90)).isoformat() if i % 3 else None,
+            "priority": ("high", "medium", "low")[i % 3],
+            "completed": i % 4 == 0,
+            "completed_at": None,
+            "course": f"COURSE{i % 12}",
+            "linked_notes": [f"n{i}"] if i % 10 == 0 else [],
+            "subtasks": [{"id": 1, "title": "Draft", "completed": False}] if i % 6 == 0 else [],
+        }
+        for i in range(1, records - records // 2 + 1)
+    ]
+    return {"notes": notes, "tasks": tasks, "courses": []}
+
+
+def median_seconds(func: Any, *args: Any) -> float:
+    """Median wall time of RUNS calls."""
+    times = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main(counts: list[int]) -> None:
+    """Print the comparison table for each record count."""
+    print("| records | encoding | size (KiB) | save (ms) | load (ms) |")
+    print("|--------:|----------|-----------:|----------:|----------:|")
+    for records in counts:
+        data = make_dataset(records)
+        for encoding in ENCODINGS:
+            raw = encode(data, encoding)
+            save = median_seconds(encode, data, encoding)
+            load = median_seconds(decode, raw)
+            print(
+                f"| {records:,} | {encoding} | {len(raw) / 1024:,.0f} "
+                f"| {save * 1000:,.1f} | {load * 1000:,.1f} |"
+            )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000])
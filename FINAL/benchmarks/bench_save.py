@@ -0,0 +1,46 @@
+"""Compare full snapshot saves with saves after a single-record change.
+
+Usage:
+    python benchmarks/bench_save.py [RECORDS ...]
+
+For each record count and text encoding, times JSONStore.save():
+    full    - a store that has not saved yet, so every record is encoded
+    one     - the same store after replacing one task, so only that task
+              is re-encoded and the other records are spliced in from cache
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+from bench_encodings import make_dataset, median_seconds
+
+from pkm.storage.json_store import JSONStore
+
+
+def main(counts: list[int]) -> None:
+    """Print the comparison table for each record count."""
+    print("| records | encoding | full (ms) | one change (ms) |")
+    print("|--------:|----------|----------:|----------------:|")
+    for records in counts:
+        data = make_dataset(records)
+        for encoding in ("json", "compact", "ndjson"):
+            with tempfile.TemporaryDirectory() as tmp:
+                def save_fresh() -> None:
+                    JSONStore(Path(tmp) / "fresh.json", encoding=encoding, backups=0).save(data)
+
+                store = JSONStore(Path(tmp) / "data.json", encoding=encoding, backups=0)
+                store.save(data)
+
+                def save_one() -> None:
+                    task = data["tasks"][0]
+                    data["tasks"][0] = {**task, "completed": not task["completed"]}
+                    store.save(data)
+
+                full = median_seconds(save_fresh)
+                one = median_seconds(save_one)
+            print(f"| {records:,} | {encoding} | {full * 1000:,.1f} | {one * 1000:,.1f} |")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000])
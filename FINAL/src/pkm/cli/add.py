@@ -6,8 +6,10 @@ import click
 
 from pkm.cli.helpers import error, info, success
 from pkm.cli.main import cli
-from pkm.services.note_service import NoteService
-from pkm.services.task_service import TaskService
+from pkm.services.unit_of_work import UnitOfWork
+from pkm.storage.backends import DEFAULT_BACKEND, Store, open_store
+from pkm.storage.encodings import DEFAULT_ENCODING
+from pkm.storage.json_store import DEFAULT_BACKUPS
 from pkm.utils.date_parser import format_due_date, parse_due_date
 
 
@@ -29,6 +31,50 @@ def get_data_dir(ctx: click.Context) -> Path:
     return data_dir
 
 
+def get_store(ctx: click.Context) -> Store:
+    """Open the storage backend selected by the global storage options.
+
+    Args:
+        ctx: Click context
+
+    Returns:
+        Store for the data directory
+    """
+    backend = ctx.obj.get("backend") or DEFAULT_BACKEND
+    encoding = ctx.obj.get("encoding") or DEFAULT_ENCODING
+    return open_store(
+        get_data_dir(ctx),
+        backend,
+        encoding,
+        backups=ctx.obj.get("backups", DEFAULT_BACKUPS),
+        backup_interval=ctx.obj.get("backup_interval"),
+    )
+
+
+def get_unit_of_work(ctx: click.Context) -> UnitOfWork:
+    """Get the unit of work for the running command, creating it on first use.
+
+    Every service the command uses shares the one dataset load, and all
+    changes are saved with a single commit. Commands that change data
+    commit before reporting success, so a failed save (a lock timeout or
+    StaleDataError) is reported as an error instead of after the success
+    message. That commit is the only one: changes still uncommitted when
+    the command ends (it failed part way) are rolled back.
+
+    Args:
+        ctx: Click context
+
+    Returns:
+        Unit of work for the command
+    """
+    uow: UnitOfWork | None = ctx.obj.get("unit_of_work")
+    if uow is None:
+        uow = UnitOfWork(get_data_dir(ctx), get_store(ctx))
+        ctx.obj["unit_of_work"] = uow
+        ctx.call_on_close(uow.rollback)
+    return uow
+
+
 @cli.group()
 def add() -> None:
     """Add notes and tasks to your inbox.
@@ -107,8 +153,8 @@ def add_note(ctx: click.Context, content: str, course: str | None, topics: tuple
     Notes without a course are stored in your inbox for later organization.
     """
     try:
-        data_dir = get_data_dir(ctx)
-        service = NoteService(data_dir)
+        uow = get_unit_of_work(ctx)
+        service = uow.notes
 
         note = service.create_note(
             content=content,
@@ -117,6 +163,7 @@ def add_note(ctx: click.Context, content: str, course: str | None, topics: tuple
         )
 
         location = f"course '{course}'" if course else "inbox"
+        uow.commit()
         success(f"Note created: {note.id} in {location}")
 
         if topics:
@@ -182,8 +229,8 @@ def add_task(ctx: click.Context, title: str, due: str | None, priority: str, cou
     Tasks without a course are stored in your inbox for later organization.
     """
     try:
-        data_dir = get_data_dir(ctx)
-        service = TaskService(data_dir)
+        uow = get_unit_of_work(ctx)
+        service = uow.tasks
 
         # Parse due date
         due_date = None
@@ -202,6 +249,7 @@ def add_task(ctx: click.Context, title: str, due: str | None, priority: str, cou
         )
 
         location = f"course '{course}'" if course else "inbox"
+        uow.commit()
         success(f"Task created: {task.id} in {location}")
 
         if due_date:
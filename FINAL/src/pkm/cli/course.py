@@ -2,24 +2,26 @@
 
 import click
 
-from pkm.cli.add import get_data_dir
+from pkm.cli.add import get_unit_of_work
 from pkm.cli.helpers import error, info, success, warning
 from pkm.cli.main import cli
-from pkm.services.course_service import CourseService
+from pkm.storage.locking import StaleDataError
 
 
 @cli.group()
 def course() -> None:
-    """Manage courses - delete and reorganize.
+    """Manage courses - delete, rename and reorganize.
 
     \b
     Commands:
       pkm course delete COURSE_NAME    - Delete a course
+      pkm course rename OLD NEW        - Rename a course
 
     \b
     Examples:
       pkm course delete "Biology 101"
       pkm course delete "Math 201" --delete-items
+      pkm course rename "Bio 101" "Biology 101"
     """
     pass
 
@@ -55,8 +57,8 @@ def delete_course(ctx: click.Context, course_name: str, delete_items: bool, yes:
     permanently delete them (WARNING: cannot be undone!)
     """
     try:
-        data_dir = get_data_dir(ctx)
-        service = CourseService(data_dir)
+        uow = get_unit_of_work(ctx)
+        service = uow.courses
 
         # Check if course exists
         course = service.get_course(course_name)
@@ -83,6 +85,7 @@ def delete_course(ctx: click.Context, course_name: str, delete_items: bool, yes:
 
         # Delete the course
         counts = service.delete_course(course_name, reassign_to_inbox=not delete_items)
+        uow.commit()
 
         if delete_items:
             success(f"Course '{course_name}' deleted")
@@ -94,3 +97,35 @@ def delete_course(ctx: click.Context, course_name: str, delete_items: bool, yes:
     except Exception as e:
         error(f"Failed to delete course: {e}")
         ctx.exit(1)
+
+
+@course.command(name="rename")
+@click.argument("old_name", required=True)
+@click.argument("new_name", required=True)
+@click.pass_context
+def rename_course(ctx: click.Context, old_name: str, new_name: str) -> None:
+    """Rename a course on all of its notes and tasks.
+
+    \b
+    OLD_NAME: Current course name
+    NEW_NAME: New course name (an existing course is merged into)
+
+    \b
+    Examples:
+      pkm course rename "Bio 101" "Biology 101"
+    """
+    uow = get_unit_of_work(ctx)
+    try:
+        counts = uow.courses.rename_course(old_name, new_name)
+        uow.commit()
+    except (ValueError, StaleDataError, TimeoutError) as e:
+        error(f"Failed to rename course: {e}")
+        ctx.exit(1)
+
+    if not counts["notes"] and not counts["tasks"]:
+        error(f"Course not found: {old_name}")
+        info("Use 'pkm view courses' to see available courses")
+        ctx.exit(1)
+
+    success(f"Course '{old_name}' renamed to '{new_name}'")
+    info(f"Updated {counts['notes']} notes and {counts['tasks']} tasks")
@@ -7,6 +7,10 @@ from rich.console import Console
 from rich.markdown import Markdown
 from rich.panel import Panel
 
+from pkm.storage.backends import BACKENDS, DATA_FILES, DEFAULT_BACKEND
+from pkm.storage.encodings import DEFAULT_ENCODING, ENCODINGS
+from pkm.storage.json_store import DEFAULT_BACKUPS
+
 console = Console()
 
 
@@ -80,16 +84,17 @@ Your data is stored at ~/.pkm/data.json - completely offline and private!
     console.print()
 
 
-def check_first_run(data_dir: Path) -> bool:
+def check_first_run(data_dir: Path, backend: str = DEFAULT_BACKEND) -> bool:
     """Check if this is the user's first time running the app.
 
     Args:
         data_dir: Data directory path
+        backend: Storage backend in use
 
     Returns:
         True if first run, False otherwise
     """
-    data_file = data_dir / "data.json"
+    data_file = data_dir / DATA_FILES[backend]
     return not data_file.exists()
 
 
@@ -100,10 +105,50 @@ def check_first_run(data_dir: Path) -> bool:
     default=None,
     help="Directory for data storage (default: ~/.pkm)",
 )
+@click.option(
+    "--backend",
+    type=click.Choice(BACKENDS),
+    default=DEFAULT_BACKEND,
+    envvar="PKM_BACKEND",
+    show_default=True,
+    help="Storage backend: json, journal (append-only log), sqlite, or directory",
+)
+@click.option(
+    "--encoding",
+    type=click.Choice(ENCODINGS),
+    default=DEFAULT_ENCODING,
+    envvar="PKM_ENCODING",
+    show_default=True,
+    help="How json/journal backends write data.json (any encoding is read back)",
+)
+@click.option(
+    "--backups",
+    type=click.IntRange(min=0),
+    default=DEFAULT_BACKUPS,
+    envvar="PKM_BACKUPS",
+    show_default=True,
+    help="Backup generations of data.json to keep (data.json.bak, .bak.1, ...)",
+)
+@click.option(
+    "--backup-interval",
+    type=click.FloatRange(min=0),
+    default=None,
+    envvar="PKM_BACKUP_INTERVAL",
+    help="Only start a new backup generation every N seconds (e.g. 3600)",
+)
 @click.option("--no-color", is_flag=True, help="Disable colored output")
 @click.option("--verbose", "-v", is_flag=True, help="Enable verbose output")
 @click.pass_context
-def cli(ctx: click.Context, data_dir: str | None, no_color: bool, verbose: bool) -> None:
+def cli(
+    ctx: click.Context,
+    data_dir: str | None,
+    backend: str,
+    encoding: str,
+    backups: int,
+    backup_interval: float | None,
+    no_color: bool,
+    verbose: bool,
+) -> None:
     """Pro Study Planner - Terminal-based personal knowledge management for students.
 
     \b
@@ -124,11 +169,19 @@ def cli(ctx: click.Context, data_dir: str | None, no_color: bool, verbose: bool)
       pkm add note --help
       pkm view --help
 
-    Data is stored at ~/.pkm/data.json (or use --data-dir to customize)
+    Data is stored at ~/.pkm/data.json (or use --data-dir to customize).
+    Use --backend sqlite (or PKM_BACKEND=sqlite) for large collections;
+    an existing data.json is migrated on first use. Use --encoding compact,
+    gzip, lzma, marshal or ndjson (or PKM_ENCODING) for a smaller, faster
+    data.json.
     """
     # Store global options in context for subcommands
     ctx.ensure_object(dict)
     ctx.obj["data_dir"] = data_dir
+    ctx.obj["backend"] = backend
+    ctx.obj["encoding"] = encoding
+    ctx.obj["backups"] = backups
+    ctx.obj["backup_interval"] = backup_interval
     ctx.obj["no_color"] = no_color
     ctx.obj["verbose"] = verbose
 
@@ -138,7 +191,7 @@ def cli(ctx: click.Context, data_dir: str | None, no_color: bool, verbose: bool)
         data_path = Path(data_dir) if data_dir else Path.home() / ".pkm"
         data_path.mkdir(parents=True, exist_ok=True)
 
-        if check_first_run(data_path):
+        if check_first_run(data_path, backend):
             show_onboarding()
         else:
             # Show help if no subcommand
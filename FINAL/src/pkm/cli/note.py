@@ -1,34 +1,13 @@
 """Note management commands."""
 
-from pathlib import Path
-
 import click
 
+from pkm.cli.add import get_unit_of_work
 from pkm.cli.helpers import error, info, success, warning
 from pkm.cli.main import cli
-from pkm.services.note_service import NoteService
-from pkm.services.task_service import TaskService
 from pkm.utils.editor import open_in_editor
 
 
-def get_data_dir(ctx: click.Context) -> Path:
-    """Get data directory from context or use default.
-
-    Args:
-        ctx: Click context
-
-    Returns:
-        Path to data directory
-    """
-    data_dir = ctx.obj.get("data_dir")
-    if data_dir is None:
-        data_dir = Path.home() / ".pkm"
-    else:
-        data_dir = Path(data_dir)
-    data_dir.mkdir(parents=True, exist_ok=True)
-    return data_dir
-
-
 @cli.group()
 def note() -> None:
     """Manage notes - edit, delete, and organize.
@@ -83,8 +62,8 @@ def edit_note(ctx: click.Context, note_id: str) -> None:
     to update the note. If you exit without changes, the note is unchanged.
     """
     try:
-        data_dir = get_data_dir(ctx)
-        service = NoteService(data_dir)
+        uow = get_unit_of_work(ctx)
+        service = uow.notes
 
         # Get the note
         note = service.get_note(note_id)
@@ -110,6 +89,7 @@ def edit_note(ctx: click.Context, note_id: str) -> None:
         # Update the note
         updated_note = service.update_note(note_id, edited_content)
         if updated_note:
+            uow.commit()
             success(f"Note updated: {note_id}")
         else:
             error(f"Failed to update note: {note_id}")
@@ -145,9 +125,9 @@ def delete_note(ctx: click.Context, note_id: str, yes: bool) -> None:
     WARNING: This action cannot be undone!
     """
     try:
-        data_dir = get_data_dir(ctx)
-        note_service = NoteService(data_dir)
-        task_service = TaskService(data_dir)
+        uow = get_unit_of_work(ctx)
+        note_service = uow.notes
+        task_service = uow.tasks
 
         # Get the note
         note = note_service.get_note(note_id)
@@ -175,6 +155,7 @@ def delete_note(ctx: click.Context, note_id: str, yes: bool) -> None:
 
         # Delete the note
         if note_service.delete_note(note_id):
+            uow.commit()
             success(f"Note deleted: {note_id}")
         else:
             error(f"Failed to delete note: {note_id}")
@@ -202,12 +183,13 @@ def add_topic_to_note(ctx: click.Context, note_id: str, topics: tuple[str, ...])
       pkm note add-topic n_20251123_142055_abc "Biology" "Cell Structure"
     """
     try:
-        data_dir = get_data_dir(ctx)
-        service = NoteService(data_dir)
+        uow = get_unit_of_work(ctx)
+        service = uow.notes
 
         # Add topics
         note = service.add_topics(note_id, list(topics))
         if note:
+            uow.commit()
             success(f"Topics added to {note_id}")
             success(f"Current topics: {', '.join(note.topics)}")
         else:
@@ -235,8 +217,8 @@ def remove_topic_from_note(ctx: click.Context, note_id: str, topic: str) -> None
       pkm note remove-topic n_20251123_142055_abc "Biology"
     """
     try:
-        data_dir = get_data_dir(ctx)
-        service = NoteService(data_dir)
+        uow = get_unit_of_work(ctx)
+        service = uow.notes
 
         # Remove topic
         note = service.remove_topic(note_id, topic)
@@ -244,6 +226,7 @@ def remove_topic_from_note(ctx: click.Context, note_id: str, topic: str) -> None
             if topic in note.topics:
                 warning(f"Topic '{topic}' not found in note")
             else:
+                uow.commit()
                 success(f"Topic '{topic}' removed from {note_id}")
             if note.topics:
                 success(f"Remaining topics: {', '.join(note.topics)}")
@@ -277,8 +260,8 @@ def delete_topic_from_note(ctx: click.Context, note_id: str, topic: str) -> None
     This is an alias for remove-topic for easier discovery.
     """
     try:
-        data_dir = get_data_dir(ctx)
-        service = NoteService(data_dir)
+        uow = get_unit_of_work(ctx)
+        service = uow.notes
 
         note = service.remove_topic(note_id, topic)
 
@@ -287,6 +270,7 @@ def delete_topic_from_note(ctx: click.Context, note_id: str, topic: str) -> None
             info("Use 'pkm view inbox' to see note IDs")
             ctx.exit(1)
 
+        uow.commit()
         success(f"Topic '{topic}' removed from note {note_id}")
         if note.topics:
             info(f"Remaining topics: {', '.join(note.topics)}")
@@ -3,12 +3,10 @@
 
 import click
 
-from pkm.cli.add import get_data_dir
+from pkm.cli.add import get_unit_of_work
 from pkm.cli.helpers import error, info, success
 from pkm.cli.main import cli
-from pkm.services.note_service import NoteService
-from pkm.services.task_service import TaskService
-from pkm.utils.id_matcher import get_match_suggestions
+from pkm.storage.locking import StaleDataError
 
 
 @cli.group()
@@ -19,6 +17,7 @@ def organize() -> None:
     Commands:
       pkm organize note NOTE_ID --course NAME    - Move note to course
       pkm organize task TASK_ID --course NAME    - Move task to course
+      pkm organize rename-topic OLD NEW          - Rename a topic on all notes
 
     \b
     Examples:
@@ -64,18 +63,16 @@ def organize_note(ctx: click.Context, note_id: str, course: str, add_topics: tup
     or the full ID for convenience!
     """
     try:
-        data_dir = get_data_dir(ctx)
-        service = NoteService(data_dir)
+        uow = get_unit_of_work(ctx)
+        service = uow.notes
 
         # Organize to course
         note = service.organize_note(note_id, course)
 
         if note is None:
             # Try to provide helpful suggestions
-            all_notes = service.list_notes()
-            available_ids = [n.id for n in all_notes]
-            suggestions = get_match_suggestions(note_id, available_ids)
-            
+            suggestions = service.suggest_note_ids(note_id)
+
             if suggestions:
                 error(f"Note ID '{note_id}' matches multiple notes or is ambiguous:")
                 for suggestion in suggestions:
@@ -83,7 +80,7 @@ def organize_note(ctx: click.Context, note_id: str, course: str, add_topics: tup
                 info("Please be more specific or use the full ID.")
             else:
                 error(f"Note not found: {note_id}")
-                if all_notes:
+                if service.list_note_summaries():
                     info("Use 'pkm view inbox --show-ids' to see available note IDs")
             ctx.exit(1)
 
@@ -91,6 +88,7 @@ def organize_note(ctx: click.Context, note_id: str, course: str, add_topics: tup
         if add_topics:
             note = service.add_topics(note.id, list(add_topics))
 
+        uow.commit()
         success(f"Note '{note.id}' organized to '{course}'")
 
         if add_topics:
@@ -131,17 +129,15 @@ def organize_task(ctx: click.Context, task_id: str, course: str) -> None:
     or the full ID for convenience!
     """
     try:
-        data_dir = get_data_dir(ctx)
-        service = TaskService(data_dir)
+        uow = get_unit_of_work(ctx)
+        service = uow.tasks
 
         task = service.organize_task(task_id, course)
 
         if task is None:
             # Try to provide helpful suggestions
-            all_tasks = service.list_tasks()
-            available_ids = [t.id for t in all_tasks]
-            suggestions = get_match_suggestions(task_id, available_ids)
-            
+            suggestions = service.suggest_task_ids(task_id)
+
             if suggestions:
                 error(f"Task ID '{task_id}' matches multiple tasks or is ambiguous:")
                 for suggestion in suggestions:
@@ -149,13 +145,45 @@ def organize_task(ctx: click.Context, task_id: str, course: str) -> None:
                 info("Please be more specific or use the full ID.")
             else:
                 error(f"Task not found: {task_id}")
-                if all_tasks:
+                if service.list_task_records():
                     info("Use 'pkm view inbox --show-ids' to see available task IDs")
             ctx.exit(1)
 
+        uow.commit()
         success(f"Task '{task.id}' organized to '{course}'")
         info(f"Title: {task.title}")
 
     except Exception as e:
         error(f"Failed to organize task: {e}")
         ctx.exit(1)
+
+
+@organize.command(name="rename-topic")
+@click.argument("old_topic", required=True)
+@click.argument("new_topic", required=True)
+@click.pass_context
+def rename_topic(ctx: click.Context, old_topic: str, new_topic: str) -> None:
+    """Rename a topic on every note that has it.
+
+    \b
+    OLD_TOPIC: Current topic name
+    NEW_TOPIC: New topic name (an existing topic is merged into)
+
+    \b
+    Examples:
+      pkm organize rename-topic "ML" "Machine Learning"
+    """
+    uow = get_unit_of_work(ctx)
+    try:
+        count = uow.notes.rename_topic(old_topic, new_topic)
+        uow.commit()
+    except (ValueError, StaleDataError, TimeoutError) as e:
+        error(f"Failed to rename topic: {e}")
+        ctx.exit(1)
+
+    if not count:
+        error(f"Topic not found: {old_topic}")
+        info("Use 'pkm view topics' to see available topics")
+        ctx.exit(1)
+
+    success(f"Topic '{old_topic}' renamed to '{new_topic}' on {count} notes")
@@ -4,10 +4,9 @@
 import click
 from rich.console import Console
 
-from pkm.cli.add import get_data_dir
+from pkm.cli.add import get_unit_of_work
 from pkm.cli.helpers import create_table, error, info, truncate
 from pkm.cli.main import cli
-from pkm.services.search_service import SearchService
 from pkm.utils.date_parser import format_due_date
 
 
@@ -46,8 +45,8 @@ def search(ctx: click.Context, query: str, type: str | None, course: str | None,
     Search is case-insensitive and matches partial words.
     """
     try:
-        data_dir = get_data_dir(ctx)
-        search_service = SearchService(data_dir)
+        uow = get_unit_of_work(ctx)
+        search_service = uow.search
 
         notes, tasks = search_service.search(query, type, course, topic)
 
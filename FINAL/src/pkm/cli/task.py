@@ -3,10 +3,9 @@
 
 import click
 
-from pkm.cli.add import get_data_dir
+from pkm.cli.add import get_unit_of_work
 from pkm.cli.helpers import error, info, success
 from pkm.cli.main import cli
-from pkm.services.task_service import TaskService
 
 
 @cli.group()
@@ -50,8 +49,8 @@ def complete_task(ctx: click.Context, task_id: str) -> None:
     Completed tasks are marked with a timestamp and won't appear in active task views.
     """
     try:
-        data_dir = get_data_dir(ctx)
-        service = TaskService(data_dir)
+        uow = get_unit_of_work(ctx)
+        service = uow.tasks
 
         task = service.complete_task(task_id)
 
@@ -59,6 +58,7 @@ def complete_task(ctx: click.Context, task_id: str) -> None:
             error(f"Task not found: {task_id}")
             ctx.exit(1)
 
+        uow.commit()
         success(f"✓ Task completed: {task.title}")
         if task.completed_at:
             info(f"Completed at: {task.completed_at.strftime('%Y-%m-%d %H:%M')}")
@@ -93,8 +93,8 @@ def delete_task(ctx: click.Context, task_id: str, yes: bool) -> None:
     WARNING: This action cannot be undone!
     """
     try:
-        data_dir = get_data_dir(ctx)
-        service = TaskService(data_dir)
+        uow = get_unit_of_work(ctx)
+        service = uow.tasks
 
         # Get the task
         task = service.get_task(task_id)
@@ -120,6 +120,7 @@ def delete_task(ctx: click.Context, task_id: str, yes: bool) -> None:
 
         # Delete the task
         if service.delete_task(task_id):
+            uow.commit()
             success(f"Task deleted: {task_id}")
         else:
             error(f"Failed to delete task: {task_id}")
@@ -154,8 +155,8 @@ def add_subtask(ctx: click.Context, task_id: str, title: str) -> None:
     Subtasks help break down larger tasks into manageable steps.
     """
     try:
-        data_dir = get_data_dir(ctx)
-        service = TaskService(data_dir)
+        uow = get_unit_of_work(ctx)
+        service = uow.tasks
 
         task = service.add_subtask(task_id, title)
 
@@ -163,6 +164,7 @@ def add_subtask(ctx: click.Context, task_id: str, title: str) -> None:
             error(f"Task not found: {task_id}")
             ctx.exit(1)
 
+        uow.commit()
         success(f"Subtask added to '{task.title}'")
         info(f"Total subtasks: {len(task.subtasks)}")
 
@@ -200,8 +202,8 @@ def check_subtask(ctx: click.Context, task_id: str, subtask_id: int) -> None:
     Completed subtasks are marked with ✓ in task views.
     """
     try:
-        data_dir = get_data_dir(ctx)
-        service = TaskService(data_dir)
+        uow = get_unit_of_work(ctx)
+        service = uow.tasks
 
         task = service.complete_subtask(task_id, subtask_id)
 
@@ -216,6 +218,7 @@ def check_subtask(ctx: click.Context, task_id: str, subtask_id: int) -> None:
                 subtask_title = sub.title
                 break
 
+        uow.commit()
         success(f"✓ Subtask completed: {subtask_title}")
 
         # Show progress
@@ -253,12 +256,9 @@ def link_note(ctx: click.Context, task_id: str, note_id: str) -> None:
       pkm view task TASK_ID
     """
     try:
-        data_dir = get_data_dir(ctx)
-        task_service = TaskService(data_dir)
-
-        # Import note service to verify note exists
-        from pkm.services.note_service import NoteService
-        note_service = NoteService(data_dir)
+        uow = get_unit_of_work(ctx)
+        task_service = uow.tasks
+        note_service = uow.notes
 
         # Verify note exists
         note = note_service.get_note(note_id)
@@ -275,6 +275,7 @@ def link_note(ctx: click.Context, task_id: str, note_id: str) -> None:
             info("Use 'pkm view inbox' or 'pkm view course' to see task IDs")
             ctx.exit(1)
 
+        uow.commit()
         success(f"Note linked to task: {task.title}")
         info(f"Note: {note.content[:50]}..." if len(note.content) > 50 else f"Note: {note.content}")
 
@@ -299,8 +300,8 @@ def unlink_note(ctx: click.Context, task_id: str, note_id: str) -> None:
       pkm task unlink-note t_20251123_140000_xyz n_20251123_140000_abc
     """
     try:
-        data_dir = get_data_dir(ctx)
-        service = TaskService(data_dir)
+        uow = get_unit_of_work(ctx)
+        service = uow.tasks
 
         task = service.unlink_note(task_id, note_id)
 
@@ -308,6 +309,7 @@ def unlink_note(ctx: click.Context, task_id: str, note_id: str) -> None:
             error(f"Task not found: {task_id}")
             ctx.exit(1)
 
+        uow.commit()
         success(f"Note unlinked from task: {task.title}")
 
     except Exception as e:
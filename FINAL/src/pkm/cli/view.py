@@ -1,17 +1,16 @@
 """View commands for displaying notes and tasks."""
 
-from datetime import datetime
+from datetime import date, datetime, time, timedelta
 
 import click
 from rich.console import Console
 
-from pkm.cli.add import get_data_dir
-from pkm.cli.helpers import create_table, format_datetime, info, truncate
+from pkm.cli.add import get_unit_of_work
+from pkm.cli.helpers import create_table, error, format_datetime, info, truncate
 from pkm.cli.main import cli
-from pkm.services.course_service import CourseService
-from pkm.services.note_service import NoteService
-from pkm.services.task_service import TaskService
-from pkm.utils.date_parser import format_due_date
+from pkm.models.records import NoteRecord, TaskRecord
+from pkm.services.task_service import AGENDA_BUCKETS, TaskService
+from pkm.utils.date_parser import format_due_date, parse_due_date
 
 
 @cli.group()
@@ -27,6 +26,7 @@ def view() -> None:
       pkm view today    - Tasks due today
       pkm view week     - Tasks due this week
       pkm view overdue  - Overdue tasks
+      pkm view agenda   - All open tasks grouped by due date
 
     \b
     Coming soon:
@@ -40,6 +40,7 @@ def view() -> None:
       pkm view topics
       pkm view today
       pkm view week
+      pkm view agenda
       pkm view inbox --data-dir ~/my-notes
     """
     pass
@@ -75,9 +76,9 @@ def view_inbox(ctx: click.Context, show_ids: bool) -> None:
 
     Empty inbox = all items organized!
     """
-    data_dir = get_data_dir(ctx)
-    note_service = NoteService(data_dir)
-    task_service = TaskService(data_dir)
+    uow = get_unit_of_work(ctx)
+    note_service = uow.notes
+    task_service = uow.tasks
 
     inbox_notes = note_service.get_inbox_notes()
     inbox_tasks = task_service.get_inbox_tasks()
@@ -93,7 +94,7 @@ def view_inbox(ctx: click.Context, show_ids: bool) -> None:
             for note in inbox_notes:
                 table.add_row(
                     note.id,
-                    truncate(note.content, 60),
+                    truncate(note.preview, 60),
                     format_datetime(note.created_at),
                     ", ".join(note.topics) if note.topics else "-",
                 )
@@ -101,7 +102,7 @@ def view_inbox(ctx: click.Context, show_ids: bool) -> None:
             table = create_table("Inbox Notes", ["Content", "Created", "Topics"])
             for note in inbox_notes:
                 table.add_row(
-                    truncate(note.content, 60),
+                    truncate(note.preview, 60),
                     format_datetime(note.created_at),
                     ", ".join(note.topics) if note.topics else "-",
                 )
@@ -203,8 +204,8 @@ def view_notes(ctx: click.Context, course: str | None, topic: str | None) -> Non
       - Organize: pkm organize note <ID> "Course Name"
       - Link to tasks: pkm task link-note <task-id> <note-id>
     """
-    data_dir = get_data_dir(ctx)
-    note_service = NoteService(data_dir)
+    uow = get_unit_of_work(ctx)
+    note_service = uow.notes
 
     # Get notes based on filters
     if course:
@@ -214,7 +215,7 @@ def view_notes(ctx: click.Context, course: str | None, topic: str | None) -> Non
         notes = note_service.get_notes_by_topic(topic)
         title = f"Notes tagged '{topic}'"
     else:
-        notes = note_service.list_notes()
+        notes = note_service.list_note_summaries()
         title = "All Notes"
 
     if not notes:
@@ -238,7 +239,7 @@ def view_notes(ctx: click.Context, course: str | None, topic: str | None) -> Non
     for note in notes:
         table.add_row(
             note.id,
-            truncate(note.content, 50),
+            truncate(note.preview, 50),
             truncate(", ".join(note.topics), 30) if note.topics else "-",
             note.course or "[yellow](inbox)[/yellow]",
             format_datetime(note.created_at),
@@ -248,12 +249,98 @@ def view_notes(ctx: click.Context, course: str | None, topic: str | None) -> Non
     info(f"Total: {len(notes)} notes")
 
 
+def _parse_due_range(ctx: click.Context, due_between: tuple[str, str]) -> tuple[date, date]:
+    """Parse the days of a --due-between range, exiting on bad input.
+
+    Args:
+        ctx: Click context
+        due_between: START and END as typed
+
+    Returns:
+        Tuple of (first_day, last_day)
+
+    Raises:
+        click.BadParameter: If START falls after END
+    """
+    first, last = (parse_due_date(value) for value in due_between)
+    if first is None or last is None:
+        error(f"Could not parse due dates: '{due_between[0]}' '{due_between[1]}'")
+        info("Try formats like: 'tomorrow', 'next Friday', '2025-12-01'")
+        ctx.exit(1)
+    if first.date() > last.date():
+        raise click.BadParameter(
+            f"START ({due_between[0]} = {first:%Y-%m-%d}) is after "
+            f"END ({due_between[1]} = {last:%Y-%m-%d})",
+            ctx=ctx,
+            param_hint="'--due-between'",
+        )
+    return first.date(), last.date()
+
+
+def _tasks_due_between(
+    ctx: click.Context,
+    task_service: TaskService,
+    due_between: tuple[str, str],
+    course: str | None,
+    priority: str | None,
+) -> tuple[list[TaskRecord], str]:
+    """Get the tasks for --due-between, with the course and priority filters.
+
+    Args:
+        ctx: Click context
+        task_service: Task service to query
+        due_between: START and END as typed
+        course: Course to filter by
+        priority: Priority to filter by
+
+    Returns:
+        Tuple of (tasks, table_title)
+    """
+    first, last = _parse_due_range(ctx, due_between)
+    # Whole days: from the start of the first through the end of the last
+    start = datetime.combine(first, time.min)
+    end = datetime.combine(last + timedelta(days=1), time.min)
+    tasks = task_service.get_tasks_due_between(start, end)
+    title = f"Tasks Due {first:%b %d} - {last:%b %d}"
+    if course:
+        tasks = [t for t in tasks if t.course == course]
+        title = f"{title} in '{course}'"
+    if priority:
+        tasks = [t for t in tasks if t.priority == priority.lower()]
+    return tasks, title
+
+
+def _no_tasks_message(
+    due_between: tuple[str, str] | None, course: str | None, priority: str | None
+) -> str:
+    """Describe an empty task list in terms of the filter that emptied it."""
+    if due_between:
+        return f"No tasks due between {due_between[0]} and {due_between[1]}"
+    if course:
+        return f"No tasks found for course: {course}"
+    if priority:
+        return f"No {priority} priority tasks found"
+    return "No tasks found"
+
+
 @view.command(name="tasks")
 @click.option("--course", help="Filter by course name")
 @click.option("--priority", type=click.Choice(["high", "medium", "low"], case_sensitive=False), help="Filter by priority")
 @click.option("--status", type=click.Choice(["active", "completed", "all"], case_sensitive=False), default="active", help="Filter by status (default: active)")
+@click.option(
+    "--due-between",
+    nargs=2,
+    metavar="START END",
+    help="Only tasks due from START through END (both days included)",
+)
 @click.pass_context
-def view_tasks(ctx: click.Context, course: str | None, priority: str | None, status: str) -> None:
+def view_tasks(
+    ctx: click.Context,
+    course: str | None,
+    priority: str | None,
+    status: str,
+    due_between: tuple[str, str] | None,
+) -> None:
     """View all tasks with IDs for easy reference.
 
     \b
@@ -269,6 +356,8 @@ def view_tasks(ctx: click.Context, course: str | None, priority: str | None, sta
       --course TEXT        Filter tasks by course name
       --priority TEXT      Filter by priority (high/medium/low)
       --status TEXT        Filter by status: active (default), completed, or all
+      --due-between START END
+                           Filter by due date, from START through END
 
     \b
     Examples:
@@ -287,24 +376,29 @@ def view_tasks(ctx: click.Context, course: str | None, priority: str | None, sta
       # View completed tasks
       pkm view tasks --status completed
 
+      # View tasks due this week
+      pkm view tasks --due-between "today" "in 7 days"
+
     \b
     Use the task IDs to:
       - View full details: pkm view task <ID>
       - Organize: pkm organize task <ID> "Course Name"
       - Mark complete: pkm task complete <ID>
     """
-    data_dir = get_data_dir(ctx)
-    task_service = TaskService(data_dir)
+    uow = get_unit_of_work(ctx)
+    task_service = uow.tasks
 
     # Get tasks based on filters
-    if course:
+    if due_between:
+        tasks, title = _tasks_due_between(ctx, task_service, due_between, course, priority)
+    elif course:
         tasks = task_service.get_tasks_by_course(course)
         title = f"Tasks in '{course}'"
     elif priority:
         tasks = task_service.get_tasks_by_priority(priority.lower())
         title = f"{priority.capitalize()} Priority Tasks"
     else:
-        tasks = task_service.list_tasks()
+        tasks = task_service.list_task_records()
         title = "All Tasks"
 
     # Filter by completion status
@@ -317,12 +411,7 @@ def view_tasks(ctx: click.Context, course: str | None, priority: str | None, sta
     # status == "all" includes everything
 
     if not tasks:
-        if course:
-            info(f"No tasks found for course: {course}")
-        elif priority:
-            info(f"No {priority} priority tasks found")
-        else:
-            info("No tasks found")
+        info(_no_tasks_message(due_between, course, priority))
         return
 
     # Sort by due date (soonest first), with None at the end
@@ -396,25 +485,27 @@ def view_topics(ctx: click.Context, topic: str | None = None) -> None:
 
     Use this to explore your knowledge base by topic!
     """
-    data_dir = get_data_dir(ctx)
-    note_service = NoteService(data_dir)
+    uow = get_unit_of_work(ctx)
+    note_service = uow.notes
     console = Console()
 
-    # Get all topics
-    topics_map = note_service.get_all_topics()
+    # Get all topics (counts come from the topic index, no notes are read)
+    topic_counts = note_service.get_topic_counts()
 
-    if not topics_map:
+    if not topic_counts:
         info("No topics found. Add topics to notes using 'pkm organize add-topic'")
         ctx.exit(0)
 
     # Filter if specific topic requested
     if topic:
-        if topic not in topics_map:
+        if topic not in topic_counts:
             from pkm.cli.helpers import error
             error(f"Topic not found: {topic}")
-            info(f"Available topics: {', '.join(sorted(topics_map.keys()))}")
+            info(f"Available topics: {', '.join(sorted(topic_counts.keys()))}")
             ctx.exit(1)
-        topics_map = {topic: topics_map[topic]}
+        topics_map = {topic: note_service.get_notes_by_topic(topic)}
+    else:
+        topics_map = note_service.get_all_topics()
 
     # Sort topics alphabetically
     sorted_topics = sorted(topics_map.items())
@@ -436,7 +527,7 @@ def view_topics(ctx: click.Context, topic: str | None = None) -> None:
             console.print(f"  [yellow]{course}[/yellow]")
             for note in course_notes:
                 # Show note preview (first 60 chars)
-                preview = truncate(note.content, 60)
+                preview = truncate(note.preview, 60)
                 console.print(f"    • {note.id}: {preview}")
     
     console.print()
@@ -465,8 +556,8 @@ def view_today(ctx: click.Context) -> None:
 
     Use this command each morning to see what's on your plate for the day!
     """
-    data_dir = get_data_dir(ctx)
-    task_service = TaskService(data_dir)
+    uow = get_unit_of_work(ctx)
+    task_service = uow.tasks
 
     tasks = task_service.get_tasks_today()
 
@@ -530,8 +621,8 @@ def view_week(ctx: click.Context) -> None:
 
     Great for weekly planning and seeing what's coming up!
     """
-    data_dir = get_data_dir(ctx)
-    task_service = TaskService(data_dir)
+    uow = get_unit_of_work(ctx)
+    task_service = uow.tasks
 
     tasks = task_service.get_tasks_this_week()
 
@@ -595,8 +686,8 @@ def view_overdue(ctx: click.Context) -> None:
 
     Time to catch up on these! Complete or reschedule overdue tasks.
     """
-    data_dir = get_data_dir(ctx)
-    task_service = TaskService(data_dir)
+    uow = get_unit_of_work(ctx)
+    task_service = uow.tasks
 
     tasks = task_service.get_tasks_overdue()
 
@@ -638,6 +729,83 @@ def view_overdue(ctx: click.Context) -> None:
     info(f"[red]Total: {len(tasks)} overdue tasks[/red]")
 
 
+# Agenda bucket -> table title
+AGENDA_TITLES = {
+    "overdue": "[red]Overdue[/red]",
+    "today": "Today",
+    "this_week": "This Week",
+    "later": "Later",
+    "no_date": "No Due Date",
+}
+
+
+@view.command(name="agenda")
+@click.pass_context
+def view_agenda(ctx: click.Context) -> None:
+    """View all open tasks grouped by when they are due.
+
+    \b
+    Shows one table per group, from a single load of your tasks:
+      - Overdue (due before today)
+      - Today
+      - This Week (the next 7 days)
+      - Later
+      - No Due Date
+    Empty groups are left out. Completed tasks are not shown.
+
+    \b
+    Examples:
+      # See everything on your plate at once
+      pkm view agenda
+
+    Combines 'view overdue', 'view today' and 'view week' in one command.
+    """
+    uow = get_unit_of_work(ctx)
+    agenda = uow.tasks.get_agenda()
+
+    if not any(agenda.values()):
+        info("No open tasks!")
+        return
+
+    priority_order = {"high": 0, "medium": 1, "low": 2}
+    for bucket in AGENDA_BUCKETS:
+        tasks = agenda[bucket]
+        if not tasks:
+            continue
+
+        # Dated groups by due date, the undated group by priority
+        if bucket == "no_date":
+            tasks.sort(key=lambda t: priority_order[t.priority])
+        else:
+            tasks.sort(key=lambda t: t.due_date or datetime.max)
+
+        table = create_table(
+            f"{AGENDA_TITLES[bucket]} ({len(tasks)})", ["Title", "Due", "Priority", "Course"]
+        )
+        for task in tasks:
+            priority_color = {
+                "high": "[red]HIGH[/red]",
+                "medium": "[yellow]MED[/yellow]",
+                "low": "[green]LOW[/green]",
+            }[task.priority]
+            due_display = format_due_date(task.due_date) if task.due_date else "-"
+            if bucket == "overdue":
+                due_display = f"[red]{due_display}[/red]"
+
+            table.add_row(
+                truncate(task.title, 35),
+                truncate(due_display, 30),
+                priority_color,
+                task.course or "-",
+            )
+        Console().print(table)
+
+    counts = ", ".join(
+        f"{len(agenda[bucket])} {bucket.replace('_', ' ')}" for bucket in AGENDA_BUCKETS
+    )
+    info(f"Total: {sum(len(tasks) for tasks in agenda.values())} open tasks ({counts})")
+
+
 @view.command(name="course")
 @click.argument("course_name", required=True)
 @click.pass_context
@@ -663,9 +831,9 @@ def view_course(ctx: click.Context, course_name: str) -> None:
 
     This helps you see all content related to a specific class.
     """
-    data_dir = get_data_dir(ctx)
-    note_service = NoteService(data_dir)
-    task_service = TaskService(data_dir)
+    uow = get_unit_of_work(ctx)
+    note_service = uow.notes
+    task_service = uow.tasks
 
     notes = note_service.get_notes_by_course(course_name)
     tasks = task_service.get_tasks_by_course(course_name)
@@ -682,7 +850,7 @@ def view_course(ctx: click.Context, course_name: str) -> None:
         table = create_table(f"Notes ({len(notes)})", ["Content", "Created", "Topics"])
         for note in notes[:10]:  # Show first 10
             table.add_row(
-                truncate(note.content, 50),
+                truncate(note.preview, 50),
                 format_datetime(note.created_at),
                 ", ".join(note.topics) if note.topics else "-",
             )
@@ -725,7 +893,7 @@ def view_courses(ctx: click.Context) -> None:
     Shows:
       - All courses in your system
       - Number of notes per course
-      - Number of tasks per course
+      - Number of tasks per course, open and overdue
 
     \b
     Examples:
@@ -734,8 +902,8 @@ def view_courses(ctx: click.Context) -> None:
 
     Use this to see all your classes and their content at a glance.
     """
-    data_dir = get_data_dir(ctx)
-    course_service = CourseService(data_dir)
+    uow = get_unit_of_work(ctx)
+    course_service = uow.courses
 
     courses = course_service.list_courses()
 
@@ -743,14 +911,20 @@ def view_courses(ctx: click.Context) -> None:
         info("No courses found. Organize notes and tasks to create courses.")
         return
 
-    table = create_table(f"Courses ({len(courses)})", ["Course", "Notes", "Tasks", "Total Items"])
+    table = create_table(
+        f"Courses ({len(courses)})",
+        ["Course", "Notes", "Tasks", "Open", "Overdue", "Total Items"],
+    )
 
     for course in courses:
         total = course.note_count + course.task_count
+        overdue = str(course.overdue_task_count)
         table.add_row(
             course.name,
             str(course.note_count),
             str(course.task_count),
+            str(course.open_task_count),
+            f"[red]{overdue}[/red]" if course.overdue_task_count else overdue,
             str(total),
         )
 
@@ -792,9 +966,9 @@ def view_task(ctx: click.Context, task_id: str, expand: bool) -> None:
     """
     from pkm.cli.helpers import error
 
-    data_dir = get_data_dir(ctx)
-    task_service = TaskService(data_dir)
-    note_service = NoteService(data_dir)
+    uow = get_unit_of_work(ctx)
+    task_service = uow.tasks
+    note_service = uow.notes
     console = Console()
 
     # Get the task
@@ -833,17 +1007,15 @@ def view_task(ctx: click.Context, task_id: str, expand: bool) -> None:
     # Show linked notes
     if task.linked_notes:
         console.print(f"\n[bold]Linked Notes ({len(task.linked_notes)}):[/bold]")
-        for note_id in task.linked_notes:
-            note = note_service.get_note(note_id)
-            if note:
-                if expand:
-                    console.print(f"\n[cyan]━━━ {note_id} ━━━[/cyan]")
-                    console.print(note.content)
-                    if note.topics:
-                        console.print(f"Topics: {', '.join(note.topics)}")
-                else:
-                    preview = truncate(note.content, 60)
-                    console.print(f"  • {note_id}: {preview}")
+        for note in note_service.get_notes(task.linked_notes):
+            if expand:
+                console.print(f"\n[cyan]━━━ {note.id} ━━━[/cyan]")
+                console.print(note.content)
+                if note.topics:
+                    console.print(f"Topics: {', '.join(note.topics)}")
+            else:
+                preview = truncate(note.content, 60)
+                console.print(f"  • {note.id}: {preview}")
 
         if not expand:
             info("Use --expand to see full note content")
@@ -876,9 +1048,9 @@ def view_note(ctx: click.Context, note_id: str) -> None:
     """
     from pkm.cli.helpers import error
 
-    data_dir = get_data_dir(ctx)
-    note_service = NoteService(data_dir)
-    task_service = TaskService(data_dir)
+    uow = get_unit_of_work(ctx)
+    note_service = uow.notes
+    task_service = uow.tasks
     console = Console()
 
     # Get the note
@@ -909,14 +1081,74 @@ def view_note(ctx: click.Context, note_id: str) -> None:
     # Show tasks that reference this note
     if note.linked_from_tasks:
         console.print(f"\n[bold]Referenced by Tasks ({len(note.linked_from_tasks)}):[/bold]")
-        for task_id in note.linked_from_tasks:
-            task = task_service.get_task(task_id)
-            if task:
-                status = "✓" if task.completed else " "
-                priority_color = "red" if task.priority == "high" else "yellow" if task.priority == "medium" else "green"
-                console.print(f"  [{status}] [{priority_color}]{task.priority:6}[/{priority_color}] {task.title} ({task_id})")
+        for task in task_service.get_tasks(note.linked_from_tasks):
+            status = "✓" if task.completed else " "
+            priority_color = "red" if task.priority == "high" else "yellow" if task.priority == "medium" else "green"
+            console.print(f"  [{status}] [{priority_color}]{task.priority:6}[/{priority_color}] {task.title} ({task.id})")
     else:
         console.print("\n[dim]No tasks reference this note[/dim]")
         info("Use 'pkm task link-note TASK_ID NOTE_ID' to link this note to a task")
 
     console.print()
+
+
+@view.command(name="graph")
+@click.argument("item_id", required=True)
+@click.option(
+    "--depth", "-d", type=click.IntRange(min=0), default=1, show_default=True,
+    help="Number of links to follow",
+)
+@click.pass_context
+def view_graph(ctx: click.Context, item_id: str, depth: int) -> None:
+    """View the notes and tasks linked to an item, and what those link to.
+
+    \b
+    ITEM_ID: A note or task ID (partial IDs work too)
+
+    \b
+    Options:
+      -d, --depth N   Number of links to follow (default: 1)
+
+    \b
+    Examples:
+      # Notes linked to a task
+      pkm view graph t1
+
+      # A note, its tasks, and the other notes of those tasks
+      pkm view graph n3 --depth 2
+
+    Each item is shown once, under the item it was first reached from.
+    """
+    from pkm.cli.helpers import error
+
+    uow = get_unit_of_work(ctx)
+    nodes = uow.graph.get_neighborhood(item_id, depth)
+
+    if not nodes:
+        error(f"Note or task not found: {item_id}")
+        info("Use 'pkm view notes' or 'pkm view tasks' to see IDs")
+        ctx.exit(1)
+
+    children: dict[str | None, list[NoteRecord | TaskRecord]] = {}
+    for node in nodes[1:]:
+        children.setdefault(node.parent, []).append(node.record)
+
+    console = Console()
+
+    def describe(record: NoteRecord | TaskRecord) -> str:
+        """Format one note or task line."""
+        if isinstance(record, TaskRecord):
+            status = "✓" if record.completed else " "
+            return f"[{status}] [bold]{record.id}[/bold] {truncate(record.title, 50)}"
+        return f"[cyan]{record.id}[/cyan] {truncate(record.preview, 50)}"
+
+    def show(record: NoteRecord | TaskRecord, indent: int) -> None:
+        """Print an item and, below it, the items reached from it."""
+        console.print(f"{'    ' * indent}{'• ' if indent else ''}{describe(record)}")
+        for child in children.get(record.id, []):
+            show(child, indent + 1)
+
+    console.print()
+    show(nodes[0].record, 0)
+    console.print()
+    info(f"Linked items within {depth} link(s): {len(nodes) - 1}")
@@ -10,10 +10,14 @@ class Course(BaseModel):
         name: Course name (e.g., "Biology 101")
         note_count: Number of notes in this course (computed)
         task_count: Number of tasks in this course (computed)
+        open_task_count: Number of tasks not yet completed (computed)
+        overdue_task_count: Number of open tasks due before today (computed)
     """
 
     name: str = Field(..., min_length=1, max_length=100)
     note_count: int = Field(default=0, ge=0)
     task_count: int = Field(default=0, ge=0)
+    open_task_count: int = Field(default=0, ge=0)
+    overdue_task_count: int = Field(default=0, ge=0)
 
     model_config = {"frozen": False}
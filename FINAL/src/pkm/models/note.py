@@ -36,3 +36,4 @@ class Note(BaseModel):
         return v
 
     model_config = {"frozen": False}  # Allow modification of fields
+
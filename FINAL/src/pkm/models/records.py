@@ -0,0 +1,101 @@
+"""Lightweight read-only records for list views.
+
+Listing commands read a handful of fields from thousands of rows. These
+records are named tuples: no per-instance dict, no validation, and no way
+to modify them. Services return them from bulk read paths; full Note/Task
+models are only built for a record that is about to change.
+"""
+
+from datetime import datetime
+from typing import NamedTuple
+
+from pkm.models.task import (
+    completed_percent,
+    due_is_overdue,
+    due_is_this_week,
+    due_is_today,
+)
+
+
+class NoteRecord(NamedTuple):
+    """Note metadata with a short preview in place of the full content.
+
+    Attributes:
+        id: Unique identifier
+        preview: First characters of the note content
+        created_at: Timestamp when note was created
+        modified_at: Last modification timestamp
+        course: Course assignment (None = inbox)
+        topics: Topic tags for categorization
+        linked_from_tasks: Task IDs that reference this note
+    """
+
+    id: str
+    preview: str
+    created_at: datetime
+    modified_at: datetime
+    course: str | None = None
+    topics: tuple[str, ...] = ()
+    linked_from_tasks: tuple[str, ...] = ()
+
+
+class SubtaskRecord(NamedTuple):
+    """Read-only subtask of a TaskRecord.
+
+    Attributes:
+        id: Subtask ID (unique within parent task)
+        title: Subtask description
+        completed: Completion status
+    """
+
+    id: int
+    title: str
+    completed: bool = False
+
+
+class TaskRecord(NamedTuple):
+    """Read-only task row with the same fields and due-date helpers as Task.
+
+    Attributes:
+        id: Unique identifier
+        title: Task description
+        created_at: Timestamp when task was created
+        due_date: When task is due (None = no deadline)
+        priority: Task priority (high, medium, low)
+        completed: Completion status
+        completed_at: When task was marked complete
+        course: Course assignment (None = inbox)
+        linked_notes: Note IDs providing context for this task
+        subtasks: Nested subtasks
+    """
+
+    id: str
+    title: str
+    created_at: datetime
+    due_date: datetime | None = None
+    priority: str = "medium"
+    completed: bool = False
+    completed_at: datetime | None = None
+    course: str | None = None
+    linked_notes: tuple[str, ...] = ()
+    subtasks: tuple[SubtaskRecord, ...] = ()
+
+    @property
+    def is_overdue(self) -> bool:
+        """Check if task is overdue."""
+        return due_is_overdue(self.due_date, self.completed)
+
+    @property
+    def is_due_today(self) -> bool:
+        """Check if task is due today."""
+        return due_is_today(self.due_date)
+
+    @property
+    def is_due_this_week(self) -> bool:
+        """Check if task is due within 7 days."""
+        return due_is_this_week(self.due_date)
+
+    @property
+    def subtask_progress(self) -> float:
+        """Calculate percentage of completed subtasks."""
+        return completed_percent([st.completed for st in self.subtasks])
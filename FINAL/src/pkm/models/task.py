@@ -1,6 +1,7 @@
 """Task and Subtask model definitions."""
 
-from datetime import datetime
+from collections.abc import Sequence
+from datetime import datetime, timedelta
 from typing import Literal
 
 from pydantic import BaseModel, Field, field_validator, model_validator
@@ -22,6 +23,65 @@ class Subtask(BaseModel):
     model_config = {"frozen": False}
 
 
+def due_is_overdue(due_date: datetime | None, completed: bool) -> bool:
+    """Check if an open task with this due date is overdue.
+
+    Shared by Task and the read-only TaskRecord.
+
+    Args:
+        due_date: When the task is due (None = no deadline)
+        completed: Completion status
+
+    Returns:
+        True if the task is open and its due date has passed
+    """
+    if due_date is None or completed:
+        return False
+    return due_date < datetime.now()
+
+
+def due_is_today(due_date: datetime | None) -> bool:
+    """Check if a due date falls on today.
+
+    Args:
+        due_date: When the task is due (None = no deadline)
+
+    Returns:
+        True if the due date is today
+    """
+    if due_date is None:
+        return False
+    return due_date.date() == datetime.now().date()
+
+
+def due_is_this_week(due_date: datetime | None) -> bool:
+    """Check if a due date falls within the next 7 days.
+
+    Args:
+        due_date: When the task is due (None = no deadline)
+
+    Returns:
+        True if the due date is between now and 7 days from now
+    """
+    if due_date is None:
+        return False
+    return datetime.now() <= due_date <= datetime.now() + timedelta(days=7)
+
+
+def completed_percent(completed: Sequence[bool]) -> float:
+    """Calculate the percentage of completed subtasks.
+
+    Args:
+        completed: Completion status of each subtask
+
+    Returns:
+        Percentage from 0 to 100 (0 when there are no subtasks)
+    """
+    if not completed:
+        return 0.0
+    return (sum(completed) / len(completed)) * 100
+
+
 class Task(BaseModel):
     """An actionable item with optional deadline, priority, and subtasks.
 
@@ -69,32 +129,21 @@ class Task(BaseModel):
     @property
     def is_overdue(self) -> bool:
         """Check if task is overdue."""
-        if self.due_date is None or self.completed:
-            return False
-        return self.due_date < datetime.now()
+        return due_is_overdue(self.due_date, self.completed)
 
     @property
     def is_due_today(self) -> bool:
         """Check if task is due today."""
-        if self.due_date is None:
-            return False
-        return self.due_date.date() == datetime.now().date()
+        return due_is_today(self.due_date)
 
     @property
     def is_due_this_week(self) -> bool:
         """Check if task is due within 7 days."""
-        if self.due_date is None:
-            return False
-        from datetime import timedelta
-
-        return datetime.now() <= self.due_date <= datetime.now() + timedelta(days=7)
+        return due_is_this_week(self.due_date)
 
     @property
     def subtask_progress(self) -> float:
         """Calculate percentage of completed subtasks."""
-        if not self.subtasks:
-            return 0.0
-        completed = sum(1 for st in self.subtasks if st.completed)
-        return (completed / len(self.subtasks)) * 100
+        return completed_percent([st.completed for st in self.subtasks])
 
     model_config = {"frozen": False}
@@ -1,52 +1,58 @@
 """Course service for managing courses."""
 
 from pathlib import Path
+from typing import Any, cast
 
 from pkm.models.course import Course
-from pkm.services.note_service import NoteService
 from pkm.services.task_service import TaskService
+from pkm.storage.backends import Store
 from pkm.storage.json_store import JSONStore
+from pkm.storage.migrations import add_course_stats, get_course_stats, update_topic_index
+
+
+def _course(name: str, entry: dict[str, int], overdue: int) -> Course:
+    """Build a Course from its stored counts."""
+    return Course(
+        name=name,
+        note_count=entry["notes"],
+        task_count=entry["tasks"],
+        open_task_count=entry["open"],
+        overdue_task_count=overdue,
+    )
 
 
 class CourseService:
     """Service for managing courses."""
 
-    def __init__(self, data_dir: Path) -> None:
+    def __init__(
+        self,
+        data_dir: Path,
+        store: Store | None = None,
+        task_service: TaskService | None = None,
+    ) -> None:
         """Initialize course service.
 
         Args:
             data_dir: Directory containing data.json
+            store: Storage backend to use (default: JSONStore on data.json)
+            task_service: Existing task service to reuse
         """
-        self.store = JSONStore(data_dir / "data.json")
-        self.note_service = NoteService(data_dir)
-        self.task_service = TaskService(data_dir)
+        self.store = store if store is not None else JSONStore(data_dir / "data.json")
+        self.task_service = task_service or TaskService(data_dir, self.store)
 
     def list_courses(self) -> list[Course]:
         """List all courses with note and task counts.
 
+        Note, task and open-task counts are kept in the data by every
+        change. Overdue counts depend on the date, so they come from the
+        task table's sorted due column.
+
         Returns:
             List of courses with metadata
         """
-        data = self.store.load()
-        courses: dict[str, Course] = {}
-
-        # Count notes by course
-        for note_data in data["notes"]:
-            course_name = note_data.get("course")
-            if course_name:
-                if course_name not in courses:
-                    courses[course_name] = Course(name=course_name, note_count=0, task_count=0)
-                courses[course_name].note_count += 1
-
-        # Count tasks by course
-        for task_data in data["tasks"]:
-            course_name = task_data.get("course")
-            if course_name:
-                if course_name not in courses:
-                    courses[course_name] = Course(name=course_name, note_count=0, task_count=0)
-                courses[course_name].task_count += 1
-
-        return sorted(courses.values(), key=lambda c: c.name)
+        stats = get_course_stats(self.store.load())
+        overdue = self.task_service.count_overdue_by_course()
+        return [_course(name, stats[name], overdue.get(name, 0)) for name in sorted(stats)]
 
     def get_course(self, course_name: str) -> Course | None:
         """Get a course with counts.
@@ -57,11 +63,11 @@ class CourseService:
         Returns:
             Course if exists, None otherwise
         """
-        courses = self.list_courses()
-        for course in courses:
-            if course.name == course_name:
-                return course
-        return None
+        entry = get_course_stats(self.store.load()).get(course_name)
+        if entry is None:
+            return None
+        overdue = self.task_service.count_overdue_by_course().get(course_name, 0)
+        return _course(course_name, entry, overdue)
 
     def delete_course(self, course_name: str, reassign_to_inbox: bool = True) -> dict[str, int]:
         """Delete a course and optionally move its items to inbox.
@@ -73,38 +79,63 @@ class CourseService:
         Returns:
             Dictionary with counts: {"notes": count, "tasks": count}
         """
-        data = self.store.load()
-        counts = {"notes": 0, "tasks": 0}
-
-        # Handle notes
-        for i, note_data in enumerate(data["notes"]):
-            if note_data.get("course") == course_name:
-                if reassign_to_inbox:
-                    note_data["course"] = None
-                    data["notes"][i] = note_data
-                    counts["notes"] += 1
-                else:
-                    # Mark for deletion (will remove later)
-                    note_data["_to_delete"] = True
+        with self.store.locked():
+            data = self.store.load()
+            counts = {"notes": 0, "tasks": 0}
+
+            # Handle notes (records are replaced, never modified in place)
+            for i, note_data in enumerate(data["notes"]):
+                if note_data.get("course") == course_name:
                     counts["notes"] += 1
+                    if reassign_to_inbox:
+                        data["notes"][i] = {**note_data, "course": None}
 
-        # Handle tasks
-        for i, task_data in enumerate(data["tasks"]):
-            if task_data.get("course") == course_name:
-                if reassign_to_inbox:
-                    task_data["course"] = None
-                    data["tasks"][i] = task_data
-                    counts["tasks"] += 1
-                else:
-                    # Mark for deletion
-                    task_data["_to_delete"] = True
+            # Handle tasks
+            for i, task_data in enumerate(data["tasks"]):
+                if task_data.get("course") == course_name:
                     counts["tasks"] += 1
+                    if reassign_to_inbox:
+                        data["tasks"][i] = {**task_data, "course": None}
+
+            # Remove the course's items when not moving them to inbox
+            if not reassign_to_inbox:
+                for note_data in data["notes"]:
+                    if note_data.get("course") == course_name:
+                        update_topic_index(data, note_data["id"], note_data.get("topics", []), [])
+                data["notes"] = [n for n in data["notes"] if n.get("course") != course_name]
+                data["tasks"] = [t for t in data["tasks"] if t.get("course") != course_name]
 
-        # Remove items marked for deletion
-        if not reassign_to_inbox:
-            data["notes"] = [n for n in data["notes"] if not n.get("_to_delete")]
-            data["tasks"] = [t for t in data["tasks"] if not t.get("_to_delete")]
+            add_course_stats(cast(dict[str, Any], data))
+            self.store.save(data)
+            return counts
 
-        self.store.save(data)
-        return counts
+    def rename_course(self, old_name: str, new_name: str) -> dict[str, int]:
+        """Rename a course on all of its notes and tasks.
 
+        Renaming onto an existing course merges the two.
+
+        Args:
+            old_name: Current course name
+            new_name: New course name
+
+        Returns:
+            Dictionary with counts: {"notes": count, "tasks": count}
+
+        Raises:
+            ValidationError: If the new name is not a valid course name
+        """
+        Course(name=new_name)  # Validate the new name before touching data
+        with self.store.locked():
+            data = self.store.load()
+            counts = {"notes": 0, "tasks": 0}
+
+            for kind in ("notes", "tasks"):
+                for i, record in enumerate(data[kind]):
+                    if record.get("course") == old_name:
+                        counts[kind] += 1
+                        data[kind][i] = {**record, "course": new_name}
+
+            if counts["notes"] or counts["tasks"]:
+                add_course_stats(cast(dict[str, Any], data))
+                self.store.save(data)
+            return counts
@@ -0,0 +1,139 @@
+"""Graph service for walking the links between notes and tasks."""
+
+from collections import deque
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from pkm.models.records import NoteRecord, TaskRecord
+from pkm.services.note_service import NoteService
+from pkm.services.task_service import TaskService
+from pkm.storage.backends import Store
+from pkm.storage.index import find_record
+from pkm.storage.schema import (
+    DataSchema,
+    deserialize_note_record,
+    deserialize_task_record,
+    summarize_note,
+)
+
+# Record kind -> (kind its links point to, field holding the linked IDs)
+LINKS = {"tasks": ("notes", "linked_notes"), "notes": ("tasks", "linked_from_tasks")}
+
+
+class GraphNode(NamedTuple):
+    """One note or task reached by a walk over the link graph.
+
+    Attributes:
+        depth: Number of links between it and the starting item
+        parent: ID of the item it was reached from (None for the start)
+        record: Read-only note or task record
+    """
+
+    depth: int
+    parent: str | None
+    record: NoteRecord | TaskRecord
+
+
+class GraphService:
+    """Service for exploring linked notes and tasks.
+
+    The links are stored on both ends (linked_notes on tasks,
+    linked_from_tasks on notes), so every record already holds its
+    adjacency list. A walk loads the data once and finds each neighbor
+    through the record index, so it costs one lookup per link followed.
+    """
+
+    def __init__(
+        self,
+        data_dir: Path,
+        store: Store | None = None,
+        note_service: NoteService | None = None,
+        task_service: TaskService | None = None,
+    ) -> None:
+        """Initialize graph service.
+
+        Args:
+            data_dir: Directory containing data.json
+            store: Storage backend to use (default: JSONStore on data.json)
+            note_service: Existing note service to reuse
+            task_service: Existing task service to reuse
+        """
+        self.note_service = note_service or NoteService(data_dir, store)
+        self.task_service = task_service or TaskService(data_dir, store)
+        self.store = self.note_service.store
+
+    def _locate(self, data: DataSchema, item_id: str) -> tuple[str, int] | None:
+        """Find a note or task by full or partial ID."""
+        for kind in ("notes", "tasks"):
+            i = find_record(self.store, data, kind, item_id)
+            if i is not None:
+                return kind, i
+
+        matched = self.note_service.resolve_note_ids([item_id])[item_id]
+        kind = "notes"
+        if matched is None:
+            matched = self.task_service.resolve_task_ids([item_id])[item_id]
+            kind = "tasks"
+        if matched is None:
+            return None
+        i = find_record(self.store, data, kind, matched)
+        return None if i is None else (kind, i)
+
+    @staticmethod
+    def _record(kind: str, record: dict[str, Any]) -> NoteRecord | TaskRecord:
+        """Build the read-only record for a stored note or task."""
+        if kind == "notes":
+            return deserialize_note_record(summarize_note(record))
+        return deserialize_task_record(record)
+
+    def get_neighborhood(self, item_id: str, depth: int = 1) -> list[GraphNode]:
+        """Get every note and task within a number of links of an item.
+
+        Walks the links breadth first from a single load of the data, so
+        each item appears once, at its shortest distance. Links to items
+        that no longer exist are skipped.
+
+        Args:
+            item_id: Full or partial ID of the note or task to start from
+            depth: Maximum number of links to follow
+
+        Returns:
+            Items in the order they were reached, starting with the item
+            itself; empty if the item was not found
+
+        Raises:
+            ValueError: If depth is negative
+        """
+        if depth < 0:
+            raise ValueError("depth must not be negative")
+
+        data = self.store.load()
+        start = self._locate(data, item_id)
+        if start is None:
+            return []
+
+        kind, i = start
+        record = data[kind][i]  # type: ignore[literal-required]
+        nodes = [GraphNode(0, None, self._record(kind, record))]
+        seen = {record["id"]}
+        queue = deque([(kind, record, 0)])
+
+        while queue:
+            kind, record, distance = queue.popleft()
+            if distance == depth:
+                continue
+            linked_kind, field = LINKS[kind]
+            for linked_id in record.get(field, []):
+                if linked_id in seen:
+                    continue
+                j = find_record(self.store, data, linked_kind, linked_id)
+                if j is None:
+                    continue
+                seen.add(linked_id)
+                linked = data[linked_kind][j]  # type: ignore[literal-required]
+                nodes.append(
+                    GraphNode(distance + 1, record["id"], self._record(linked_kind, linked))
+                )
+                queue.append((linked_kind, linked, distance + 1))
+
+        return nodes
@@ -1,43 +1,48 @@
 """Note service for note management business logic."""
 
-import re
+from collections.abc import Hashable, Iterator
 from datetime import datetime
 from pathlib import Path
 
-from pkm.models.common import reset_id_counter
 from pkm.models.note import Note
-from pkm.services.id_generator import generate_note_id
+from pkm.models.records import NoteRecord
+from pkm.storage.backends import Store
+from pkm.storage.ids import COUNTER_FILE, IdAllocator
+from pkm.storage.index import find_record
 from pkm.storage.json_store import JSONStore
-from pkm.storage.schema import deserialize_note, serialize_note
-from pkm.utils.id_matcher import find_matching_id
+from pkm.storage.migrations import (
+    claim_id,
+    get_next_id,
+    get_topic_index,
+    update_course_stats,
+    update_topic_index,
+)
+from pkm.storage.schema import (
+    DataSchema,
+    deserialize_note,
+    deserialize_note_record,
+    serialize_note,
+    summarize_note,
+)
+from pkm.utils.id_matcher import IdMatcher
 
 
 class NoteService:
     """Service for managing notes."""
 
-    def __init__(self, data_dir: Path) -> None:
+    def __init__(self, data_dir: Path, store: Store | None = None) -> None:
         """Initialize note service.
 
         Args:
             data_dir: Directory containing data.json
+            store: Storage backend to use (default: JSONStore on data.json)
         """
-        self.store = JSONStore(data_dir / "data.json")
-        self._initialize_id_counter()
-
-    def _initialize_id_counter(self) -> None:
-        """Initialize the ID counter based on existing notes."""
-        data = self.store.load()
-        max_id = 0
-
-        for note_data in data.get("notes", []):
-            note_id = note_data.get("id", "")
-            # Extract number from ID (e.g., "n5" -> 5)
-            match = re.match(r"n(\d+)", note_id)
-            if match:
-                num = int(match.group(1))
-                max_id = max(max_id, num)
-
-        reset_id_counter("n", max_id)
+        self.store = store if store is not None else JSONStore(data_dir / "data.json")
+        # Shared by every process, so concurrent creates never pick the same ID
+        self.ids = IdAllocator(data_dir / COUNTER_FILE)
+        self._id_matcher: IdMatcher | None = None
+        # Store snapshot key of the data the matcher was built for
+        self._id_matcher_key: Hashable = None
 
     def create_note(
         self, content: str, course: str | None = None, topics: list[str] | None = None
@@ -52,21 +57,29 @@ class NoteService:
         Returns:
             Created note
         """
-        now = datetime.now()
-        note = Note(
-            id=generate_note_id(),
-            content=content,
-            created_at=now,
-            modified_at=now,
-            course=course,
-            topics=topics or [],
-            linked_from_tasks=[],
-        )
-
-        # Save to storage
-        data = self.store.load()
-        data["notes"].append(serialize_note(note))
-        self.store.save(data)
+        with self.store.locked():
+            key = self.store.snapshot_key()
+            data = self.store.load()
+            number = self.ids.allocate("notes", floor=get_next_id(data, "notes"))
+
+            now = datetime.now()
+            note = Note(
+                id=claim_id(data, "notes", number),
+                content=content,
+                created_at=now,
+                modified_at=now,
+                course=course,
+                topics=topics or [],
+                linked_from_tasks=[],
+            )
+
+            # Save to storage
+            record = serialize_note(note)
+            update_course_stats(data, "notes", None, record)
+            data["notes"].append(record)
+            update_topic_index(data, note.id, [], note.topics)
+            self.store.save(data)
+            self._track_id_change(key, added=note.id)
 
         return note
 
@@ -79,18 +92,99 @@ class NoteService:
         Returns:
             Note if found and unique match, None otherwise
         """
-        data = self.store.load()
-        available_ids = [note_data["id"] for note_data in data["notes"]]
-        
+        data, matcher = self._load_with_matcher()
+
         # Find matching ID (supports partial matching)
-        matched_id = find_matching_id(note_id, available_ids)
+        matched_id = matcher.resolve(note_id)
         if not matched_id:
             return None
-        
-        for note_data in data["notes"]:
-            if note_data["id"] == matched_id:
-                return deserialize_note(note_data)
-        return None
+
+        i = find_record(self.store, data, "notes", matched_id)
+        return None if i is None else deserialize_note(data["notes"][i], trusted=True)
+
+    def get_notes(self, note_ids: list[str]) -> list[Note]:
+        """Get several notes by exact ID from a single load.
+
+        Args:
+            note_ids: Full note IDs, e.g. the IDs linked from one item
+
+        Returns:
+            The notes that exist, in the order of the given IDs
+        """
+        data = self.store.load()
+        positions = (find_record(self.store, data, "notes", note_id) for note_id in note_ids)
+        return [
+            deserialize_note(data["notes"][i], trusted=True) for i in positions if i is not None
+        ]
+
+    def _load_with_matcher(self) -> tuple[DataSchema, IdMatcher]:
+        """Load the data together with the partial-ID matcher for its notes.
+
+        The matcher is kept between calls and updated on create and delete.
+        It belongs to the store's snapshot key, taken before the load, so it
+        is only rebuilt when the stored data changed some other way.
+
+        Returns:
+            Tuple of (data, matcher)
+        """
+        key = self.store.snapshot_key()
+        data = self.store.load()
+        if self._id_matcher is None or key != self._id_matcher_key:
+            self._id_matcher = IdMatcher(note_data["id"] for note_data in data["notes"])
+            self._id_matcher_key = key
+        return data, self._id_matcher
+
+    def _track_id_change(
+        self, key: Hashable, added: str | None = None, removed: str | None = None
+    ) -> None:
+        """Apply a create or delete to the matcher after its save.
+
+        Args:
+            key: Snapshot key taken before the changed data was loaded
+            added: ID of the created note
+            removed: ID of the deleted note
+        """
+        if self._id_matcher is None or key != self._id_matcher_key:
+            return
+        if added is not None:
+            self._id_matcher.add(added)
+        if removed is not None:
+            self._id_matcher.remove(removed)
+        self._id_matcher_key = self.store.snapshot_key()
+
+    def resolve_note_ids(self, note_ids: list[str]) -> dict[str, str | None]:
+        """Resolve several full or partial note IDs with one load.
+
+        Args:
+            note_ids: Full or partial note IDs
+
+        Returns:
+            Dictionary mapping each given ID to the full ID it matches, or
+            None if it matches no note or more than one
+        """
+        return self._load_with_matcher()[1].resolve_many(note_ids)
+
+    def suggest_note_ids(self, note_id: str) -> list[str]:
+        """Get note IDs that contain an ambiguous partial ID.
+
+        Args:
+            note_id: Partial note ID
+
+        Returns:
+            Up to five matching note IDs in storage order
+        """
+        return self._load_with_matcher()[1].suggestions(note_id)
+
+    def iter_notes(self) -> Iterator[Note]:
+        """Iterate over all notes, reading them from the store as they are consumed.
+
+        Queries filter this stream, so they hold only their results in memory.
+
+        Yields:
+            Each note in storage order
+        """
+        for note_data in self.store.iter_records("notes"):
+            yield deserialize_note(note_data, trusted=True)
 
     def list_notes(self) -> list[Note]:
         """List all notes.
@@ -98,16 +192,25 @@ class NoteService:
         Returns:
             List of all notes
         """
-        data = self.store.load()
-        return [deserialize_note(note_data) for note_data in data["notes"]]
+        return list(self.iter_notes())
+
+    def list_note_summaries(self) -> list[NoteRecord]:
+        """List metadata and a content preview for all notes.
+
+        Note bodies are not loaded; use get_note() for the full content.
+
+        Returns:
+            List of read-only note records
+        """
+        return [deserialize_note_record(data) for data in self.store.load_note_summaries()]
 
-    def get_inbox_notes(self) -> list[Note]:
+    def get_inbox_notes(self) -> list[NoteRecord]:
         """Get all notes in inbox (course=None).
 
         Returns:
-            List of inbox notes
+            List of inbox note records
         """
-        return [note for note in self.list_notes() if note.course is None]
+        return [note for note in self.list_note_summaries() if note.course is None]
 
     def organize_note(self, note_id: str, course: str) -> Note | None:
         """Assign a note to a course (move from inbox).
@@ -119,63 +222,100 @@ class NoteService:
         Returns:
             Updated note if found and unique match, None otherwise
         """
-        data = self.store.load()
-        available_ids = [note_data["id"] for note_data in data["notes"]]
-        
-        # Find matching ID (supports partial matching)
-        matched_id = find_matching_id(note_id, available_ids)
-        if not matched_id:
-            return None
+        with self.store.locked():
+            data, matcher = self._load_with_matcher()
 
-        for i, note_data in enumerate(data["notes"]):
-            if note_data["id"] == matched_id:
-                note = deserialize_note(note_data)
-                note.course = course
+            # Find matching ID (supports partial matching)
+            matched_id = matcher.resolve(note_id)
+            if not matched_id:
+                return None
 
-                # Update in storage
-                data["notes"][i] = serialize_note(note)
-                self.store.save(data)
+            i = find_record(self.store, data, "notes", matched_id)
+            if i is None:
+                return None
 
-                return note
+            note = deserialize_note(data["notes"][i])
+            note.course = course
 
-        return None
+            # Update in storage
+            record = serialize_note(note)
+            update_course_stats(data, "notes", data["notes"][i], record)
+            data["notes"][i] = record
+            self.store.save(data)
 
-    def get_notes_by_course(self, course_name: str) -> list[Note]:
+            return note
+
+    def get_notes_by_course(self, course_name: str) -> list[NoteRecord]:
         """Get all notes for a specific course.
 
         Args:
             course_name: Course name to filter by
 
         Returns:
-            List of notes in the course
+            List of note records in the course
         """
-        return [note for note in self.list_notes() if note.course == course_name]
-
-    def get_notes_by_topic(self, topic_name: str) -> list[Note]:
+        return [note for note in self.list_note_summaries() if note.course == course_name]
+
+    def _topic_positions(self, data: DataSchema, topic_name: str) -> list[int]:
+        """Get the positions of one topic's notes through the topic index, in storage order."""
+        positions = []
+        for note_id in get_topic_index(data).get(topic_name, []):
+            i = find_record(self.store, data, "notes", note_id)
+            # Skip entries the index kept for notes changed behind its back
+            if i is not None and topic_name in data["notes"][i].get("topics", []):
+                positions.append(i)
+        positions.sort()
+        return positions
+
+    def get_notes_by_topic(self, topic_name: str) -> list[NoteRecord]:
         """Get all notes with a specific topic.
 
+        Looks the notes up through the topic index, so only the notes with
+        the topic are read.
+
         Args:
             topic_name: Topic to filter by
 
         Returns:
-            List of notes with the topic
+            List of note records with the topic
         """
-        return [note for note in self.list_notes() if topic_name in note.topics]
+        data = self.store.load()
+        return [
+            deserialize_note_record(summarize_note(data["notes"][i]))
+            for i in self._topic_positions(data, topic_name)
+        ]
 
-    def get_all_topics(self) -> dict[str, list[Note]]:
+    def get_all_topics(self) -> dict[str, list[NoteRecord]]:
         """Get all topics with their associated notes grouped by course.
 
         Returns:
-            Dictionary mapping topic names to lists of notes
+            Dictionary mapping topic names to lists of note records
         """
-        topics_map: dict[str, list[Note]] = {}
-        for note in self.list_notes():
-            for topic in note.topics:
-                if topic not in topics_map:
-                    topics_map[topic] = []
-                topics_map[topic].append(note)
+        data = self.store.load()
+        records: dict[int, NoteRecord] = {}
+        topics_map: dict[str, list[NoteRecord]] = {}
+        for topic in get_topic_index(data):
+            positions = self._topic_positions(data, topic)
+            for i in positions:
+                if i not in records:
+                    records[i] = deserialize_note_record(summarize_note(data["notes"][i]))
+            if positions:
+                topics_map[topic] = [records[i] for i in positions]
         return topics_map
 
+    def get_topic_counts(self) -> dict[str, int]:
+        """Count the notes of every topic through the topic index.
+
+        Counts only index entries whose note still has the topic, the same
+        check get_notes_by_topic applies, so both always agree.
+
+        Returns:
+            Dictionary mapping topic names to note counts
+        """
+        data = self.store.load()
+        counts = {topic: len(self._topic_positions(data, topic)) for topic in get_topic_index(data)}
+        return {topic: count for topic, count in counts.items() if count}
+
     def add_topics(self, note_id: str, topics: list[str]) -> Note | None:
         """Add topics to a note.
 
@@ -186,24 +326,27 @@ class NoteService:
         Returns:
             Updated note if found, None otherwise
         """
-        data = self.store.load()
+        with self.store.locked():
+            data = self.store.load()
 
-        for i, note_data in enumerate(data["notes"]):
-            if note_data["id"] == note_id:
-                note = deserialize_note(note_data)
+            i = find_record(self.store, data, "notes", note_id)
+            if i is None:
+                return None
 
-                # Add topics (avoid duplicates)
-                for topic in topics:
-                    if topic not in note.topics:
-                        note.topics.append(topic)
+            note = deserialize_note(data["notes"][i])
+            old_topics = list(note.topics)
 
-                # Update in storage
-                data["notes"][i] = serialize_note(note)
-                self.store.save(data)
+            # Add topics (avoid duplicates)
+            for topic in topics:
+                if topic not in note.topics:
+                    note.topics.append(topic)
 
-                return note
+            # Update in storage
+            data["notes"][i] = serialize_note(note)
+            update_topic_index(data, note.id, old_topics, note.topics)
+            self.store.save(data)
 
-        return None
+            return note
 
     def update_note(self, note_id: str, new_content: str) -> Note | None:
         """Update a note's content.
@@ -215,21 +358,59 @@ class NoteService:
         Returns:
             Updated note if found, None otherwise
         """
-        data = self.store.load()
+        with self.store.locked():
+            data = self.store.load()
 
-        for i, note_data in enumerate(data["notes"]):
-            if note_data["id"] == note_id:
-                note = deserialize_note(note_data)
-                note.content = new_content
-                note.modified_at = datetime.now()
+            i = find_record(self.store, data, "notes", note_id)
+            if i is None:
+                return None
 
-                # Update in storage
-                data["notes"][i] = serialize_note(note)
-                self.store.save(data)
+            note = deserialize_note(data["notes"][i])
+            note.content = new_content
+            note.modified_at = datetime.now()
+
+            # Update in storage
+            data["notes"][i] = serialize_note(note)
+            self.store.save(data)
+
+            return note
+
+    def rename_topic(self, old_topic: str, new_topic: str) -> int:
+        """Rename a topic on every note that has it.
+
+        A note that already has the new topic keeps a single copy of it.
+
+        Args:
+            old_topic: Current topic name
+            new_topic: New topic name
 
-                return note
+        Returns:
+            Number of notes updated
 
-        return None
+        Raises:
+            ValueError: If the new topic is not 1-50 characters
+        """
+        if not new_topic or len(new_topic) > 50:
+            raise ValueError("Each topic must be 1-50 characters")
+        with self.store.locked():
+            data = self.store.load()
+            count = 0
+
+            for i, note_data in enumerate(data["notes"]):
+                topics = note_data.get("topics", [])
+                if old_topic in topics:
+                    count += 1
+                    renamed: list[str] = []
+                    for topic in topics:
+                        topic = new_topic if topic == old_topic else topic
+                        if topic not in renamed:
+                            renamed.append(topic)
+                    data["notes"][i] = {**note_data, "topics": renamed}
+                    update_topic_index(data, note_data["id"], topics, renamed)
+
+            if count:
+                self.store.save(data)
+            return count
 
     def remove_topic(self, note_id: str, topic: str) -> Note | None:
         """Remove a topic from a note.
@@ -241,23 +422,26 @@ class NoteService:
         Returns:
             Updated note if found, None otherwise
         """
-        data = self.store.load()
+        with self.store.locked():
+            data = self.store.load()
 
-        for i, note_data in enumerate(data["notes"]):
-            if note_data["id"] == note_id:
-                note = deserialize_note(note_data)
+            i = find_record(self.store, data, "notes", note_id)
+            if i is None:
+                return None
 
-                # Remove topic if present
-                if topic in note.topics:
-                    note.topics.remove(topic)
+            note = deserialize_note(data["notes"][i])
+            old_topics = list(note.topics)
 
-                # Update in storage
-                data["notes"][i] = serialize_note(note)
-                self.store.save(data)
+            # Remove topic if present
+            if topic in note.topics:
+                note.topics.remove(topic)
 
-                return note
+            # Update in storage
+            data["notes"][i] = serialize_note(note)
+            update_topic_index(data, note.id, old_topics, note.topics)
+            self.store.save(data)
 
-        return None
+            return note
 
     def delete_note(self, note_id: str) -> bool:
         """Delete a note.
@@ -268,12 +452,17 @@ class NoteService:
         Returns:
             True if deleted, False if not found
         """
-        data = self.store.load()
-
-        for i, note_data in enumerate(data["notes"]):
-            if note_data["id"] == note_id:
-                del data["notes"][i]
-                self.store.save(data)
-                return True
-
-        return False
+        with self.store.locked():
+            key = self.store.snapshot_key()
+            data = self.store.load()
+
+            i = find_record(self.store, data, "notes", note_id)
+            if i is None:
+                return False
+
+            update_topic_index(data, note_id, data["notes"][i].get("topics", []), [])
+            update_course_stats(data, "notes", data["notes"][i], None)
+            del data["notes"][i]
+            self.store.save(data)
+            self._track_id_change(key, removed=note_id)
+            return True
@@ -1,24 +1,45 @@
 """Search service for finding notes and tasks."""
 
+from collections.abc import Iterable
 from pathlib import Path
 
 from pkm.models.note import Note
 from pkm.models.task import Task
 from pkm.services.note_service import NoteService
 from pkm.services.task_service import TaskService
+from pkm.storage.backends import Store
 
 
 class SearchService:
     """Service for searching notes and tasks."""
 
-    def __init__(self, data_dir: Path) -> None:
+    def __init__(
+        self,
+        data_dir: Path,
+        store: Store | None = None,
+        note_service: NoteService | None = None,
+        task_service: TaskService | None = None,
+    ) -> None:
         """Initialize search service.
 
         Args:
             data_dir: Directory containing data.json
+            store: Storage backend to use (default: JSONStore on data.json)
+            note_service: Existing note service to reuse
+            task_service: Existing task service to reuse
         """
-        self.note_service = NoteService(data_dir)
-        self.task_service = TaskService(data_dir)
+        self.note_service = note_service or NoteService(data_dir, store)
+        self.task_service = task_service or TaskService(data_dir, store)
+
+    def _records(self, type_filter: str | None) -> tuple[Iterable[Note], Iterable[Task]]:
+        """Get the notes and tasks to search through."""
+        if type_filter is None:
+            # Both kinds are needed, so one typed load parses and validates
+            # the whole dataset in a single pass
+            dataset = self.note_service.store.load_typed()
+            return dataset.notes, dataset.tasks
+        # Streamed, so only matches are kept in memory
+        return self.note_service.iter_notes(), self.task_service.iter_tasks()
 
     def search(
         self,
@@ -42,11 +63,11 @@ class SearchService:
         matching_notes: list[Note] = []
         matching_tasks: list[Task] = []
 
+        notes, tasks = self._records(type_filter)
+
         # Search notes
         if type_filter is None or type_filter == "notes":
-            all_notes = self.note_service.list_notes()
-
-            for note in all_notes:
+            for note in notes:
                 # Apply filters
                 if course_filter and note.course != course_filter:
                     continue
@@ -61,9 +82,7 @@ class SearchService:
 
         # Search tasks
         if type_filter is None or type_filter == "tasks":
-            all_tasks = self.task_service.list_tasks()
-
-            for task in all_tasks:
+            for task in tasks:
                 # Apply filters
                 if course_filter and task.course != course_filter:
                     continue
@@ -1,43 +1,67 @@
 """Task service for task management business logic."""
 
-import re
-from datetime import date, datetime, timedelta
+from collections.abc import Hashable, Iterator
+from datetime import date, datetime, time, timedelta
 from pathlib import Path
+from typing import Any
 
-from pkm.models.common import reset_id_counter
+from pkm.models.records import TaskRecord
 from pkm.models.task import Subtask, Task
-from pkm.services.id_generator import generate_task_id
+from pkm.services.task_table import TaskTable, iter_rows
+from pkm.storage.backends import Store
+from pkm.storage.ids import COUNTER_FILE, IdAllocator
+from pkm.storage.index import find_record
 from pkm.storage.json_store import JSONStore
-from pkm.storage.schema import deserialize_task, serialize_task
-from pkm.utils.id_matcher import find_matching_id
+from pkm.storage.migrations import claim_id, get_next_id, update_course_stats
+from pkm.storage.schema import (
+    DataSchema,
+    deserialize_task,
+    deserialize_task_record,
+    serialize_task,
+)
+from pkm.utils.id_matcher import IdMatcher
+
+
+def _start_of(day: date) -> datetime:
+    """Get midnight at the start of a day."""
+    return datetime.combine(day, time.min)
+
+
+# Agenda buckets, in display order
+AGENDA_BUCKETS = ("overdue", "today", "this_week", "later", "no_date")
+
+
+def _without_task_link(note_data: dict[str, Any], task_id: str) -> dict[str, Any]:
+    """Return a copy of a note record with a task removed from linked_from_tasks.
+
+    Loaded records are shared with the snapshot cache, so they are replaced
+    instead of being modified in place.
+    """
+    linked_tasks = note_data.get("linked_from_tasks", [])
+    if task_id not in linked_tasks:
+        return note_data
+    return {**note_data, "linked_from_tasks": [t for t in linked_tasks if t != task_id]}
 
 
 class TaskService:
     """Service for managing tasks."""
 
-    def __init__(self, data_dir: Path) -> None:
+    def __init__(self, data_dir: Path, store: Store | None = None) -> None:
         """Initialize task service.
 
         Args:
             data_dir: Directory containing data.json
+            store: Storage backend to use (default: JSONStore on data.json)
         """
-        self.store = JSONStore(data_dir / "data.json")
-        self._initialize_id_counter()
-
-    def _initialize_id_counter(self) -> None:
-        """Initialize the ID counter based on existing tasks."""
-        data = self.store.load()
-        max_id = 0
-
-        for task_data in data.get("tasks", []):
-            task_id = task_data.get("id", "")
-            # Extract number from ID (e.g., "t5" -> 5)
-            match = re.match(r"t(\d+)", task_id)
-            if match:
-                num = int(match.group(1))
-                max_id = max(max_id, num)
-
-        reset_id_counter("t", max_id)
+        self.store = store if store is not None else JSONStore(data_dir / "data.json")
+        # Shared by every process, so concurrent creates never pick the same ID
+        self.ids = IdAllocator(data_dir / COUNTER_FILE)
+        self._id_matcher: IdMatcher | None = None
+        # Store snapshot key of the data the matcher was built for
+        self._id_matcher_key: Hashable = None
+        self._task_table: TaskTable | None = None
+        # Store snapshot key of the data the table was built from
+        self._task_table_key: Hashable = None
 
     def create_task(
         self,
@@ -57,23 +81,30 @@ class TaskService:
         Returns:
             Created task
         """
-        task = Task(
-            id=generate_task_id(),
-            title=title,
-            created_at=datetime.now(),
-            due_date=due_date,
-            priority=priority,  # type: ignore
-            completed=False,
-            completed_at=None,
-            course=course,
-            linked_notes=[],
-            subtasks=[],
-        )
-
-        # Save to storage
-        data = self.store.load()
-        data["tasks"].append(serialize_task(task))
-        self.store.save(data)
+        with self.store.locked():
+            key = self.store.snapshot_key()
+            data = self.store.load()
+            number = self.ids.allocate("tasks", floor=get_next_id(data, "tasks"))
+
+            task = Task(
+                id=claim_id(data, "tasks", number),
+                title=title,
+                created_at=datetime.now(),
+                due_date=due_date,
+                priority=priority,  # type: ignore
+                completed=False,
+                completed_at=None,
+                course=course,
+                linked_notes=[],
+                subtasks=[],
+            )
+
+            # Save to storage
+            record = serialize_task(task)
+            update_course_stats(data, "tasks", None, record)
+            data["tasks"].append(record)
+            self.store.save(data)
+            self._track_id_change(key, added=task.id)
 
         return task
 
@@ -86,18 +117,97 @@ class TaskService:
         Returns:
             Task if found and unique match, None otherwise
         """
-        data = self.store.load()
-        available_ids = [task_data["id"] for task_data in data["tasks"]]
-        
+        data, matcher = self._load_with_matcher()
+
         # Find matching ID (supports partial matching)
-        matched_id = find_matching_id(task_id, available_ids)
+        matched_id = matcher.resolve(task_id)
         if not matched_id:
             return None
-        
-        for task_data in data["tasks"]:
-            if task_data["id"] == matched_id:
-                return deserialize_task(task_data)
-        return None
+
+        i = find_record(self.store, data, "tasks", matched_id)
+        return None if i is None else deserialize_task(data["tasks"][i], trusted=True)
+
+    def get_tasks(self, task_ids: list[str]) -> list[Task]:
+        """Get several tasks by exact ID from a single load.
+
+        Args:
+            task_ids: Full task IDs, e.g. the IDs linked from one item
+
+        Returns:
+            The tasks that exist, in the order of the given IDs
+        """
+        data = self.store.load()
+        positions = (find_record(self.store, data, "tasks", task_id) for task_id in task_ids)
+        return [
+            deserialize_task(data["tasks"][i], trusted=True) for i in positions if i is not None
+        ]
+
+    def _load_with_matcher(self) -> tuple[DataSchema, IdMatcher]:
+        """Load the data together with the partial-ID matcher for its tasks.
+
+        The matcher is kept between calls and updated on create and delete.
+        It belongs to the store's snapshot key, taken before the load, so it
+        is only rebuilt when the stored data changed some other way.
+
+        Returns:
+            Tuple of (data, matcher)
+        """
+        key = self.store.snapshot_key()
+        data = self.store.load()
+        if self._id_matcher is None or key != self._id_matcher_key:
+            self._id_matcher = IdMatcher(task_data["id"] for task_data in data["tasks"])
+            self._id_matcher_key = key
+        return data, self._id_matcher
+
+    def _track_id_change(
+        self, key: Hashable, added: str | None = None, removed: str | None = None
+    ) -> None:
+        """Apply a create or delete to the matcher after its save.
+
+        Args:
+            key: Snapshot key taken before the changed data was loaded
+            added: ID of the created task
+            removed: ID of the deleted task
+        """
+        if self._id_matcher is None or key != self._id_matcher_key:
+            return
+        if added is not None:
+            self._id_matcher.add(added)
+        if removed is not None:
+            self._id_matcher.remove(removed)
+        self._id_matcher_key = self.store.snapshot_key()
+
+    def resolve_task_ids(self, task_ids: list[str]) -> dict[str, str | None]:
+        """Resolve several full or partial task IDs with one load.
+
+        Args:
+            task_ids: Full or partial task IDs
+
+        Returns:
+            Dictionary mapping each given ID to the full ID it matches, or
+            None if it matches no task or more than one
+        """
+        return self._load_with_matcher()[1].resolve_many(task_ids)
+
+    def suggest_task_ids(self, task_id: str) -> list[str]:
+        """Get task IDs that contain an ambiguous partial ID.
+
+        Args:
+            task_id: Partial task ID
+
+        Returns:
+            Up to five matching task IDs in storage order
+        """
+        return self._load_with_matcher()[1].suggestions(task_id)
+
+    def iter_tasks(self) -> Iterator[Task]:
+        """Iterate over all tasks, reading them from the store as they are consumed.
+
+        Yields:
+            Each task in storage order
+        """
+        for task_data in self.store.iter_records("tasks"):
+            yield deserialize_task(task_data, trusted=True)
 
     def list_tasks(self) -> list[Task]:
         """List all tasks.
@@ -105,57 +215,149 @@ class TaskService:
         Returns:
             List of all tasks
         """
-        data = self.store.load()
-        return [deserialize_task(task_data) for task_data in data["tasks"]]
+        return list(self.iter_tasks())
+
+    def iter_task_records(self) -> Iterator[TaskRecord]:
+        """Iterate over all tasks as read-only records.
+
+        Cheaper to build and smaller than Task models; bulk read paths and
+        list views use these, and queries filter this stream.
+
+        Yields:
+            Each task in storage order
+        """
+        for task_data in self.store.iter_records("tasks"):
+            yield deserialize_task_record(task_data)
+
+    def list_task_records(self) -> list[TaskRecord]:
+        """List all tasks as read-only records.
+
+        Returns:
+            List of all task records
+        """
+        return list(self.iter_task_records())
+
+    def task_table(self) -> TaskTable:
+        """Get a columnar snapshot of all tasks for bitmap filtering.
+
+        The table is kept between calls and rebuilt only when the store's
+        snapshot key has moved, so a series of queries pays for one build
+        and an unchanged store costs no pass over the tasks.
 
-    def get_inbox_tasks(self) -> list[Task]:
+        Returns:
+            Task table in storage order
+        """
+        # Key first: a save in between only makes the table look stale
+        key = self.store.snapshot_key()
+        if self._task_table is None or key != self._task_table_key:
+            self._task_table = TaskTable(list(self.store.iter_records("tasks")))
+            self._task_table_key = key
+        return self._task_table
+
+    def get_inbox_tasks(self) -> list[TaskRecord]:
         """Get all tasks in inbox (course=None).
 
         Returns:
-            List of inbox tasks
+            List of inbox task records
         """
-        return [task for task in self.list_tasks() if task.course is None]
+        table = self.task_table()
+        return table.records(table.course(None))
 
-    def get_tasks_today(self) -> list[Task]:
+    def get_tasks_today(self) -> list[TaskRecord]:
         """Get all tasks due today.
 
         Returns:
-            List of tasks due today
+            List of task records due today
         """
-        today = date.today()
-        return [
-            task for task in self.list_tasks()
-            if task.due_date and task.due_date.date() == today and not task.completed
-        ]
+        today = _start_of(date.today())
+        table = self.task_table()
+        return table.records(table.open & table.due_between(today, today + timedelta(days=1)))
 
-    def get_tasks_this_week(self) -> list[Task]:
+    def get_tasks_this_week(self) -> list[TaskRecord]:
         """Get all tasks due within 7 days.
 
         Returns:
-            List of tasks due this week
+            List of task records due this week
         """
-        today = date.today()
-        week_end = today + timedelta(days=7)
-        return [
-            task for task in self.list_tasks()
-            if task.due_date
-            and today <= task.due_date.date() <= week_end
-            and not task.completed
-        ]
+        today = _start_of(date.today())
+        table = self.task_table()
+        # Through the end of the 7th day from today
+        return table.records(table.open & table.due_between(today, today + timedelta(days=8)))
 
-    def get_tasks_overdue(self) -> list[Task]:
+    def get_tasks_overdue(self) -> list[TaskRecord]:
         """Get all overdue tasks (past due and not completed).
 
         Returns:
-            List of overdue tasks
+            List of overdue task records
         """
-        today = date.today()
-        return [
-            task for task in self.list_tasks()
-            if task.due_date
-            and task.due_date.date() < today
-            and not task.completed
-        ]
+        table = self.task_table()
+        return table.records(table.open & table.due_between(None, _start_of(date.today())))
+
+    def count_overdue_by_course(self) -> dict[str, int]:
+        """Count the overdue tasks of every course.
+
+        Cuts the overdue range from the task table's sorted due column, so
+        only overdue tasks are looked at.
+
+        Returns:
+            Dictionary mapping course names to their number of overdue tasks
+        """
+        table = self.task_table()
+        overdue = table.open & table.due_between(None, _start_of(date.today()))
+        counts: dict[str, int] = {}
+        for row in iter_rows(overdue):
+            course_id = table.course_ids[row]
+            if course_id >= 0:
+                name = table.course_names[course_id]
+                counts[name] = counts.get(name, 0) + 1
+        return counts
+
+    def get_tasks_due_between(
+        self, start: datetime | None, end: datetime | None
+    ) -> list[TaskRecord]:
+        """Get all tasks, completed or not, due in [start, end).
+
+        The range is cut from the task table's sorted due-date column by
+        bisection, so only the tasks in it are looked at.
+
+        Args:
+            start: Earliest due date (inclusive), or None for no lower bound
+            end: Due date limit (exclusive), or None for no upper bound
+
+        Returns:
+            List of task records in the range; tasks without a due date
+            never match
+        """
+        table = self.task_table()
+        return table.records(table.due_between(start, end))
+
+    def get_agenda(self, today: date | None = None) -> dict[str, list[TaskRecord]]:
+        """Sort every open task into one due-date bucket.
+
+        The clock is read once and the buckets use the same day boundaries
+        as the single-bucket queries:
+
+            overdue:   due before today
+            today:     due today
+            this_week: due in the 7 days after today
+            later:     due after that
+            no_date:   no due date
+
+        Args:
+            today: Day to build the agenda for (default: the current date)
+
+        Returns:
+            Dictionary with one list of task records per bucket in
+            AGENDA_BUCKETS, each in storage order
+        """
+        start = _start_of(date.today() if today is None else today)
+        table = self.task_table()
+        ranges = table.due_ranges([start, start + timedelta(days=1), start + timedelta(days=8)])
+        masks = [*ranges, table.all & ~table.dated]
+        return {
+            bucket: table.records(table.open & mask)
+            for bucket, mask in zip(AGENDA_BUCKETS, masks)
+        }
 
     def complete_task(self, task_id: str) -> Task | None:
         """Mark a task as completed.
@@ -166,21 +368,23 @@ class TaskService:
         Returns:
             Updated task if found, None otherwise
         """
-        data = self.store.load()
-
-        for i, task_data in enumerate(data["tasks"]):
-            if task_data["id"] == task_id:
-                task = deserialize_task(task_data)
-                task.completed = True
-                task.completed_at = datetime.now()
+        with self.store.locked():
+            data = self.store.load()
+            i = find_record(self.store, data, "tasks", task_id)
+            if i is None:
+                return None
 
-                # Update in storage
-                data["tasks"][i] = serialize_task(task)
-                self.store.save(data)
+            task = deserialize_task(data["tasks"][i])
+            task.completed = True
+            task.completed_at = datetime.now()
 
-                return task
+            # Update in storage
+            record = serialize_task(task)
+            update_course_stats(data, "tasks", data["tasks"][i], record)
+            data["tasks"][i] = record
+            self.store.save(data)
 
-        return None
+            return task
 
     def add_subtask(self, task_id: str, title: str) -> Task | None:
         """Add a subtask to a task.
@@ -192,30 +396,30 @@ class TaskService:
         Returns:
             Updated task if found, None otherwise
         """
-        data = self.store.load()
-
-        for i, task_data in enumerate(data["tasks"]):
-            if task_data["id"] == task_id:
-                task = deserialize_task(task_data)
+        with self.store.locked():
+            data = self.store.load()
+            i = find_record(self.store, data, "tasks", task_id)
+            if i is None:
+                return None
 
-                # Generate subtask ID (integer)
-                subtask_id = len(task.subtasks) + 1
+            task = deserialize_task(data["tasks"][i])
 
-                subtask = Subtask(
-                    id=subtask_id,
-                    title=title,
-                    completed=False,
-                )
+            # Generate subtask ID (integer)
+            subtask_id = len(task.subtasks) + 1
 
-                task.subtasks.append(subtask)
+            subtask = Subtask(
+                id=subtask_id,
+                title=title,
+                completed=False,
+            )
 
-                # Update in storage
-                data["tasks"][i] = serialize_task(task)
-                self.store.save(data)
+            task.subtasks.append(subtask)
 
-                return task
+            # Update in storage
+            data["tasks"][i] = serialize_task(task)
+            self.store.save(data)
 
-        return None
+            return task
 
     def complete_subtask(self, task_id: str, subtask_id: int) -> Task | None:
         """Mark a subtask as completed.
@@ -227,25 +431,25 @@ class TaskService:
         Returns:
             Updated task if found, None otherwise
         """
-        data = self.store.load()
+        with self.store.locked():
+            data = self.store.load()
+            i = find_record(self.store, data, "tasks", task_id)
+            if i is None:
+                return None
 
-        for i, task_data in enumerate(data["tasks"]):
-            if task_data["id"] == task_id:
-                task = deserialize_task(task_data)
+            task = deserialize_task(data["tasks"][i])
 
-                for subtask in task.subtasks:
-                    if subtask.id == subtask_id:
-                        subtask.completed = True
+            for subtask in task.subtasks:
+                if subtask.id == subtask_id:
+                    subtask.completed = True
 
-                        # Update in storage
-                        data["tasks"][i] = serialize_task(task)
-                        self.store.save(data)
+                    # Update in storage
+                    data["tasks"][i] = serialize_task(task)
+                    self.store.save(data)
 
-                        return task
+                    return task
 
-                return None
-
-        return None
+            return None
 
     def organize_task(self, task_id: str, course: str) -> Task | None:
         """Assign a task to a course (move from inbox).
@@ -257,48 +461,52 @@ class TaskService:
         Returns:
             Updated task if found and unique match, None otherwise
         """
-        data = self.store.load()
-        available_ids = [task_data["id"] for task_data in data["tasks"]]
-        
-        # Find matching ID (supports partial matching)
-        matched_id = find_matching_id(task_id, available_ids)
-        if not matched_id:
-            return None
+        with self.store.locked():
+            data, matcher = self._load_with_matcher()
 
-        for i, task_data in enumerate(data["tasks"]):
-            if task_data["id"] == matched_id:
-                task = deserialize_task(task_data)
-                task.course = course
+            # Find matching ID (supports partial matching)
+            matched_id = matcher.resolve(task_id)
+            if not matched_id:
+                return None
 
-                # Update in storage
-                data["tasks"][i] = serialize_task(task)
-                self.store.save(data)
+            i = find_record(self.store, data, "tasks", matched_id)
+            if i is None:
+                return None
+
+            task = deserialize_task(data["tasks"][i])
+            task.course = course
 
-                return task
+            # Update in storage
+            record = serialize_task(task)
+            update_course_stats(data, "tasks", data["tasks"][i], record)
+            data["tasks"][i] = record
+            self.store.save(data)
 
-        return None
+            return task
 
-    def get_tasks_by_course(self, course_name: str) -> list[Task]:
+    def get_tasks_by_course(self, course_name: str) -> list[TaskRecord]:
         """Get all tasks for a specific course.
 
         Args:
             course_name: Course name to filter by
 
         Returns:
-            List of tasks in the course
+            List of task records in the course
         """
-        return [task for task in self.list_tasks() if task.course == course_name]
+        table = self.task_table()
+        return table.records(table.course(course_name))
 
-    def get_tasks_by_priority(self, priority: str) -> list[Task]:
+    def get_tasks_by_priority(self, priority: str) -> list[TaskRecord]:
         """Get all tasks with a specific priority.
 
         Args:
             priority: Priority level (high, medium, low)
 
         Returns:
-            List of tasks with the priority
+            List of task records with the priority
         """
-        return [task for task in self.list_tasks() if task.priority == priority and not task.completed]
+        table = self.task_table()
+        return table.records(table.open & table.priority(priority))
 
     def link_note(self, task_id: str, note_id: str) -> Task | None:
         """Link a note to a task (bidirectional).
@@ -310,32 +518,36 @@ class TaskService:
         Returns:
             Updated task if found, None otherwise
         """
-        data = self.store.load()
-
-        # Update task
-        for i, task_data in enumerate(data["tasks"]):
-            if task_data["id"] == task_id:
-                task = deserialize_task(task_data)
+        with self.store.locked():
+            data = self.store.load()
+            i = find_record(self.store, data, "tasks", task_id)
+            if i is None:
+                return None
 
-                # Add note to task's linked notes if not already there
-                if note_id not in task.linked_notes:
-                    task.linked_notes.append(note_id)
+            # Update task
+            task = deserialize_task(data["tasks"][i])
 
-                # Update task in storage
-                data["tasks"][i] = serialize_task(task)
+            # Add note to task's linked notes if not already there
+            if note_id not in task.linked_notes:
+                task.linked_notes.append(note_id)
 
-                # Update note's linked_from_tasks (bidirectional)
-                for j, note_data in enumerate(data["notes"]):
-                    if note_data["id"] == note_id:
-                        if task_id not in note_data.get("linked_from_tasks", []):
-                            note_data.setdefault("linked_from_tasks", []).append(task_id)
-                        data["notes"][j] = note_data
-                        break
+            # Update task in storage
+            data["tasks"][i] = serialize_task(task)
 
-                self.store.save(data)
-                return task
+            # Update note's linked_from_tasks (bidirectional)
+            j = find_record(self.store, data, "notes", note_id)
+            if j is not None:
+                note_data = data["notes"][j]
+                linked_tasks = note_data.get("linked_from_tasks", [])
+                if task_id not in linked_tasks:
+                    # Replace rather than mutate: loaded records are shared
+                    data["notes"][j] = {
+                        **note_data,
+                        "linked_from_tasks": [*linked_tasks, task_id],
+                    }
 
-        return None
+            self.store.save(data)
+            return task
 
     def delete_task(self, task_id: str) -> bool:
         """Delete a task and clean up references in linked notes.
@@ -346,31 +558,27 @@ class TaskService:
         Returns:
             True if deleted, False if not found
         """
-        data = self.store.load()
-
-        # Find and remove the task
-        for i, task_data in enumerate(data["tasks"]):
-            if task_data["id"] == task_id:
-                task = deserialize_task(task_data)
-                
-                # Remove this task from any linked notes
-                if task.linked_notes:
-                    for note_id in task.linked_notes:
-                        for j, note_data in enumerate(data["notes"]):
-                            if note_data["id"] == note_id:
-                                linked_tasks = note_data.get("linked_from_tasks", [])
-                                if task_id in linked_tasks:
-                                    linked_tasks.remove(task_id)
-                                    note_data["linked_from_tasks"] = linked_tasks
-                                    data["notes"][j] = note_data
-                                break
-                
-                # Delete the task
-                del data["tasks"][i]
-                self.store.save(data)
-                return True
-
-        return False
+        with self.store.locked():
+            key = self.store.snapshot_key()
+            data = self.store.load()
+
+            # Find and remove the task
+            i = find_record(self.store, data, "tasks", task_id)
+            if i is None:
+                return False
+
+            # Remove this task from any linked notes
+            for note_id in data["tasks"][i].get("linked_notes", []):
+                j = find_record(self.store, data, "notes", note_id)
+                if j is not None:
+                    data["notes"][j] = _without_task_link(data["notes"][j], task_id)
+
+            # Delete the task
+            update_course_stats(data, "tasks", data["tasks"][i], None)
+            del data["tasks"][i]
+            self.store.save(data)
+            self._track_id_change(key, removed=task_id)
+            return True
 
     def unlink_note(self, task_id: str, note_id: str) -> Task | None:
         """Unlink a note from a task (bidirectional).
@@ -382,31 +590,26 @@ class TaskService:
         Returns:
             Updated task if found, None otherwise
         """
-        data = self.store.load()
-
-        # Update task
-        for i, task_data in enumerate(data["tasks"]):
-            if task_data["id"] == task_id:
-                task = deserialize_task(task_data)
+        with self.store.locked():
+            data = self.store.load()
+            i = find_record(self.store, data, "tasks", task_id)
+            if i is None:
+                return None
 
-                # Remove note from task's linked notes
-                if note_id in task.linked_notes:
-                    task.linked_notes.remove(note_id)
+            # Update task
+            task = deserialize_task(data["tasks"][i])
 
-                # Update task in storage
-                data["tasks"][i] = serialize_task(task)
+            # Remove note from task's linked notes
+            if note_id in task.linked_notes:
+                task.linked_notes.remove(note_id)
 
-                # Update note's linked_from_tasks (bidirectional)
-                for j, note_data in enumerate(data["notes"]):
-                    if note_data["id"] == note_id:
-                        linked_tasks = note_data.get("linked_from_tasks", [])
-                        if task_id in linked_tasks:
-                            linked_tasks.remove(task_id)
-                            note_data["linked_from_tasks"] = linked_tasks
-                        data["notes"][j] = note_data
-                        break
+            # Update task in storage
+            data["tasks"][i] = serialize_task(task)
 
-                self.store.save(data)
-                return task
+            # Update note's linked_from_tasks (bidirectional)
+            j = find_record(self.store, data, "notes", note_id)
+            if j is not None:
+                data["notes"][j] = _without_task_link(data["notes"][j], task_id)
 
-        return None
+            self.store.save(data)
+            return task
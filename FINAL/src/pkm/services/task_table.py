@@ -0,0 +1,199 @@
+"""Columnar snapshot of tasks for bulk filtering."""
+
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterable, Iterator, Sequence
+from datetime import datetime
+from typing import Any
+
+from pkm.models.records import TaskRecord
+from pkm.storage.schema import deserialize_task_record
+
+# Priority -> small int code stored in the priority column
+PRIORITY_CODES = {"high": 0, "medium": 1, "low": 2}
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def to_epoch(value: datetime) -> int:
+    """Convert a datetime to whole seconds since 1970-01-01 (wall-clock time).
+
+    Due dates are stored as naive local times, so they are compared as such;
+    aware datetimes are first converted to local time.
+    """
+    if value.tzinfo is not None:
+        value = value.astimezone().replace(tzinfo=None)
+    return int((value - _EPOCH).total_seconds())
+
+
+def _bitmap(rows: Iterable[int], size: int) -> int:
+    """Build a bitmap (bit i set = row i matches) from row indexes."""
+    bits = bytearray((size + 7) // 8)
+    for row in rows:
+        bits[row >> 3] |= 1 << (row & 7)
+    return int.from_bytes(bits, "little")
+
+
+def iter_rows(mask: int) -> Iterator[int]:
+    """Iterate over the row indexes set in a bitmap, in ascending order."""
+    raw = mask.to_bytes((mask.bit_length() + 7) // 8, "little")
+    for offset, byte in enumerate(raw):
+        while byte:
+            low = byte & -byte
+            yield offset * 8 + low.bit_length() - 1
+            byte ^= low
+
+
+class TaskTable:
+    """Tasks stored column by column, filtered with bitmap operations.
+
+    Columns (one entry per task, in storage order):
+        due:             due date as epoch seconds, array('q') (0 if none)
+        priority_codes:  priority code (see PRIORITY_CODES), array('b')
+        course_ids:      index into course_names, array('i') (-1 = inbox)
+        completed:       bitmap of completed tasks
+        dated:           bitmap of tasks with a due date
+
+    Every filter method returns a bitmap: a Python int whose bit i is set
+    when row i matches. Bitmaps combine with &, | and ~ (mask ~ with
+    `all`), so combined filters cost a few big-int operations instead of
+    a Python test per task. Records are built only for the rows in the
+    final bitmap.
+
+    Example:
+        >>> table = TaskTable(store.iter_records("tasks"))
+        >>> table.records(table.open & table.priority("high"))
+    """
+
+    def __init__(self, tasks: Iterable[dict[str, Any]]) -> None:
+        """Build the columns in a single pass over the task dicts.
+
+        Args:
+            tasks: Task dicts in storage order (they are kept, not copied)
+        """
+        self._tasks: list[dict[str, Any]] = []
+        self.due = array("q")
+        self.priority_codes = array("b")
+        self.course_ids = array("i")
+        self.course_names: list[str] = []
+        course_index: dict[str, int] = {}
+        completed: list[int] = []
+        dated: list[int] = []
+
+        for row, task in enumerate(tasks):
+            self._tasks.append(task)
+            due_date = task.get("due_date")
+            if due_date:
+                dated.append(row)
+                self.due.append(to_epoch(datetime.fromisoformat(due_date)))
+            else:
+                self.due.append(0)
+            self.priority_codes.append(PRIORITY_CODES.get(task.get("priority", "medium"), 1))
+            if task.get("completed"):
+                completed.append(row)
+            course = task.get("course")
+            if course is None:
+                self.course_ids.append(-1)
+            else:
+                if course not in course_index:
+                    course_index[course] = len(self.course_names)
+                    self.course_names.append(course)
+                self.course_ids.append(course_index[course])
+
+        size = len(self._tasks)
+        self._course_index = course_index
+        self.all = (1 << size) - 1
+        self.completed = _bitmap(completed, size)
+        self.open = self.all & ~self.completed
+        self.dated = _bitmap(dated, size)
+        # Rows with a due date, sorted by it, for range queries by bisection
+        self._by_due = array("q", sorted(dated, key=self.due.__getitem__))
+        self._sorted_due = array("q", (self.due[row] for row in self._by_due))
+        self._priority_masks: dict[int, int] = {}
+        self._course_masks: dict[int, int] = {}
+
+    def __len__(self) -> int:
+        """Number of tasks in the table."""
+        return len(self._tasks)
+
+    def priority(self, priority: str) -> int:
+        """Get the bitmap of tasks with a priority.
+
+        Args:
+            priority: Priority level (high, medium, low)
+
+        Returns:
+            Bitmap of matching rows
+        """
+        code = PRIORITY_CODES.get(priority)
+        if code is None:
+            return 0
+        if code not in self._priority_masks:
+            rows = (row for row, value in enumerate(self.priority_codes) if value == code)
+            self._priority_masks[code] = _bitmap(rows, len(self))
+        return self._priority_masks[code]
+
+    def course(self, course_name: str | None) -> int:
+        """Get the bitmap of tasks in a course.
+
+        Args:
+            course_name: Course name, or None for the inbox
+
+        Returns:
+            Bitmap of matching rows
+        """
+        course_id = -1 if course_name is None else self._course_index.get(course_name)
+        if course_id is None:
+            return 0
+        if course_id not in self._course_masks:
+            rows = (row for row, value in enumerate(self.course_ids) if value == course_id)
+            self._course_masks[course_id] = _bitmap(rows, len(self))
+        return self._course_masks[course_id]
+
+    def due_between(self, start: datetime | None, end: datetime | None) -> int:
+        """Get the bitmap of tasks due in [start, end); undated tasks never match.
+
+        Args:
+            start: Earliest due date (inclusive), or None for no lower bound
+            end: Due date limit (exclusive), or None for no upper bound
+
+        Returns:
+            Bitmap of matching rows
+        """
+        low = 0 if start is None else bisect_left(self._sorted_due, to_epoch(start))
+        high = (
+            len(self._sorted_due) if end is None
+            else bisect_left(self._sorted_due, to_epoch(end))
+        )
+        return _bitmap(self._by_due[low:high], len(self))
+
+    def due_ranges(self, bounds: Sequence[datetime]) -> list[int]:
+        """Split the tasks with a due date into consecutive due-date ranges.
+
+        One bisection per bound cuts the sorted due column, so every dated
+        task lands in exactly one range without being tested on its own.
+
+        Args:
+            bounds: Ascending range limits
+
+        Returns:
+            len(bounds) + 1 bitmaps: tasks due before bounds[0], in
+            [bounds[i], bounds[i + 1]) for each i, and from bounds[-1] on
+        """
+        cuts = [
+            0,
+            *(bisect_left(self._sorted_due, to_epoch(bound)) for bound in bounds),
+            len(self._sorted_due),
+        ]
+        return [_bitmap(self._by_due[low:high], len(self)) for low, high in zip(cuts, cuts[1:])]
+
+    def records(self, mask: int) -> list[TaskRecord]:
+        """Build read-only records for the rows in a bitmap.
+
+        Args:
+            mask: Bitmap of rows
+
+        Returns:
+            Task records in storage order
+        """
+        return [deserialize_task_record(self._tasks[row]) for row in iter_rows(mask)]
@@ -0,0 +1,213 @@
+"""Unit of work shared by the services used in one command."""
+
+from collections.abc import Hashable, Iterator
+from contextlib import ExitStack, contextmanager
+from functools import cached_property
+from pathlib import Path
+from types import TracebackType
+from typing import Any, cast
+
+from pkm.services.course_service import CourseService
+from pkm.services.graph_service import GraphService
+from pkm.services.note_service import NoteService
+from pkm.services.search_service import SearchService
+from pkm.services.task_service import TaskService
+from pkm.storage.backends import Store
+from pkm.storage.cache import copy_schema
+from pkm.storage.json_store import JSONStore
+from pkm.storage.schema import DataSchema, Dataset, deserialize_dataset, summarize_note
+
+
+class UnitOfWork:
+    """Loads the dataset once and commits every change with one save.
+
+    Implements the same load/save contract as the storage backends, so the
+    services it hands out use it as their store: load() returns the
+    in-memory dataset and save() only records the new state. Nothing is
+    written until commit().
+
+    The first change takes the store's inter-process lock and keeps it
+    until commit() or rollback(), so no other process can save in between
+    and the whole command's changes apply to the latest data.
+
+    Example:
+        >>> with UnitOfWork(data_dir) as uow:
+        ...     note = uow.notes.organize_note("n1", "Biology 101")
+        ...     uow.notes.add_topics(note.id, ["Cells"])
+    """
+
+    def __init__(self, data_dir: Path, store: Store | None = None) -> None:
+        """Initialize unit of work.
+
+        Args:
+            data_dir: Directory containing data.json
+            store: Storage backend to commit to (default: JSONStore on data.json)
+        """
+        self.data_dir = data_dir
+        self.store = store if store is not None else JSONStore(data_dir / "data.json")
+        self._data: DataSchema | None = None
+        self._dirty = False
+        self._lock: ExitStack | None = None
+        # Snapshot key of the in-memory dataset, and a count of its saves
+        self._key: Hashable = None
+        self._revision = 0
+
+    @cached_property
+    def notes(self) -> NoteService:
+        """Note service working on this unit of work."""
+        return NoteService(self.data_dir, self)
+
+    @cached_property
+    def tasks(self) -> TaskService:
+        """Task service working on this unit of work."""
+        return TaskService(self.data_dir, self)
+
+    @cached_property
+    def courses(self) -> CourseService:
+        """Course service working on this unit of work."""
+        return CourseService(self.data_dir, self, self.tasks)
+
+    @cached_property
+    def search(self) -> SearchService:
+        """Search service working on this unit of work."""
+        return SearchService(self.data_dir, self, self.notes, self.tasks)
+
+    @cached_property
+    def graph(self) -> GraphService:
+        """Graph service working on this unit of work."""
+        return GraphService(self.data_dir, self, self.notes, self.tasks)
+
+    def load(self) -> DataSchema:
+        """Get the dataset, loading it from the store on first use.
+
+        Returns:
+            Copy of the current dataset (record dicts are shared)
+        """
+        if self._data is None:
+            # Key first: a save in between only makes the key look stale
+            self._key = self.store.snapshot_key()
+            self._data = self.store.load()
+        return copy_schema(self._data)
+
+    def snapshot_key(self) -> Hashable:
+        """Identify the dataset this unit of work currently holds.
+
+        Before the first load this is the store's key. After it, the key
+        names the in-memory dataset: the store's key at load time, then a
+        new key for every save, never reused by this unit of work.
+
+        Returns:
+            Key that changes whenever the data seen through load() changes
+        """
+        if self._data is None:
+            return self.store.snapshot_key()
+        return self._key
+
+    def iter_records(self, kind: str) -> Iterator[dict[str, Any]]:
+        """Iterate over records, from memory if the dataset is already loaded.
+
+        Args:
+            kind: Record kind ("notes" or "tasks")
+
+        Returns:
+            Iterator over record dicts
+        """
+        if self._data is None:
+            return self.store.iter_records(kind)
+        return iter(cast(dict[str, Any], self._data)[kind])
+
+    def load_note_summaries(self) -> list[dict[str, Any]]:
+        """Get note summaries, from memory if the dataset is already loaded.
+
+        Returns:
+            One summary dict per note
+        """
+        if self._data is None:
+            return self.store.load_note_summaries()
+        return [summarize_note(note) for note in self._data["notes"]]
+
+    def load_typed(self) -> Dataset:
+        """Get the dataset as models, from memory if it is already loaded.
+
+        Returns:
+            Dataset with notes, tasks and courses
+        """
+        if self._data is None:
+            return self.store.load_typed()
+        return deserialize_dataset(self._data)
+
+    def save(self, data: DataSchema) -> None:
+        """Record a new state of the dataset without writing it.
+
+        Args:
+            data: Dataset to commit later
+        """
+        self._data = data
+        self._dirty = True
+        self._revision += 1
+        self._key = ("unit_of_work", self._revision)
+
+    @contextmanager
+    def locked(self) -> Iterator[None]:
+        """Take the store lock for a load-modify-save cycle.
+
+        The lock is kept after the block exits and released by commit() or
+        rollback(). Data loaded before the lock was taken is reloaded, as
+        another process may have saved in the meantime.
+        """
+        if self._lock is None:
+            self._lock = ExitStack()
+            self._lock.enter_context(self.store.locked())
+            if not self._dirty:
+                self._data = None
+        yield
+
+    def _release_lock(self) -> None:
+        """Release the store lock if this unit of work holds it."""
+        if self._lock is not None:
+            self._lock.close()
+            self._lock = None
+
+    @property
+    def has_changes(self) -> bool:
+        """Check if there are uncommitted changes."""
+        return self._dirty
+
+    def commit(self) -> None:
+        """Write all recorded changes with a single store save.
+
+        If the save fails the changes are discarded, as by rollback, so a
+        later commit does not retry data that is already out of date.
+        """
+        try:
+            if self._dirty and self._data is not None:
+                self.store.save(self._data)
+                self._dirty = False
+        except Exception:
+            self._data = None
+            self._dirty = False
+            raise
+        finally:
+            self._release_lock()
+
+    def rollback(self) -> None:
+        """Discard uncommitted changes; the next load reads the store again."""
+        self._data = None
+        self._dirty = False
+        self._release_lock()
+
+    def __enter__(self) -> "UnitOfWork":
+        """Start the unit of work."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        """Commit on success, roll back if the block raised."""
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
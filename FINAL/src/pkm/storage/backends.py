@@ -0,0 +1,108 @@
+"""Storage backend selection."""
+
+from collections.abc import Hashable, Iterator
+from contextlib import AbstractContextManager
+from pathlib import Path
+from typing import Any, Protocol
+
+from pkm.storage.directory_store import DirectoryStore
+from pkm.storage.encodings import DEFAULT_ENCODING
+from pkm.storage.json_store import DEFAULT_BACKUPS, JSONStore
+from pkm.storage.migrations import migrate_json_to_directory, migrate_json_to_sqlite
+from pkm.storage.schema import DataSchema, Dataset
+from pkm.storage.sqlite_store import SQLiteStore
+
+# Backend name -> file holding the data inside the data directory
+DATA_FILES = {
+    "json": "data.json",
+    "journal": "data.json",
+    "sqlite": "data.db",
+    "directory": "manifest.json",
+}
+
+BACKENDS = tuple(DATA_FILES)
+
+DEFAULT_BACKEND = "json"
+
+
+class Store(Protocol):
+    """Load/save contract shared by all storage backends."""
+
+    def load(self) -> DataSchema:
+        """Load the full dataset."""
+        ...
+
+    def save(self, data: DataSchema) -> None:
+        """Persist the full dataset."""
+        ...
+
+    def iter_records(self, kind: str) -> Iterator[dict[str, Any]]:
+        """Iterate over the notes or tasks without building the whole dataset."""
+        ...
+
+    def load_typed(self) -> Dataset:
+        """Load the full dataset as note and task models."""
+        ...
+
+    def load_note_summaries(self) -> list[dict[str, Any]]:
+        """Load note metadata and content previews, without note bodies."""
+        ...
+
+    def locked(self) -> AbstractContextManager[Any]:
+        """Lock out other processes for a load-modify-save cycle."""
+        ...
+
+    def snapshot_key(self) -> Hashable:
+        """Identify the stored data cheaply; equal keys mean unchanged data."""
+        ...
+
+
+def open_store(
+    data_dir: Path,
+    backend: str = DEFAULT_BACKEND,
+    encoding: str = DEFAULT_ENCODING,
+    backups: int = DEFAULT_BACKUPS,
+    backup_interval: float | None = None,
+) -> Store:
+    """Create the store for a backend.
+
+    The first time the sqlite or directory backend is used in a directory
+    that already has a data.json, the JSON data is migrated to it.
+
+    Args:
+        data_dir: Directory containing the data files
+        backend: Backend name (one of BACKENDS)
+        encoding: Snapshot encoding for the json and journal backends
+        backups: Backup generations kept by the json and journal backends
+        backup_interval: Minimum seconds between backup generations
+
+    Returns:
+        Store instance
+
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    if backend not in DATA_FILES:
+        raise ValueError(f"Unknown storage backend: {backend}")
+
+    data_file = data_dir / DATA_FILES[backend]
+    json_file = data_dir / DATA_FILES["json"]
+    needs_migration = not data_file.exists() and json_file.exists()
+
+    if backend == "sqlite":
+        if needs_migration:
+            migrate_json_to_sqlite(json_file, data_file)
+        return SQLiteStore(data_file)
+
+    if backend == "directory":
+        if needs_migration:
+            migrate_json_to_directory(json_file, data_dir)
+        return DirectoryStore(data_dir)
+
+    return JSONStore(
+        data_file,
+        journal=backend == "journal",
+        encoding=encoding,
+        backups=backups,
+        backup_interval=backup_interval,
+    )
@@ -0,0 +1,107 @@
+"""Process-wide cache of parsed data files."""
+
+import os
+from pathlib import Path
+from typing import Any, cast
+
+from pkm.storage.schema import DataSchema
+
+# (inode, mtime_ns, size) of one file; None when the file is missing
+FileStat = tuple[int, int, int] | None
+FileKey = tuple[FileStat, ...]
+
+
+def file_key(*paths: Path) -> FileKey:
+    """Build a cache key from the current state of one or more files.
+
+    A file that is rewritten (atomic rename gives a new inode), touched or
+    resized produces a different key, so a stale snapshot is never served.
+
+    Args:
+        paths: Files whose contents make up the snapshot
+
+    Returns:
+        Tuple of (inode, mtime_ns, size) per file
+    """
+    key: list[FileStat] = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            key.append(None)
+        else:
+            key.append((st.st_ino, st.st_mtime_ns, st.st_size))
+    return tuple(key)
+
+
+def copy_schema(data: DataSchema) -> DataSchema:
+    """Copy the top-level dict and record lists of a dataset.
+
+    Record dicts are shared, not copied. Callers may append, remove or
+    replace records in the returned lists, but must not modify a record
+    dict in place.
+
+    Args:
+        data: Dataset to copy
+
+    Returns:
+        Copy sharing record dicts with the original
+    """
+    return cast(
+        DataSchema,
+        {k: list(v) if isinstance(v, list) else v for k, v in cast(dict[str, Any], data).items()},
+    )
+
+
+class SnapshotCache:
+    """Parsed datasets shared by every store instance in the process.
+
+    One CLI command may build several services, each calling load() more
+    than once. Entries are validated against the files' current stat on
+    every lookup, so only the first load after a change parses the file.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty cache."""
+        self._entries: dict[str, tuple[FileKey, DataSchema]] = {}
+
+    def get(self, path: Path, key: FileKey) -> DataSchema | None:
+        """Get a copy of the cached dataset if the files are unchanged.
+
+        Args:
+            path: Data file the snapshot belongs to
+            key: Current key of the data file(s)
+
+        Returns:
+            Copy of the cached dataset, or None on a miss
+        """
+        entry = self._entries.get(os.path.abspath(path))
+        if entry is None or entry[0] != key:
+            return None
+        return copy_schema(entry[1])
+
+    def put(self, path: Path, key: FileKey, data: DataSchema) -> None:
+        """Cache a dataset for the given file state.
+
+        Args:
+            path: Data file the snapshot belongs to
+            key: Key of the data file(s) holding exactly this data
+            data: Dataset to cache (a copy of its lists is stored)
+        """
+        self._entries[os.path.abspath(path)] = (key, copy_schema(data))
+
+    def invalidate(self, path: Path) -> None:
+        """Drop the cached dataset for a file.
+
+        Args:
+            path: Data file the snapshot belongs to
+        """
+        self._entries.pop(os.path.abspath(path), None)
+
+    def clear(self) -> None:
+        """Drop all cached datasets."""
+        self._entries.clear()
+
+
+# Shared by all JSONStore instances in this process
+snapshot_cache = SnapshotCache()
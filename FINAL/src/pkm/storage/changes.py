@@ -0,0 +1,220 @@
+"""Record-level change detection between two versions of the data schema."""
+
+import json
+from typing import Any, cast
+
+from pkm.storage.schema import DataSchema
+
+# Top-level keys holding lists of records addressed by their "id" field
+RECORD_KINDS = ("notes", "tasks")
+
+# Marks a field missing from a dict (None is a valid field value)
+_MISSING = object()
+
+
+def clone_data(data: Any) -> Any:
+    """Return an independent copy of JSON-compatible data.
+
+    Round-trips through the JSON encoder, which is much faster than
+    copy.deepcopy for plain dict/list trees and normalizes values
+    (e.g. datetimes) exactly the way they are written to disk.
+
+    Args:
+        data: JSON-compatible value
+
+    Returns:
+        Deep copy of the value
+    """
+    return json.loads(json.dumps(data, default=str))
+
+
+def diff_records(
+    old: list[dict[str, Any]], new: list[dict[str, Any]]
+) -> tuple[list[dict[str, Any]], list[str]]:
+    """Compare two lists of records by id.
+
+    Args:
+        old: Records before the change
+        new: Records after the change
+
+    Returns:
+        Tuple of (added_or_changed_records, deleted_ids). Changed records
+        keep their order from the new list.
+    """
+    old_by_id = {record["id"]: record for record in old}
+    new_ids: set[str] = set()
+    upserts = []
+
+    for record in new:
+        record_id = record["id"]
+        new_ids.add(record_id)
+        old_record = old_by_id.get(record_id)
+        # Unchanged records are usually the very same (shared) dict
+        if old_record is not record and old_record != record:
+            upserts.append(record)
+
+    deleted = [record_id for record_id in old_by_id if record_id not in new_ids]
+    return upserts, deleted
+
+
+def diff_data(old: DataSchema, new: DataSchema) -> list[dict[str, Any]]:
+    """Compute the operations that turn one dataset into another.
+
+    Operations have one of seven shapes:
+        {"op": "put", "kind": "notes", "record": {...}}
+        {"op": "delete", "kind": "tasks", "id": "t1"}
+        {"op": "set", "key": "courses", "value": [...]}
+        {"op": "set", "key": "_course_stats", "field": "CS101", "value": {...}}
+        {"op": "unset", "key": "_course_stats", "field": "CS101"}
+        {"op": "add", "key": "_topic_index", "field": "Cells", "value": ["n1"]}
+        {"op": "remove", "key": "_topic_index", "field": "Cells", "value": ["n1"]}
+
+    Top-level values that are dicts on both sides (the counters and
+    indexes kept with the data) are compared field by field, so changing
+    one entry writes one small operation instead of the whole dict. A
+    field holding a list of unique IDs that only gained or lost members
+    is written as just those members.
+
+    Args:
+        old: Dataset before the change
+        new: Dataset after the change
+
+    Returns:
+        List of operations (empty if nothing changed)
+    """
+    ops: list[dict[str, Any]] = []
+    old_data = cast(dict[str, Any], old)
+    new_data = cast(dict[str, Any], new)
+
+    for kind in RECORD_KINDS:
+        upserts, deleted = diff_records(old_data.get(kind, []), new_data.get(kind, []))
+        ops.extend({"op": "delete", "kind": kind, "id": record_id} for record_id in deleted)
+        ops.extend({"op": "put", "kind": kind, "record": record} for record in upserts)
+
+    for key, value in new_data.items():
+        if key in RECORD_KINDS:
+            continue
+        old_value = old_data.get(key)
+        if old_value is value or old_value == value:
+            continue
+        if isinstance(old_value, dict) and isinstance(value, dict):
+            ops.extend(_diff_fields(key, old_value, value))
+        else:
+            ops.append({"op": "set", "key": key, "value": value})
+
+    return ops
+
+
+def _diff_fields(key: str, old: dict[str, Any], new: dict[str, Any]) -> list[dict[str, Any]]:
+    """Compute the field operations that turn one top-level dict into another."""
+    ops: list[dict[str, Any]] = []
+    for field, value in new.items():
+        old_value = old.get(field, _MISSING)
+        if old_value is value or old_value == value:
+            continue
+        members = _diff_members(old_value, value)
+        if members is None:
+            ops.append({"op": "set", "key": key, "field": field, "value": value})
+            continue
+        removed, added = members
+        if removed:
+            ops.append({"op": "remove", "key": key, "field": field, "value": removed})
+        if added:
+            ops.append({"op": "add", "key": key, "field": field, "value": added})
+    ops.extend(
+        {"op": "unset", "key": key, "field": field} for field in old if field not in new
+    )
+    return ops
+
+
+def _diff_members(old: Any, new: Any) -> tuple[list[Any], list[Any]] | None:
+    """Split a change to a list of unique IDs into removed and appended members.
+
+    Returns None when the change is anything else (a reordering, a
+    duplicate, a value that is not a list of strings), which is then
+    written in full.
+    """
+    if not isinstance(old, list) or not isinstance(new, list):
+        return None
+    if not all(isinstance(item, str) for item in new):
+        return None
+    new_members = set(new)
+    if len(new_members) != len(new) or len(set(old)) != len(old):
+        return None
+    kept = [item for item in old if item in new_members]
+    if new[: len(kept)] != kept:
+        return None
+    removed = [item for item in old if item not in new_members]
+    return removed, new[len(kept) :]
+
+
+def apply_ops(data: DataSchema, ops: list[dict[str, Any]]) -> DataSchema:
+    """Apply operations produced by diff_data to a dataset in place.
+
+    Applying the same operations twice gives the same result, so a log can
+    safely be replayed over a snapshot that already contains some of them.
+
+    Args:
+        data: Dataset to update
+        ops: Operations to apply, in order
+
+    Returns:
+        The updated dataset
+    """
+    raw = cast(dict[str, Any], data)
+    positions: dict[str, dict[Any, int]] = {}
+    # Top-level dicts already copied by this call, so field ops never
+    # modify a dict shared with another copy of the data
+    copied: set[str] = set()
+
+    for op in ops:
+        if "field" in op:
+            key = op["key"]
+            if key not in copied:
+                current = raw.get(key)
+                raw[key] = dict(current) if isinstance(current, dict) else {}
+                copied.add(key)
+            _apply_field_op(raw[key], op)
+            continue
+        if op["op"] == "set":
+            raw[op["key"]] = op["value"]
+            copied.discard(op["key"])
+            continue
+
+        kind = op["kind"]
+        records = raw.setdefault(kind, [])
+        if kind not in positions:
+            positions[kind] = {record.get("id"): i for i, record in enumerate(records)}
+        index = positions[kind]
+
+        if op["op"] == "put":
+            record = op["record"]
+            position = index.get(record["id"])
+            if position is None:
+                index[record["id"]] = len(records)
+                records.append(record)
+            else:
+                records[position] = record
+        elif op["op"] == "delete" and op["id"] in index:
+            del records[index[op["id"]]]
+            # Positions after the deleted record shifted; rebuild lazily
+            del positions[kind]
+
+    return data
+
+
+def _apply_field_op(fields: dict[str, Any], op: dict[str, Any]) -> None:
+    """Apply one field operation to a top-level dict owned by the caller."""
+    field = op["field"]
+    if op["op"] == "set":
+        fields[field] = op["value"]
+    elif op["op"] == "unset":
+        fields.pop(field, None)
+    else:
+        # Build a new list: the old one may be shared with other data
+        members = fields.get(field, [])
+        if op["op"] == "add":
+            fields[field] = [*members, *(m for m in op["value"] if m not in members)]
+        else:
+            gone = set(op["value"])
+            fields[field] = [m for m in members if m not in gone]
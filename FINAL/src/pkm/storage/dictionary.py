@@ -0,0 +1,122 @@
+"""Course and topic dictionary for compact snapshots.
+
+Packed snapshots store each distinct course and topic name once, in the
+top-level `courses` and `topics` lists, and records refer to them by their
+position in those lists:
+
+    {
+        "_schema": 2,
+        "notes": [{"id": "n1", "course": 0, "topics": [0, 1], ...}],
+        "tasks": [{"id": "t1", "course": 0, ...}],
+        "courses": ["Biology 101"],
+        "topics": ["Cells", "Mitosis"]
+    }
+
+Loaded data always uses names. Unpacking hands every record the same
+string object for a name, so a large dataset holds each name in memory
+only once.
+"""
+
+from typing import Any, cast
+
+from pkm.storage.schema import DataSchema
+
+SCHEMA_KEY = "_schema"
+DICTIONARY_SCHEMA = 2
+
+# Start of a packed snapshot in the compact JSON encoding (pack() puts the
+# schema key first), so it can be recognised without parsing the file
+PACKED_PREFIX = b'{"_schema":2'
+
+
+def is_packed(data: dict[str, Any]) -> bool:
+    """Check if a decoded snapshot uses the course/topic dictionary."""
+    return data.get(SCHEMA_KEY) == DICTIONARY_SCHEMA
+
+
+def pack_record(
+    record: dict[str, Any], courses: dict[str, int], topics: dict[str, int] | None = None
+) -> dict[str, Any]:
+    """Replace the names in one record by dictionary ids, adding new names.
+
+    Args:
+        record: Note or task with names
+        courses: Course name -> id, extended in place
+        topics: Topic name -> id, extended in place (None for tasks)
+
+    Returns:
+        New packed record
+    """
+    name = record.get("course")
+    packed = {**record, "course": None if name is None else courses.setdefault(name, len(courses))}
+    if topics is not None:
+        packed["topics"] = [
+            topics.setdefault(topic, len(topics)) for topic in record.get("topics", [])
+        ]
+    return packed
+
+
+def pack(data: DataSchema) -> dict[str, Any]:
+    """Replace course and topic names in records by dictionary ids.
+
+    Args:
+        data: Dataset with names in its records
+
+    Returns:
+        New packed dataset (the input is not modified)
+    """
+    courses: dict[str, int] = {}
+    topics: dict[str, int] = {}
+
+    packed: dict[str, Any] = {SCHEMA_KEY: DICTIONARY_SCHEMA}
+    packed.update(
+        (key, value) for key, value in data.items() if key not in ("courses", "topics")
+    )
+    packed["notes"] = [pack_record(note, courses, topics) for note in data["notes"]]
+    packed["tasks"] = [pack_record(task, courses) for task in data["tasks"]]
+    packed["courses"] = list(courses)
+    packed["topics"] = list(topics)
+    return packed
+
+
+def unpack_record(
+    record: dict[str, Any], courses: list[str], topics: list[str]
+) -> dict[str, Any]:
+    """Replace dictionary ids in one packed record by names.
+
+    Args:
+        record: Packed note or task
+        courses: Course dictionary of the snapshot
+        topics: Topic dictionary of the snapshot
+
+    Returns:
+        New record with names
+    """
+    unpacked = dict(record)
+    if record.get("course") is not None:
+        unpacked["course"] = courses[record["course"]]
+    if "topics" in record:
+        unpacked["topics"] = [topics[topic_id] for topic_id in record["topics"]]
+    return unpacked
+
+
+def unpack(data: dict[str, Any]) -> DataSchema:
+    """Turn a packed snapshot back into a dataset with names.
+
+    Snapshots that are not packed are returned unchanged.
+
+    Args:
+        data: Decoded snapshot
+
+    Returns:
+        Dataset with names in its records and an empty `courses` list
+    """
+    if not is_packed(data):
+        return cast(DataSchema, data)
+    courses = data.pop("courses", [])
+    topics = data.pop("topics", [])
+    del data[SCHEMA_KEY]
+    data["notes"] = [unpack_record(note, courses, topics) for note in data.get("notes", [])]
+    data["tasks"] = [unpack_record(task, courses, topics) for task in data.get("tasks", [])]
+    data["courses"] = []
+    return cast(DataSchema, data)
@@ -0,0 +1,264 @@
+"""Per-record file storage with a compact manifest."""
+
+import json
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any, cast
+
+from pkm.storage.cache import FileKey, copy_schema, file_key, snapshot_cache
+from pkm.storage.changes import RECORD_KINDS, diff_data, diff_records
+from pkm.storage.locking import FileLock, StaleDataError, get_version, set_version
+from pkm.storage.schema import (
+    DataSchema,
+    Dataset,
+    create_empty_schema,
+    deserialize_dataset,
+    summarize_note,
+)
+
+# Record fields copied into the manifest for listing and filtering
+MANIFEST_FIELDS = {
+    "notes": (
+        "id", "course", "topics", "created_at", "modified_at", "linked_from_tasks", "preview"
+    ),
+    "tasks": ("id", "course", "due_date", "priority", "completed"),
+}
+
+
+def _write_json(path: Path, obj: Any, indent: int | None = None) -> None:
+    """Atomically replace a JSON file."""
+    tmp_file = path.with_name(path.name + ".tmp")
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        if indent is None:
+            json.dump(obj, f, separators=(",", ":"), default=str)
+        else:
+            json.dump(obj, f, indent=indent, default=str)
+    tmp_file.replace(path)
+
+
+class DirectoryStore:
+    """Stores each note and task in its own file, named by ID.
+
+    Layout inside the data directory:
+        manifest.json         - record order, listing fields (note metadata
+                                and a content preview), courses, _version
+        notes/<id>.<rev>.json - one file per note
+        tasks/<id>.<rev>.json - one file per task
+
+    Each manifest entry names its record's file through "rev", the version
+    of the save that wrote it (entries without one use <id>.json). save()
+    diffs against the last load and writes only the records that changed,
+    each to a new file for the new version, then the manifest. No file the
+    current manifest points to is ever overwritten, so the manifest is the
+    commit point: until it is replaced, readers see the old files, and an
+    interrupted save leaves only unlisted files behind. Files of replaced
+    and deleted records are removed after the manifest is written.
+    """
+
+    def __init__(self, data_dir: Path) -> None:
+        """Initialize directory store.
+
+        Args:
+            data_dir: Directory holding the manifest and record directories
+        """
+        self.data_dir = data_dir
+        self.manifest_file = data_dir / "manifest.json"
+        self.lock_file = data_dir / "manifest.json.lock"
+        self._baseline: DataSchema | None = None
+        self._version: int | None = None
+
+    def locked(self) -> FileLock:
+        """Get the lock guarding this store's files against other processes.
+
+        Returns:
+            Reentrant file lock; use it as a context manager
+        """
+        return FileLock(self.lock_file)
+
+    def exists(self) -> bool:
+        """Check if the manifest exists."""
+        return self.manifest_file.exists()
+
+    def snapshot_key(self) -> FileKey:
+        """Identify the stored data without reading it.
+
+        Every save rewrites the manifest, so its stat changes whenever the
+        data does.
+
+        Returns:
+            Cache key of the manifest
+        """
+        return file_key(self.manifest_file)
+
+    def record_file(self, kind: str, record_id: str, rev: int | None = None) -> Path:
+        """Get the file holding one revision of a record.
+
+        Args:
+            kind: Record kind ("notes" or "tasks")
+            record_id: Record ID
+            rev: Version of the save that wrote the file (None for files
+                written before revisions were recorded)
+
+        Returns:
+            Path to the record's JSON file
+        """
+        if rev is None:
+            return self.data_dir / kind / f"{record_id}.json"
+        return self.data_dir / kind / f"{record_id}.{rev}.json"
+
+    def load_manifest(self) -> dict[str, Any]:
+        """Load the manifest without reading any record files.
+
+        Returns:
+            Manifest with listing fields per record and all top-level keys
+        """
+        if not self.manifest_file.exists():
+            return cast(dict[str, Any], create_empty_schema())
+        with open(self.manifest_file, "r", encoding="utf-8") as f:
+            return cast(dict[str, Any], json.load(f))
+
+    def load_typed(self) -> Dataset:
+        """Load the whole dataset as note and task models.
+
+        Returns:
+            Dataset with notes, tasks and courses
+        """
+        return deserialize_dataset(self.load())
+
+    def load_note_summaries(self) -> list[dict[str, Any]]:
+        """Load note metadata and previews from the manifest alone.
+
+        No note files are read unless the manifest predates previews.
+
+        Returns:
+            One summary dict per note, in storage order
+        """
+        entries = self.load_manifest()["notes"]
+        if all("preview" in entry for entry in entries):
+            return cast(list[dict[str, Any]], entries)
+        return [summarize_note(note) for note in self._read()["notes"]]
+
+    def iter_records(self, kind: str) -> Iterator[dict[str, Any]]:
+        """Iterate over the notes or tasks, reading one record file at a time.
+
+        Args:
+            kind: Record kind ("notes" or "tasks")
+
+        Yields:
+            Record dicts in storage order
+        """
+        data = snapshot_cache.get(self.manifest_file, file_key(self.manifest_file))
+        if data is not None:
+            yield from cast(dict[str, Any], data)[kind]
+            return
+        for entry in self.load_manifest().get(kind, []):
+            yield self._read_record(kind, entry)
+
+    def load(self) -> DataSchema:
+        """Load the manifest and every record it lists.
+
+        Returns:
+            Data schema with notes, tasks, and courses
+
+        Raises:
+            ValueError: If a record listed in the manifest has no file
+        """
+        # Every save rewrites the manifest, so its stat identifies the data
+        key = file_key(self.manifest_file)
+        data = snapshot_cache.get(self.manifest_file, key)
+        if data is None:
+            data = self._read()
+            snapshot_cache.put(self.manifest_file, key, data)
+
+        self._baseline = copy_schema(data)
+        self._version = get_version(data)
+        return data
+
+    def _read(self) -> DataSchema:
+        """Read the manifest and the record files it lists."""
+        data = self.load_manifest()
+        for kind in RECORD_KINDS:
+            data[kind] = [self._read_record(kind, entry) for entry in data.get(kind, [])]
+        return cast(DataSchema, data)
+
+    def _read_record(self, kind: str, entry: dict[str, Any]) -> dict[str, Any]:
+        """Read the record file a manifest entry points to."""
+        path = self.record_file(kind, entry["id"], entry.get("rev"))
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return cast(dict[str, Any], json.load(f))
+        except FileNotFoundError as e:
+            raise ValueError(f"Missing record file: {path}") from e
+
+    def save(self, data: DataSchema) -> None:
+        """Save data, rewriting only the files of changed records.
+
+        Args:
+            data: Data schema to save
+
+        Raises:
+            StaleDataError: If another process saved since this store's last load
+        """
+        with self.locked():
+            if self._baseline is None:
+                # Diff against what is actually on disk
+                self.load()
+            baseline = cast(DataSchema, self._baseline)
+
+            manifest = self.load_manifest()
+            current = get_version(cast(DataSchema, manifest))
+            if self._version != current:
+                raise StaleDataError(
+                    f"{self.manifest_file} changed since it was loaded "
+                    f"(version {self._version}, now {current})"
+                )
+            if not diff_data(baseline, data):
+                return
+            version = current + 1
+            set_version(data, version)
+
+            # Record ID -> revision of its file, per kind
+            revs: dict[str, dict[str, int | None]] = {}
+            replaced: list[Path] = []
+            for kind in RECORD_KINDS:
+                revs[kind] = {entry["id"]: entry.get("rev") for entry in manifest.get(kind, [])}
+                upserts, deleted_ids = diff_records(
+                    cast(dict[str, Any], baseline)[kind], cast(dict[str, Any], data)[kind]
+                )
+                (self.data_dir / kind).mkdir(parents=True, exist_ok=True)
+                for record in upserts:
+                    record_id = record["id"]
+                    if record_id in revs[kind]:
+                        replaced.append(self.record_file(kind, record_id, revs[kind][record_id]))
+                    _write_json(self.record_file(kind, record_id, version), record, indent=2)
+                    revs[kind][record_id] = version
+                replaced.extend(
+                    self.record_file(kind, record_id, revs[kind].pop(record_id, None))
+                    for record_id in deleted_ids
+                )
+
+            _write_json(self.manifest_file, self._manifest(data, revs))
+            for path in replaced:
+                path.unlink(missing_ok=True)
+
+            snapshot_cache.put(self.manifest_file, file_key(self.manifest_file), data)
+            self._baseline = copy_schema(data)
+            self._version = current + 1
+
+    @staticmethod
+    def _manifest(data: DataSchema, revs: dict[str, dict[str, int | None]]) -> dict[str, Any]:
+        """Build the manifest for a dataset whose record files have the given revisions."""
+        manifest = {
+            key: value for key, value in cast(dict[str, Any], data).items()
+            if key not in RECORD_KINDS
+        }
+        for kind in RECORD_KINDS:
+            fields = MANIFEST_FIELDS[kind]
+            records = cast(dict[str, Any], data)[kind]
+            if kind == "notes":
+                records = [summarize_note(record) for record in records]
+            manifest[kind] = [
+                {**{field: record.get(field) for field in fields}, "rev": revs[kind][record["id"]]}
+                for record in records
+            ]
+        return manifest
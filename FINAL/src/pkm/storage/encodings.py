@@ -0,0 +1,201 @@
+"""On-disk encodings for the data snapshot, detected from the file header."""
+
+import gzip
+import json
+import lzma
+import marshal
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+import pydantic_core
+
+ENCODINGS = ("json", "compact", "gzip", "lzma", "marshal", "ndjson")
+
+DEFAULT_ENCODING = "json"
+
+GZIP_MAGIC = b"\x1f\x8b"
+LZMA_MAGIC = b"\xfd7zXZ\x00"
+# marshal output has no magic number of its own. No JSON text starts with a
+# NUL byte, so this header cannot be confused with the JSON encodings.
+MARSHAL_MAGIC = b"\x00PKM"
+MARSHAL_VERSION = 4
+# First line of an NDJSON file; it holds every top-level key except records
+NDJSON_MAGIC = b'{"type":"header"'
+
+# Bytes detect_encoding() needs to see
+HEADER_LENGTH = len(NDJSON_MAGIC)
+
+# Record list in the dataset -> type tag of its NDJSON lines
+NDJSON_TYPES = {"notes": "note", "tasks": "task"}
+
+
+def _compact_json(data: Any) -> bytes:
+    """Serialize data as minified UTF-8 JSON."""
+    return pydantic_core.to_json(data, fallback=str)
+
+
+def ndjson_header(header: dict[str, Any]) -> bytes:
+    """Serialize the header line of an NDJSON file (without the newline)."""
+    return _compact_json({"type": "header", "data": header})
+
+
+def ndjson_record(kind: str, record: Any) -> bytes:
+    """Serialize one record line of an NDJSON file (without the newline)."""
+    return _compact_json({"type": NDJSON_TYPES[kind], "record": record})
+
+
+def _encode_ndjson(data: dict[str, Any]) -> bytes:
+    """Serialize data as a header line followed by one line per record."""
+    header = {key: value for key, value in data.items() if key not in NDJSON_TYPES}
+    lines = [ndjson_header(header)]
+    for kind in NDJSON_TYPES:
+        lines.extend(ndjson_record(kind, record) for record in data.get(kind, []))
+    return b"\n".join(lines) + b"\n"
+
+
+def compress(payload: bytes, encoding: str) -> bytes:
+    """Compress minified JSON for the gzip and lzma encodings.
+
+    Args:
+        payload: Minified JSON (as written by the compact encoding)
+        encoding: "gzip" or "lzma"
+
+    Returns:
+        Compressed bytes
+
+    Raises:
+        ValueError: If the encoding is not a compressed one
+    """
+    if encoding == "gzip":
+        return gzip.compress(payload, compresslevel=6, mtime=0)
+    if encoding == "lzma":
+        return lzma.compress(payload)
+    raise ValueError(f"Not a compressed encoding: {encoding}")
+
+
+def iter_ndjson(lines: Iterable[bytes], kind: str | None = None) -> Iterator[tuple[str, Any]]:
+    """Parse NDJSON lines one at a time.
+
+    Args:
+        lines: Lines of an NDJSON file (e.g. an open binary file)
+        kind: Only parse records of this kind ("notes" or "tasks"); lines of
+            other record kinds are skipped without being decoded
+
+    Yields:
+        ("header", header dict) for the header line and (kind, record) for
+        each record line
+
+    Raises:
+        ValueError: If a line is not valid JSON or has an unknown type
+    """
+    kinds = {tag: name for name, tag in NDJSON_TYPES.items()}
+    skip = tuple(
+        b'{"type":"%s"' % tag.encode() for tag, name in kinds.items() if kind not in (None, name)
+    )
+    for line in lines:
+        if not line.strip() or (skip and line.startswith(skip)):
+            continue
+        obj = pydantic_core.from_json(line)
+        if obj.get("type") == "header":
+            yield "header", obj["data"]
+        elif obj.get("type") in kinds:
+            yield kinds[obj["type"]], obj["record"]
+        else:
+            raise ValueError(f"Unknown NDJSON line type: {obj.get('type')!r}")
+
+
+def _decode_ndjson(raw: bytes) -> dict[str, Any]:
+    """Deserialize a whole NDJSON file."""
+    data: dict[str, Any] = {kind: [] for kind in NDJSON_TYPES}
+    for kind, value in iter_ndjson(raw.splitlines()):
+        if kind == "header":
+            data.update(value)
+        else:
+            data[kind].append(value)
+    return data
+
+
+def encode(data: Any, encoding: str = DEFAULT_ENCODING) -> bytes:
+    """Serialize data in one of the supported encodings.
+
+    Encodings:
+        json: indented JSON (the historical, human-readable format)
+        compact: minified JSON
+        gzip: minified JSON, gzip-compressed
+        lzma: minified JSON, xz-compressed
+        marshal: Python marshal format (fastest to load; tied to CPython)
+        ndjson: a header line, then one line per note and task, tagged with
+            its type, so records can be scanned without parsing the rest
+
+    Args:
+        data: JSON-compatible data to serialize
+        encoding: Name of the encoding (one of ENCODINGS)
+
+    Returns:
+        Encoded bytes
+
+    Raises:
+        ValueError: If the encoding is unknown
+    """
+    if encoding == "json":
+        return pydantic_core.to_json(data, indent=2, fallback=str)
+    if encoding == "compact":
+        return _compact_json(data)
+    if encoding in ("gzip", "lzma"):
+        return compress(_compact_json(data), encoding)
+    if encoding == "marshal":
+        return MARSHAL_MAGIC + marshal.dumps(data, MARSHAL_VERSION)
+    if encoding == "ndjson":
+        return _encode_ndjson(data)
+    raise ValueError(f"Unknown encoding: {encoding}")
+
+
+def detect_encoding(raw: bytes) -> str:
+    """Detect the encoding of serialized data from its first bytes.
+
+    Both JSON encodings are reported as "json"; they decode the same way.
+
+    Args:
+        raw: Encoded data (only the header is inspected)
+
+    Returns:
+        Encoding name
+    """
+    if raw.startswith(GZIP_MAGIC):
+        return "gzip"
+    if raw.startswith(LZMA_MAGIC):
+        return "lzma"
+    if raw.startswith(MARSHAL_MAGIC):
+        return "marshal"
+    if raw.startswith(NDJSON_MAGIC):
+        return "ndjson"
+    return "json"
+
+
+def decode(raw: bytes) -> Any:
+    """Deserialize data written by encode(), whatever its encoding.
+
+    Args:
+        raw: Encoded data
+
+    Returns:
+        Decoded data
+
+    Raises:
+        ValueError: If the data is corrupted
+    """
+    encoding = detect_encoding(raw)
+    try:
+        if encoding == "gzip":
+            return pydantic_core.from_json(gzip.decompress(raw))
+        if encoding == "lzma":
+            return pydantic_core.from_json(lzma.decompress(raw))
+        if encoding == "marshal":
+            return marshal.loads(raw[len(MARSHAL_MAGIC):])
+        if encoding == "ndjson":
+            return _decode_ndjson(raw)
+        return pydantic_core.from_json(raw)
+    except json.JSONDecodeError:
+        raise
+    except (OSError, EOFError, TypeError, ValueError, lzma.LZMAError) as e:
+        raise ValueError(f"Invalid {encoding} data: {e}") from e
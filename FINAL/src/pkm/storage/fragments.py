@@ -0,0 +1,190 @@
+"""Snapshot encoding that reuses the encoded bytes of unchanged records."""
+
+import threading
+from typing import Any
+
+from pkm.storage.dictionary import DICTIONARY_SCHEMA, SCHEMA_KEY, pack, pack_record
+from pkm.storage.encodings import (
+    NDJSON_TYPES,
+    compress,
+    encode,
+    ndjson_header,
+    ndjson_record,
+)
+from pkm.storage.schema import DataSchema
+
+# Cached fragment: the record it encodes and its bytes
+Fragment = tuple[dict[str, Any], bytes]
+
+
+def _style(encoding: str) -> str:
+    """Get the layout of a text encoding's records: json, compact or ndjson."""
+    return encoding if encoding in ("json", "ndjson") else "compact"
+
+
+class FragmentCache:
+    """Encodes snapshots, re-encoding only the records that changed.
+
+    The encoded bytes of every record written by the last encode() are kept
+    with the record dict they came from. Stored records are replaced rather
+    than modified in place, so a record is clean exactly when the dataset
+    still holds that same dict object. A save then encodes the changed
+    records and the small top-level skeleton, and splices the cached
+    fragments of the rest into the output.
+
+    Packed encodings (all but json, see pkm.storage.dictionary) keep one
+    course and topic dictionary for the life of the cache. Names are only
+    ever appended to it, so the ids inside a cached fragment stay valid;
+    names that are no longer used stay in the written dictionary until the
+    cache is cleared, and unpacking ignores them. The first save after
+    clear() writes exactly what encode(pack(data)) would. The marshal
+    encoding has no text fragments to splice and is always encoded in full.
+
+    Example:
+        >>> fragments = FragmentCache()
+        >>> fragments.encode(data, "compact")  # encodes every record
+        >>> data["tasks"][0] = {**data["tasks"][0], "completed": True}
+        >>> fragments.encode(data, "compact")  # encodes one record
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty cache."""
+        self._style: str | None = None
+        self._fragments: dict[int, Fragment] = {}
+        # Dictionary shared by every packed fragment: name -> id
+        self._courses: dict[str, int] = {}
+        self._topics: dict[str, int] = {}
+        self._lock = threading.Lock()
+        # Records encoded (cache misses) by the last encode() call
+        self.encoded_records = 0
+
+    def clear(self) -> None:
+        """Drop every cached fragment and the dictionary."""
+        with self._lock:
+            self._reset(None)
+
+    def _reset(self, style: str | None) -> None:
+        """Start an empty cache for a record layout."""
+        self._style = style
+        self._fragments = {}
+        self._courses = {}
+        self._topics = {}
+
+    def encode(self, data: DataSchema, encoding: str) -> bytes:
+        """Serialize a dataset, reusing the fragments of unchanged records.
+
+        Args:
+            data: Dataset with names in its records
+            encoding: Name of the encoding (one of ENCODINGS)
+
+        Returns:
+            Encoded bytes
+
+        Raises:
+            ValueError: If the encoding is unknown
+        """
+        if encoding == "marshal":
+            return encode(pack(data), encoding)
+        if encoding not in ("json", "compact", "gzip", "lzma", "ndjson"):
+            raise ValueError(f"Unknown encoding: {encoding}")
+
+        with self._lock:
+            payload = self._encode_text(data, _style(encoding))
+        if encoding in ("gzip", "lzma"):
+            return compress(payload, encoding)
+        return payload
+
+    def _encode_text(self, data: DataSchema, style: str) -> bytes:
+        """Encode a dataset in one of the text layouts."""
+        if style != self._style:
+            self._reset(style)
+
+        packed = style != "json"
+        cache = self._fragments
+        lists: dict[str, list[bytes]] = {}
+        self.encoded_records = 0
+
+        for kind in NDJSON_TYPES:
+            topics = self._topics if kind == "notes" else None
+            encoded = lists[kind] = []
+            for record in data[kind]:  # type: ignore[literal-required]
+                fragment = cache.get(id(record))
+                if fragment is None or fragment[0] is not record:
+                    value = pack_record(record, self._courses, topics) if packed else record
+                    fragment = cache[id(record)] = (
+                        record, self._encode_record(style, kind, value)
+                    )
+                    self.encoded_records += 1
+                encoded.append(fragment[1])
+
+        # Fragments of replaced records pile up; drop them once they dominate
+        size = sum(len(encoded) for encoded in lists.values())
+        if len(cache) > 2 * size:
+            self._fragments = {
+                id(record): cache[id(record)]
+                for kind in NDJSON_TYPES
+                for record in data[kind]  # type: ignore[literal-required]
+            }
+
+        skeleton: dict[str, Any] = {SCHEMA_KEY: DICTIONARY_SCHEMA} if packed else {}
+        skeleton.update(
+            (key, value) for key, value in data.items()
+            if not packed or key not in ("courses", "topics")
+        )
+        if packed:
+            skeleton["courses"] = list(self._courses)
+            skeleton["topics"] = list(self._topics)
+
+        if style == "ndjson":
+            header = {key: value for key, value in skeleton.items() if key not in NDJSON_TYPES}
+            lines = [ndjson_header(header), *lists["notes"], *lists["tasks"]]
+            return b"\n".join(lines) + b"\n"
+        spliced = self._splice(skeleton, lists, style)
+        if spliced is None:
+            # A value collides with a placeholder: encode everything afresh
+            self._reset(style)
+            return encode(pack(data) if packed else data, style)
+        return spliced
+
+    @staticmethod
+    def _encode_record(style: str, kind: str, record: dict[str, Any]) -> bytes:
+        """Encode one record as it appears inside a snapshot."""
+        if style == "ndjson":
+            return ndjson_record(kind, record)
+        if style == "compact":
+            return encode(record, "compact")
+        # Record lists sit two levels deep in the indented snapshot
+        return encode(record, "json").replace(b"\n", b"\n    ")
+
+    @staticmethod
+    def _splice(
+        skeleton: dict[str, Any], lists: dict[str, list[bytes]], style: str
+    ) -> bytes | None:
+        """Encode the skeleton and insert the record lists into it.
+
+        Returns:
+            Encoded snapshot, or None if a placeholder is not unique
+        """
+        placeholders = {kind: f"\x00fragments:{kind}" for kind in lists}
+        raw = encode({**skeleton, **placeholders}, style)
+        spans: list[tuple[int, int, list[bytes]]] = []
+        for kind, fragments in lists.items():
+            marker = encode(placeholders[kind], "compact")
+            if raw.count(marker) != 1:
+                return None
+            start = raw.index(marker)
+            spans.append((start, start + len(marker), fragments))
+
+        parts: list[bytes] = []
+        position = 0
+        for start, end, fragments in sorted(spans, key=lambda span: span[0]):
+            parts.append(raw[position:start])
+            if style == "compact":
+                parts.append(b"[" + b",".join(fragments) + b"]")
+            elif fragments:
+                parts.append(b"[\n    " + b",\n    ".join(fragments) + b"\n  ]")
+            else:
+                parts.append(b"[]")
+            position = end
+        parts.append(raw[position:])
+        return b"".join(parts)
@@ -0,0 +1,88 @@
+"""ID -> position index over a dataset's record lists."""
+
+import weakref
+from typing import Any, cast
+
+from pkm.storage.schema import DataSchema
+
+
+class RecordIndex:
+    """Maps record IDs to their positions in one kind's record list.
+
+    Loads of an unchanged snapshot return lists with the same records in
+    the same order, and services replace records in place of the old ones,
+    so positions stay valid across loads and saves. Every hit is checked
+    against the list it is used on (one comparison) and the index is
+    rebuilt only when a position turns out to be stale: after records were
+    deleted, or when another process changed the data.
+
+    An ID that is not found triggers a rebuild unless the index was built
+    from this very list at its current length, so lookups of IDs that do
+    not exist stay cheap too.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty index."""
+        self._positions: dict[str, int] = {}
+        self._source: list[dict[str, Any]] | None = None
+        self._length = 0
+        # Times the index was (re)built, for diagnostics
+        self.rebuilds = 0
+
+    def find(self, records: list[dict[str, Any]], record_id: str) -> int | None:
+        """Get the position of a record in a list.
+
+        Args:
+            records: Record list to look in
+            record_id: Exact record ID
+
+        Returns:
+            Position of the record, or None if it is not in the list
+        """
+        position = self._positions.get(record_id)
+        if position is not None and position < len(records):
+            if records[position]["id"] == record_id:
+                return position
+        elif position is None and records is self._source and len(records) == self._length:
+            return None
+
+        self._positions = {record["id"]: i for i, record in enumerate(records)}
+        self._source = records
+        self._length = len(records)
+        self.rebuilds += 1
+        return self._positions.get(record_id)
+
+
+# Store -> record kind -> index; dropped together with the store
+_indexes: "weakref.WeakKeyDictionary[object, dict[str, RecordIndex]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def record_index(store: object, kind: str) -> RecordIndex:
+    """Get the index a store keeps for one record kind.
+
+    Args:
+        store: Store the data was loaded from
+        kind: Record kind ("notes" or "tasks")
+
+    Returns:
+        Index shared by every caller using this store
+    """
+    return _indexes.setdefault(store, {}).setdefault(kind, RecordIndex())
+
+
+def find_record(store: object, data: DataSchema, kind: str, record_id: str) -> int | None:
+    """Get the position of a record in data loaded from a store.
+
+    Args:
+        store: Store the data was loaded from
+        data: Loaded dataset
+        kind: Record kind ("notes" or "tasks")
+        record_id: Exact record ID
+
+    Returns:
+        Position in data[kind], or None if there is no such record
+    """
+    records = cast(dict[str, Any], data)[kind]
+    return record_index(store, kind).find(records, record_id)
@@ -0,0 +1,120 @@
+"""Append-only operation journal layered over a JSON snapshot."""
+
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+from pkm.storage.changes import apply_ops
+from pkm.storage.schema import DataSchema
+
+
+class Journal:
+    """Append-only log of data operations, one JSON object per line.
+
+    The journal records changes made since the last snapshot was written.
+    Replaying it over that snapshot reproduces the current data. A torn
+    final line (e.g. from a crash mid-append) is ignored on replay.
+    """
+
+    def __init__(self, journal_file: Path) -> None:
+        """Initialize journal.
+
+        Args:
+            journal_file: Path to the journal file
+        """
+        self.journal_file = journal_file
+        self.tmp_file = journal_file.with_name(journal_file.name + ".tmp")
+
+    def exists(self) -> bool:
+        """Check if the journal file exists."""
+        return self.journal_file.exists()
+
+    def size(self) -> int:
+        """Get the journal size in bytes (0 if missing)."""
+        try:
+            return self.journal_file.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def append(self, ops: list[dict[str, Any]]) -> None:
+        """Append operations to the journal and flush them to disk.
+
+        Args:
+            ops: Operations to append
+        """
+        if not ops:
+            return
+
+        self.journal_file.parent.mkdir(parents=True, exist_ok=True)
+        lines = "".join(json.dumps(op, default=str) + "\n" for op in ops)
+        with open(self.journal_file, "a", encoding="utf-8") as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def read_ops(self, limit: int | None = None) -> list[dict[str, Any]]:
+        """Read operations from the journal.
+
+        Args:
+            limit: Only read operations within the first `limit` bytes
+
+        Returns:
+            List of operations in the order they were appended
+        """
+        if not self.exists():
+            return []
+
+        with open(self.journal_file, "rb") as f:
+            raw = f.read() if limit is None else f.read(limit)
+
+        ops = []
+        for line in raw.splitlines():
+            if not line.strip():
+                continue
+            try:
+                ops.append(json.loads(line))
+            except json.JSONDecodeError:
+                # Torn write at the end of the log; everything before it is intact
+                break
+        return ops
+
+    def replay(self, data: DataSchema, limit: int | None = None) -> DataSchema:
+        """Replay the journal over a snapshot.
+
+        Args:
+            data: Snapshot data to update in place
+            limit: Only replay operations within the first `limit` bytes
+
+        Returns:
+            The updated data
+        """
+        return apply_ops(data, self.read_ops(limit))
+
+    def discard_through(self, offset: int) -> None:
+        """Drop the first `offset` bytes of the journal.
+
+        Operations appended after `offset` are kept, so entries written while
+        a compaction was running are not lost.
+
+        Args:
+            offset: Byte offset up to which operations are folded into a snapshot
+        """
+        if not self.exists():
+            return
+
+        with open(self.journal_file, "rb") as f:
+            f.seek(offset)
+            tail = f.read()
+
+        if not tail:
+            self.journal_file.unlink(missing_ok=True)
+            return
+
+        with open(self.tmp_file, "wb") as f:
+            f.write(tail)
+        self.tmp_file.replace(self.journal_file)
+
+    def clear(self) -> None:
+        """Remove the journal entirely."""
+        self.journal_file.unlink(missing_ok=True)
@@ -1,10 +1,40 @@
 """JSON file storage with atomic writes."""
 
-import json
+import os
 import shutil
+import threading
+import time
+from collections.abc import Iterator
 from pathlib import Path
+from typing import Any, cast
 
-from pkm.storage.schema import DataSchema, create_empty_schema
+from pkm.storage.cache import FileKey, copy_schema, file_key, snapshot_cache
+from pkm.storage.changes import diff_data
+from pkm.storage.dictionary import PACKED_PREFIX, is_packed, unpack, unpack_record
+from pkm.storage.encodings import (
+    DEFAULT_ENCODING,
+    HEADER_LENGTH,
+    decode,
+    detect_encoding,
+    iter_ndjson,
+)
+from pkm.storage.fragments import FragmentCache
+from pkm.storage.journal import Journal
+from pkm.storage.locking import FileLock, StaleDataError, get_version, set_version
+from pkm.storage.schema import (
+    DATASET_ADAPTER,
+    DataSchema,
+    Dataset,
+    create_empty_schema,
+    deserialize_dataset,
+    summarize_note,
+)
+
+# Fold the journal into a new snapshot once it grows past this many bytes
+DEFAULT_COMPACT_THRESHOLD = 1024 * 1024
+
+# Backup generations kept next to the data file (.bak, .bak.1, ...)
+DEFAULT_BACKUPS = 1
 
 
 class JSONStore:
@@ -13,22 +43,110 @@ class JSONStore:
     Ensures data integrity by:
     - Writing to temporary file first (.tmp)
     - Renaming to target file only if write succeeds
-    - Creating backups before overwriting (.bak)
+    - Keeping the replaced file as a backup (.bak)
+
+    Backups cost no data copy: the outgoing data file is hard-linked as
+    `.bak` before the new file is renamed over it, and older generations
+    (`.bak.1`, `.bak.2`, ...) are shifted by rename. With `backup_interval`
+    set, a new generation is only started once the last rotation is that
+    many seconds old, e.g. 3600 keeps at most one snapshot per hour. The
+    time of each rotation is the mtime of `.bak.stamp`: the backup itself
+    shares its inode (and mtime) with the data file it was linked from.
+
+    Parsed data is shared through the process-wide snapshot cache, keyed by
+    the data file's inode, mtime and size, so repeated loads of an unchanged
+    file (e.g. by several services in one command) parse it only once.
+    Records returned by load() are shared with that cache: replace a record
+    dict in its list rather than modifying it in place.
+
+    In journal mode, save() appends only the changed records to an
+    append-only log (.journal) instead of rewriting the whole file. load()
+    replays the log over the last snapshot, and once the log passes
+    `compact_threshold` bytes it is folded into a new snapshot.
+
+    Snapshots are written in `encoding` (indented JSON by default; see
+    pkm.storage.encodings) and read back in whatever encoding the file's
+    header shows, so the setting can be changed at any time. The encoded
+    bytes of each record are kept between saves, so a snapshot write only
+    re-encodes the records replaced since the last one (see
+    pkm.storage.fragments).
+
+    Every save increments a `_version` stamp in the data and happens under
+    an advisory lock on `.json.lock`. Callers hold the same lock through
+    locked() around a whole load-modify-save cycle; a save based on a load
+    that another process has since overwritten raises StaleDataError
+    instead of silently dropping that process's changes.
     """
 
-    def __init__(self, data_file: Path) -> None:
+    def __init__(
+        self,
+        data_file: Path,
+        journal: bool = False,
+        compact_threshold: int = DEFAULT_COMPACT_THRESHOLD,
+        background_compaction: bool = True,
+        encoding: str = DEFAULT_ENCODING,
+        backups: int = DEFAULT_BACKUPS,
+        backup_interval: float | None = None,
+    ) -> None:
         """Initialize JSON store.
 
         Args:
             data_file: Path to the data.json file
+            journal: Append changes to a journal instead of rewriting the file
+            compact_threshold: Journal size in bytes that triggers compaction
+            background_compaction: Compact in a background thread after save
+            encoding: Encoding for snapshots written by this store
+            backups: Number of backup generations to keep (0 disables backups)
+            backup_interval: Minimum time in seconds since the last backup
+                rotation before another one is taken (None: back up on
+                every save)
         """
         self.data_file = data_file
         self.tmp_file = data_file.with_suffix(".json.tmp")
         self.bak_file = data_file.with_suffix(".json.bak")
+        self.bak_stamp_file = data_file.with_suffix(".json.bak.stamp")
+        self.journal = Journal(data_file.with_suffix(".json.journal"))
+        self.lock_file = data_file.with_suffix(".json.lock")
+        self.journal_mode = journal
+        self.compact_threshold = compact_threshold
+        self.background_compaction = background_compaction
+        self.encoding = encoding
+        self.backups = backups
+        self.backup_interval = backup_interval
+
+        # Last state known to be on disk; save() diffs against it in journal mode
+        self._baseline: DataSchema | None = None
+        self._journal_lock = threading.Lock()
+        self._compaction_thread: threading.Thread | None = None
+        # Version of the data this store last loaded or saved
+        self._version: int | None = None
+        self._fragments = FragmentCache()
+
+    def locked(self) -> FileLock:
+        """Get the lock guarding this store's files against other processes.
+
+        Returns:
+            Reentrant file lock; use it as a context manager
+        """
+        return FileLock(self.lock_file)
+
+    def snapshot_key(self) -> FileKey:
+        """Identify the stored data without reading it.
+
+        Every save replaces the data file or appends to the journal, so
+        their stat changes whenever the data does.
+
+        Returns:
+            Cache key of the data file and its journal
+        """
+        return self._file_key()
 
     def load(self) -> DataSchema:
         """Load data from JSON file.
 
+        Any journal left next to the data file is replayed over it, even
+        when the store itself is not in journal mode.
+
         Returns:
             Data schema with notes, tasks, and courses
 
@@ -36,52 +154,281 @@ class JSONStore:
             FileNotFoundError: If data file doesn't exist
             json.JSONDecodeError: If file contains invalid JSON
         """
+        data = self._read()
+        self._version = get_version(data)
+        if self.journal_mode:
+            self._baseline = copy_schema(data)
+        return data
+
+    def load_note_summaries(self) -> list[dict[str, Any]]:
+        """Load note metadata with a content preview instead of the body.
+
+        The snapshot is one file, so this reads it through the cache like
+        load() but only hands out the summaries.
+
+        Returns:
+            One summary dict per note, in storage order
+        """
+        return [summarize_note(note) for note in self.iter_records("notes")]
+
+    def iter_records(self, kind: str) -> Iterator[dict[str, Any]]:
+        """Iterate over the notes or tasks without building the whole dataset.
+
+        An NDJSON snapshot with no pending journal is read one line at a
+        time, so only the current record is held in memory. Otherwise the
+        records come from the (cached) parsed snapshot.
+
+        Args:
+            kind: Record kind ("notes" or "tasks")
+
+        Yields:
+            Record dicts in storage order
+        """
+        key = self._file_key()
+        data = snapshot_cache.get(self.data_file, key)
+        if data is None and key[1] is None and self._snapshot_encoding() == "ndjson":
+            yield from self._stream_ndjson(kind)
+            return
+        if data is None:
+            data = self._read()
+        yield from cast(dict[str, Any], data)[kind]
+
+    def load_typed(self) -> Dataset:
+        """Load the whole dataset as validated note and task models.
+
+        A plain JSON snapshot with no pending journal and no cached parse is
+        handed straight to pydantic, which parses and validates it in one
+        native pass without building intermediate dicts. Otherwise the
+        models are built from the (cached) loaded data. The result is not
+        added to the snapshot cache.
+
+        Returns:
+            Dataset with notes, tasks and courses
+        """
+        key = self._file_key()
+        if (
+            snapshot_cache.get(self.data_file, key) is None
+            and key[1] is None
+            and self._snapshot_encoding() == "json"
+        ):
+            raw = self.data_file.read_bytes()
+            if not raw.startswith(PACKED_PREFIX):
+                try:
+                    return DATASET_ADAPTER.validate_json(raw)
+                except ValueError:
+                    pass  # Corrupted or invalid: load() recovers or reports it
+        return deserialize_dataset(self._read())
+
+    def _snapshot_encoding(self) -> str | None:
+        """Detect the snapshot file's encoding from its header, if it exists."""
+        try:
+            with open(self.data_file, "rb") as f:
+                return detect_encoding(f.read(HEADER_LENGTH))
+        except FileNotFoundError:
+            return None
+
+    def _stream_ndjson(self, kind: str) -> Iterator[dict[str, Any]]:
+        """Yield the records of one kind from an NDJSON snapshot."""
+        courses: list[str] = []
+        topics: list[str] = []
+        packed = False
+        with open(self.data_file, "rb") as f:
+            try:
+                for record_kind, record in iter_ndjson(f, kind):
+                    if record_kind == "header":
+                        packed = is_packed(record)
+                        courses, topics = record.get("courses", []), record.get("topics", [])
+                    elif packed:
+                        yield unpack_record(record, courses, topics)
+                    else:
+                        yield record
+            except ValueError as e:
+                raise ValueError(f"Corrupted data file: {e}") from e
+
+    def _read(self) -> DataSchema:
+        """Read the current data through the snapshot cache."""
+        # Stat before reading: a concurrent write then only causes a re-parse
+        key = self._file_key()
+        data = snapshot_cache.get(self.data_file, key)
+        if data is None:
+            with self._journal_lock:
+                data = self.journal.replay(self._read_snapshot())
+            snapshot_cache.put(self.data_file, key, data)
+        return data
+
+    def _file_key(self) -> FileKey:
+        """Get the snapshot cache key for the data file and its journal."""
+        return file_key(self.data_file, self.journal.journal_file)
+
+    def _read_snapshot(self) -> DataSchema:
+        """Read the snapshot file, recovering from backup if it is corrupted."""
         if not self.data_file.exists():
             return create_empty_schema()
 
         try:
-            with open(self.data_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                # Ensure all required keys exist
-                if "notes" not in data:
-                    data["notes"] = []
-                if "tasks" not in data:
-                    data["tasks"] = []
-                if "courses" not in data:
-                    data["courses"] = []
-                return data
-        except json.JSONDecodeError as e:
+            data = unpack(decode(self.data_file.read_bytes()))
+        except ValueError as e:
             # Try to recover from backup
             if self.bak_file.exists():
-                with open(self.bak_file, "r", encoding="utf-8") as f:
-                    return json.load(f)
+                return unpack(decode(self.bak_file.read_bytes()))
             raise ValueError(f"Corrupted data file: {e}") from e
 
+        # Ensure all required keys exist
+        if "notes" not in data:
+            data["notes"] = []
+        if "tasks" not in data:
+            data["tasks"] = []
+        if "courses" not in data:
+            data["courses"] = []
+        return data
+
     def save(self, data: DataSchema) -> None:
         """Save data to JSON file with atomic write.
 
         Process:
         1. Write to temporary file
-        2. Create backup of existing file
+        2. Keep the existing file as a backup (hard link, no copy)
         3. Rename temp file to target
 
+        In journal mode only the changes since the last load/save are
+        appended to the journal. The data's `_version` stamp is incremented.
+
         Args:
             data: Data schema to save
+
+        Raises:
+            StaleDataError: If another process saved since this store's last load
         """
+        with self.locked():
+            current = get_version(self._read())
+            if self._version is not None and self._version != current:
+                raise StaleDataError(
+                    f"{self.data_file} changed since it was loaded "
+                    f"(version {self._version}, now {current})"
+                )
+
+            if self.journal_mode and self._baseline is not None:
+                if not diff_data(self._baseline, data):
+                    return
+                set_version(data, current + 1)
+                self._append_changes(data)
+            else:
+                set_version(data, current + 1)
+                self._save_snapshot(data)
+            self._version = current + 1
+
+    def _save_snapshot(self, data: DataSchema) -> None:
+        """Write a full snapshot and drop the journal it replaces."""
+        with self._journal_lock:
+            self._write_snapshot(data)
+            self.journal.clear()
+            snapshot_cache.put(self.data_file, self._file_key(), data)
+
+        if self.journal_mode:
+            self._baseline = copy_schema(data)
+
+    def _append_changes(self, data: DataSchema) -> None:
+        """Append the difference between the baseline and data to the journal."""
+        assert self._baseline is not None
+        ops = diff_data(self._baseline, data)
+
+        with self._journal_lock:
+            self.journal.append(ops)
+            snapshot_cache.put(self.data_file, self._file_key(), data)
+        self._baseline = copy_schema(data)
+
+        if self.journal.size() >= self.compact_threshold:
+            self._schedule_compaction()
+
+    def _write_snapshot(self, data: DataSchema) -> None:
+        """Atomically replace the data file with a full snapshot."""
         # Ensure parent directory exists
         self.data_file.parent.mkdir(parents=True, exist_ok=True)
 
         # Write to temporary file first
-        with open(self.tmp_file, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, default=str)
+        self.tmp_file.write_bytes(self._fragments.encode(data, self.encoding))
 
-        # Create backup if file exists
+        # Keep the outgoing file as a backup
         if self.data_file.exists():
-            shutil.copy2(self.data_file, self.bak_file)
+            self._rotate_backups()
 
         # Atomic rename
         self.tmp_file.replace(self.data_file)
 
+    def _schedule_compaction(self) -> None:
+        """Start compaction, in a background thread if enabled."""
+        if not self.background_compaction:
+            self.compact()
+            return
+
+        if self._compaction_thread is not None and self._compaction_thread.is_alive():
+            return
+
+        # Non-daemon so the interpreter finishes the snapshot before exiting
+        self._compaction_thread = threading.Thread(target=self.compact, name="pkm-compaction")
+        self._compaction_thread.start()
+
+    def compact(self) -> None:
+        """Fold the journal into a new snapshot.
+
+        Operations appended by this process while the snapshot is being
+        written stay in the journal and are replayed on top of the new
+        snapshot. Other processes wait on the file lock until it is done.
+        """
+        with self.locked():
+            with self._journal_lock:
+                offset = self.journal.size()
+                if offset == 0:
+                    return
+                data = self.journal.replay(self._read_snapshot(), limit=offset)
+
+            self._write_snapshot(data)
+
+            with self._journal_lock:
+                self.journal.discard_through(offset)
+                snapshot_cache.invalidate(self.data_file)
+
+    def wait_for_compaction(self) -> None:
+        """Block until a running background compaction has finished."""
+        if self._compaction_thread is not None:
+            self._compaction_thread.join()
+
+    def backup_files(self) -> list[Path]:
+        """Get the paths of all backup generations, newest first.
+
+        Returns:
+            Paths for generations 0..backups-1 (not all may exist)
+        """
+        return [self.bak_file] + [
+            self.bak_file.with_name(f"{self.bak_file.name}.{i}") for i in range(1, self.backups)
+        ]
+
+    def _rotate_backups(self) -> None:
+        """Shift backup generations and link the current data file as newest."""
+        if self.backups < 1:
+            return
+        if self.backup_interval is not None and self.bak_file.exists():
+            try:
+                rotated_at = self.bak_stamp_file.stat().st_mtime
+            except FileNotFoundError:
+                rotated_at = None
+            if rotated_at is not None and time.time() - rotated_at < self.backup_interval:
+                return
+
+        generations = self.backup_files()
+        for newer, older in reversed(list(zip(generations, generations[1:]))):
+            if newer.exists():
+                newer.replace(older)
+        self.bak_file.unlink(missing_ok=True)
+
+        try:
+            os.link(self.data_file, self.bak_file)
+        except OSError:
+            # File system without hard links
+            shutil.copy2(self.data_file, self.bak_file)
+        self.bak_stamp_file.touch()
+        os.utime(self.bak_stamp_file)
+
     def backup_exists(self) -> bool:
         """Check if a backup file exists."""
         return self.bak_file.exists()
@@ -94,4 +441,8 @@ class JSONStore:
         """
         if not self.bak_file.exists():
             raise FileNotFoundError("No backup file found")
-        shutil.copy2(self.bak_file, self.data_file)
+        with self.locked():
+            # Copy rather than link so later saves cannot touch the backup
+            shutil.copy2(self.bak_file, self.tmp_file)
+            self.tmp_file.replace(self.data_file)
+            self.journal.clear()
@@ -0,0 +1,169 @@
+"""Inter-process locking and version stamps for data files."""
+
+import os
+import threading
+import time
+from pathlib import Path
+from types import TracebackType
+from typing import Any, cast
+
+from pkm.storage.schema import DataSchema
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+    import msvcrt
+
+# Top-level key holding a counter that every save increments
+VERSION_KEY = "_version"
+
+# Seconds to wait for another process before giving up
+DEFAULT_LOCK_TIMEOUT = 30.0
+
+_POLL_INTERVAL = 0.01
+
+
+class StaleDataError(RuntimeError):
+    """Raised when saving data that was loaded before another process saved."""
+
+
+def get_version(data: DataSchema) -> int:
+    """Get the version stamp of a dataset.
+
+    Args:
+        data: Dataset to inspect
+
+    Returns:
+        Version number (0 for data that was never saved with a stamp)
+    """
+    return int(cast(dict[str, Any], data).get(VERSION_KEY, 0))
+
+
+def set_version(data: DataSchema, version: int) -> None:
+    """Stamp a dataset with a version number.
+
+    Args:
+        data: Dataset to stamp (its top-level dict is modified)
+        version: Version number to store
+    """
+    cast(dict[str, Any], data)[VERSION_KEY] = version
+
+
+class _ProcessLock:
+    """Lock state for one lock file, shared by all threads of a process."""
+
+    def __init__(self) -> None:
+        self.thread_lock = threading.RLock()
+        self.depth = 0
+        self.fd: int | None = None
+
+
+_registry_lock = threading.Lock()
+_process_locks: dict[str, _ProcessLock] = {}
+
+
+def _process_lock(path: Path) -> _ProcessLock:
+    """Get the shared lock state for a lock file."""
+    with _registry_lock:
+        return _process_locks.setdefault(os.path.abspath(path), _ProcessLock())
+
+
+def _try_lock(fd: int) -> bool:
+    """Try to take an exclusive OS lock on an open file without blocking."""
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:  # pragma: no cover - Windows
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+def _unlock(fd: int) -> None:
+    """Release the OS lock on an open file."""
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:  # pragma: no cover - Windows
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+class FileLock:
+    """Advisory exclusive lock on a lock file next to the data.
+
+    Uses flock() (or msvcrt on Windows), so the lock is released by the OS
+    if the process dies. The lock is reentrant: nested `with` blocks in the
+    same process, from any FileLock instance on the same file, share one
+    OS lock, and threads of the process take turns holding it.
+
+    Example:
+        >>> with FileLock(data_dir / "data.json.lock"):
+        ...     data = store.load()
+        ...     store.save(data)
+    """
+
+    def __init__(self, lock_file: Path, timeout: float = DEFAULT_LOCK_TIMEOUT) -> None:
+        """Initialize file lock.
+
+        Args:
+            lock_file: Path to the lock file (created if missing)
+            timeout: Seconds to wait for the lock before raising TimeoutError
+        """
+        self.lock_file = lock_file
+        self.timeout = timeout
+
+    def acquire(self) -> None:
+        """Acquire the lock, waiting for other processes to release it.
+
+        Raises:
+            TimeoutError: If the lock is not acquired within the timeout
+        """
+        state = _process_lock(self.lock_file)
+        if not state.thread_lock.acquire(timeout=self.timeout):
+            raise TimeoutError(f"Timed out waiting for lock: {self.lock_file}")
+
+        if state.depth == 0:
+            try:
+                state.fd = self._lock_file()
+            except BaseException:
+                state.thread_lock.release()
+                raise
+        state.depth += 1
+
+    def _lock_file(self) -> int:
+        """Open the lock file and wait for the OS lock on it."""
+        self.lock_file.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = time.monotonic() + self.timeout
+        while not _try_lock(fd):
+            if time.monotonic() >= deadline:
+                os.close(fd)
+                raise TimeoutError(f"Timed out waiting for lock: {self.lock_file}")
+            time.sleep(_POLL_INTERVAL)
+        return fd
+
+    def release(self) -> None:
+        """Release one level of the lock."""
+        state = _process_lock(self.lock_file)
+        state.depth -= 1
+        if state.depth == 0 and state.fd is not None:
+            _unlock(state.fd)
+            os.close(state.fd)
+            state.fd = None
+        state.thread_lock.release()
+
+    def __enter__(self) -> "FileLock":
+        """Acquire the lock."""
+        self.acquire()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        """Release the lock."""
+        self.release()
@@ -1,6 +1,22 @@
 """Data migration utilities for schema versioning."""
 
-from typing import Any
+import re
+from pathlib import Path
+from typing import Any, cast
+
+from pkm.storage.schema import DataSchema
+
+# Top-level key holding the next short ID number per record kind
+NEXT_IDS_KEY = "_next_ids"
+
+# Record list -> prefix of its short IDs ("n5", "t12")
+ID_PREFIXES = {"notes": "n", "tasks": "t"}
+
+# Top-level key holding topic -> IDs of the notes tagged with it
+TOPIC_INDEX_KEY = "_topic_index"
+
+# Top-level key holding course -> counts of its notes and tasks
+COURSE_STATS_KEY = "_course_stats"
 
 
 def get_schema_version(data: dict[str, Any]) -> int:
@@ -51,3 +67,285 @@ def add_schema_version(data: dict[str, Any], version: int = 1) -> dict[str, Any]
     """
     data["_schema_version"] = version
     return data
+
+
+def add_next_ids(data: dict[str, Any]) -> dict[str, Any]:
+    """Add the next-ID counters to data written before they existed.
+
+    Scans every record ID once; after that, claim_id() keeps the
+    counters up to date without scanning.
+
+    Args:
+        data: JSON data dictionary
+
+    Returns:
+        Data with the counters added
+    """
+    next_ids = dict(data.get(NEXT_IDS_KEY, {}))
+    for kind, prefix in ID_PREFIXES.items():
+        if kind in next_ids:
+            continue
+        pattern = re.compile(rf"{prefix}(\d+)")
+        numbers = (pattern.match(record.get("id", "")) for record in data.get(kind, []))
+        next_ids[kind] = max((int(match.group(1)) for match in numbers if match), default=0) + 1
+    data[NEXT_IDS_KEY] = next_ids
+    return data
+
+
+def get_next_id(data: DataSchema, kind: str) -> int:
+    """Get the next ID number recorded in the data for a record kind.
+
+    Args:
+        data: JSON data dictionary
+        kind: Record kind ("notes" or "tasks")
+
+    Returns:
+        Number above every ID of that kind in the data
+    """
+    raw = cast(dict[str, Any], data)
+    if kind not in raw.get(NEXT_IDS_KEY, {}):
+        add_next_ids(raw)
+    return int(raw[NEXT_IDS_KEY][kind])
+
+
+def claim_id(data: DataSchema, kind: str, number: int) -> str:
+    """Record an allocated ID number in the data and format the ID.
+
+    The counter is part of the data, so it is written by the same atomic
+    save as the new record and the data stays self-describing when it is
+    copied without the counter file.
+
+    Args:
+        data: JSON data dictionary, loaded under the store lock
+        kind: Record kind ("notes" or "tasks")
+        number: ID number from IdAllocator.allocate()
+
+    Returns:
+        New ID (e.g., "n6")
+    """
+    raw = cast(dict[str, Any], data)
+    next_id = max(get_next_id(data, kind), number + 1)
+    # Replace the counters rather than modifying them: loaded data is shared
+    raw[NEXT_IDS_KEY] = {**raw[NEXT_IDS_KEY], kind: next_id}
+    return f"{ID_PREFIXES[kind]}{number}"
+
+
+def add_topic_index(data: dict[str, Any]) -> dict[str, Any]:
+    """Add the topic index to data written before it existed.
+
+    Scans every note once; after that, update_topic_index() keeps the
+    index up to date without scanning.
+
+    Args:
+        data: JSON data dictionary
+
+    Returns:
+        Data with the topic index added
+    """
+    index: dict[str, list[str]] = {}
+    for note in data.get("notes", []):
+        for topic in note.get("topics", []):
+            index.setdefault(topic, []).append(note["id"])
+    data[TOPIC_INDEX_KEY] = index
+    return data
+
+
+def get_topic_index(data: DataSchema) -> dict[str, list[str]]:
+    """Get the topic index recorded in the data.
+
+    The index and its lists are shared with the loaded data; do not modify them.
+
+    Args:
+        data: JSON data dictionary
+
+    Returns:
+        Dictionary mapping each topic to the IDs of its notes
+    """
+    raw = cast(dict[str, Any], data)
+    if TOPIC_INDEX_KEY not in raw:
+        add_topic_index(raw)
+    return cast(dict[str, list[str]], raw[TOPIC_INDEX_KEY])
+
+
+def update_topic_index(
+    data: DataSchema, note_id: str, old_topics: list[str], new_topics: list[str]
+) -> None:
+    """Record a change to a note's topics in the topic index.
+
+    Pass no old topics for a new note and no new topics for a deleted one.
+    Topics left without notes are dropped from the index.
+
+    Args:
+        data: JSON data dictionary, loaded under the store lock
+        note_id: ID of the changed note
+        old_topics: Topics the note had before the change
+        new_topics: Topics the note has after the change
+    """
+    removed = [topic for topic in old_topics if topic not in new_topics]
+    added = [topic for topic in new_topics if topic not in old_topics]
+    if not removed and not added:
+        return
+
+    # Replace the index and the changed lists: loaded data is shared
+    index = dict(get_topic_index(data))
+    for topic in removed:
+        note_ids = [i for i in index.get(topic, []) if i != note_id]
+        if note_ids:
+            index[topic] = note_ids
+        else:
+            index.pop(topic, None)
+    for topic in added:
+        note_ids = index.get(topic, [])
+        if note_id not in note_ids:
+            index[topic] = [*note_ids, note_id]
+    cast(dict[str, Any], data)[TOPIC_INDEX_KEY] = index
+
+
+def _course_fields(kind: str, record: dict[str, Any]) -> tuple[Any, ...]:
+    """Get the fields of a record the course counts depend on."""
+    if kind == "notes":
+        return (record.get("course"),)
+    return (record.get("course"), record.get("completed"))
+
+
+def _count_record(
+    stats: dict[str, dict[str, int]], kind: str, record: dict[str, Any], sign: int
+) -> None:
+    """Add (sign 1) or remove (sign -1) a record's share of its course's counts."""
+    course = record.get("course")
+    if not course:
+        return
+    counts = stats.get(course, {})
+    entry = {name: counts.get(name, 0) for name in ("notes", "tasks", "open")}
+    entry[kind] += sign
+    if kind == "tasks" and not record.get("completed"):
+        entry["open"] += sign
+    if entry["notes"] or entry["tasks"]:
+        stats[course] = entry
+    else:
+        stats.pop(course, None)
+
+
+def add_course_stats(data: dict[str, Any]) -> dict[str, Any]:
+    """Count every course's notes and tasks from scratch.
+
+    Used for data written before the counts existed and after changes that
+    rewrite many records at once; single-record changes go through
+    update_course_stats().
+
+    Args:
+        data: JSON data dictionary
+
+    Returns:
+        Data with the course counts added
+    """
+    stats: dict[str, dict[str, int]] = {}
+    for kind in ("notes", "tasks"):
+        for record in data.get(kind, []):
+            _count_record(stats, kind, record, 1)
+    data[COURSE_STATS_KEY] = stats
+    return data
+
+
+def get_course_stats(data: DataSchema) -> dict[str, dict[str, int]]:
+    """Get the course counts recorded in the data.
+
+    Each course with notes or tasks maps to {"notes": n, "tasks": n,
+    "open": n}. Courses are separate entries, so a change to one course
+    is saved (and journaled) as a change to that entry alone. The counts
+    are shared with the loaded data; do not modify them.
+
+    Args:
+        data: JSON data dictionary
+
+    Returns:
+        Dictionary mapping course names to their counts
+    """
+    raw = cast(dict[str, Any], data)
+    if COURSE_STATS_KEY not in raw:
+        add_course_stats(raw)
+    return cast(dict[str, dict[str, int]], raw[COURSE_STATS_KEY])
+
+
+def update_course_stats(
+    data: DataSchema,
+    kind: str,
+    old: dict[str, Any] | None,
+    new: dict[str, Any] | None,
+) -> None:
+    """Record a change to one note or task in the course counts.
+
+    Call it before the change is applied to data["notes"] or data["tasks"].
+
+    Args:
+        data: JSON data dictionary, loaded under the store lock
+        kind: Record kind ("notes" or "tasks")
+        old: Record before the change (None for a new record)
+        new: Record after the change (None for a deleted record)
+    """
+    if old is not None and new is not None:
+        if _course_fields(kind, old) == _course_fields(kind, new):
+            return
+
+    # Replace the counts rather than modifying them: loaded data is shared
+    stats = dict(get_course_stats(data))
+    if old is not None:
+        _count_record(stats, kind, old, -1)
+    if new is not None:
+        _count_record(stats, kind, new, 1)
+    cast(dict[str, Any], data)[COURSE_STATS_KEY] = stats
+
+
+def migrate_json_to_sqlite(json_file: Path, db_file: Path) -> int:
+    """Copy an existing data.json into a new SQLite database.
+
+    The JSON file is left in place so the migration can be rolled back by
+    switching the backend again.
+
+    Args:
+        json_file: Path to the data.json file
+        db_file: Path to the SQLite database to create
+
+    Returns:
+        Number of notes and tasks migrated
+
+    Raises:
+        FileExistsError: If the database already exists
+    """
+    from pkm.storage.json_store import JSONStore
+    from pkm.storage.sqlite_store import SQLiteStore
+
+    if db_file.exists():
+        raise FileExistsError(f"Database already exists: {db_file}")
+
+    data = JSONStore(json_file).load()
+    SQLiteStore(db_file).save(data)
+    return len(data["notes"]) + len(data["tasks"])
+
+
+def migrate_json_to_directory(json_file: Path, data_dir: Path) -> int:
+    """Split an existing data.json into per-record files.
+
+    The JSON file is left in place so the migration can be rolled back by
+    switching the backend again.
+
+    Args:
+        json_file: Path to the data.json file
+        data_dir: Directory to create the manifest and record files in
+
+    Returns:
+        Number of notes and tasks migrated
+
+    Raises:
+        FileExistsError: If the directory already has a manifest
+    """
+    from pkm.storage.directory_store import DirectoryStore
+    from pkm.storage.json_store import JSONStore
+
+    store = DirectoryStore(data_dir)
+    if store.exists():
+        raise FileExistsError(f"Manifest already exists: {store.manifest_file}")
+
+    data = JSONStore(json_file).load()
+    store.save(data)
+    return len(data["notes"]) + len(data["tasks"])
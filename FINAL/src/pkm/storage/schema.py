@@ -1,10 +1,17 @@
 """JSON storage schema definition."""
 
-from typing import TypedDict
+from datetime import datetime
+from typing import Any, TypedDict, TypeVar
+
+from pydantic import BaseModel, Field, TypeAdapter
 
 from pkm.models.course import Course
 from pkm.models.note import Note
-from pkm.models.task import Task
+from pkm.models.records import NoteRecord, SubtaskRecord, TaskRecord
+from pkm.models.task import Subtask, Task
+
+# Characters of note content kept in note summaries (longer than any list view shows)
+PREVIEW_LENGTH = 80
 
 
 class DataSchema(TypedDict):
@@ -23,6 +30,24 @@ class DataSchema(TypedDict):
     courses: list[dict]
 
 
+class Dataset(BaseModel):
+    """The whole dataset as models, for bulk reads.
+
+    Top-level keys other than notes, tasks and courses (e.g. _version) are
+    kept as extra attributes.
+    """
+
+    notes: list[Note] = Field(default_factory=list)
+    tasks: list[Task] = Field(default_factory=list)
+    courses: list[dict[str, Any]] = Field(default_factory=list)
+
+    model_config = {"extra": "allow"}
+
+
+# Parses and validates a whole JSON data file in one native pass
+DATASET_ADAPTER = TypeAdapter(Dataset)
+
+
 def create_empty_schema() -> DataSchema:
     """Create an empty data schema."""
     return {"notes": [], "tasks": [], "courses": []}
@@ -43,16 +68,163 @@ def serialize_course(course: Course) -> dict:
     return course.model_dump(mode="json")
 
 
-def deserialize_note(data: dict) -> Note:
-    """Deserialize a dict to Note model."""
-    return Note.model_validate(data)
+_parse_datetime = datetime.fromisoformat
+
+M = TypeVar("M", bound=BaseModel)
+
 
+def _construct(model: type[M], values: dict[str, Any]) -> M:
+    """Build a model from already-valid values without running validation.
+
+    Equivalent to model.model_construct(**values) when values holds every
+    field, minus its per-field default handling, which dominates its cost.
+    """
+    instance = model.__new__(model)
+    object.__setattr__(instance, "__dict__", values)
+    object.__setattr__(instance, "__pydantic_fields_set__", set(values))
+    object.__setattr__(instance, "__pydantic_extra__", None)
+    object.__setattr__(instance, "__pydantic_private__", None)
+    return instance
 
-def deserialize_task(data: dict) -> Task:
-    """Deserialize a dict to Task model."""
-    return Task.model_validate(data)
+
+def deserialize_note(data: dict, trusted: bool = False) -> Note:
+    """Deserialize a dict to Note model.
+
+    Args:
+        data: Note dict
+        trusted: Skip validation because the dict was written by this
+            package (read paths only; anything saved must stay validated)
+
+    Returns:
+        Note model
+    """
+    if not trusted:
+        return Note.model_validate(data)
+    return _construct(Note, {
+        "id": data["id"],
+        "content": data["content"],
+        "created_at": _parse_datetime(data["created_at"]),
+        "modified_at": _parse_datetime(data["modified_at"]),
+        "course": data.get("course"),
+        # Copied so the model never shares lists with the stored record
+        "topics": list(data.get("topics", ())),
+        "linked_from_tasks": list(data.get("linked_from_tasks", ())),
+    })
+
+
+def summarize_note(data: dict[str, Any]) -> dict[str, Any]:
+    """Build a note summary dict (metadata plus preview) from a note dict."""
+    summary = {key: value for key, value in data.items() if key != "content"}
+    summary["preview"] = data.get("content", "")[:PREVIEW_LENGTH]
+    return summary
+
+
+def deserialize_note_record(data: dict[str, Any]) -> NoteRecord:
+    """Build a read-only NoteRecord from a note summary dict (unvalidated).
+
+    Args:
+        data: Note summary dict, as from a store's load_note_summaries()
+
+    Returns:
+        NoteRecord
+    """
+    return NoteRecord(
+        data["id"],
+        data["preview"],
+        _parse_datetime(data["created_at"]),
+        _parse_datetime(data["modified_at"]),
+        data.get("course"),
+        tuple(data.get("topics", ())),
+        tuple(data.get("linked_from_tasks", ())),
+    )
+
+
+def deserialize_task_record(data: dict[str, Any]) -> TaskRecord:
+    """Build a read-only TaskRecord from a task dict (unvalidated).
+
+    Args:
+        data: Task dict
+
+    Returns:
+        TaskRecord
+    """
+    due_date = data.get("due_date")
+    completed_at = data.get("completed_at")
+    subtasks = data.get("subtasks")
+    return TaskRecord(
+        data["id"],
+        data["title"],
+        _parse_datetime(data["created_at"]),
+        _parse_datetime(due_date) if due_date else None,
+        data.get("priority", "medium"),
+        data.get("completed", False),
+        _parse_datetime(completed_at) if completed_at else None,
+        data.get("course"),
+        tuple(data.get("linked_notes", ())),
+        tuple(
+            SubtaskRecord(st["id"], st["title"], st.get("completed", False)) for st in subtasks
+        ) if subtasks else (),
+    )
+
+
+def _construct_subtask(data: dict) -> Subtask:
+    """Build a trusted Subtask."""
+    return _construct(Subtask, {
+        "id": data["id"],
+        "title": data["title"],
+        "completed": data.get("completed", False),
+    })
+
+
+def deserialize_task(data: dict, trusted: bool = False) -> Task:
+    """Deserialize a dict to Task model.
+
+    Args:
+        data: Task dict
+        trusted: Skip validation because the dict was written by this
+            package (read paths only; anything saved must stay validated)
+
+    Returns:
+        Task model
+    """
+    if not trusted:
+        return Task.model_validate(data)
+    due_date = data.get("due_date")
+    completed_at = data.get("completed_at")
+    subtasks = data.get("subtasks")
+    return _construct(Task, {
+        "id": data["id"],
+        "title": data["title"],
+        "created_at": _parse_datetime(data["created_at"]),
+        "due_date": _parse_datetime(due_date) if due_date else None,
+        "priority": data.get("priority", "medium"),
+        "completed": data.get("completed", False),
+        "completed_at": _parse_datetime(completed_at) if completed_at else None,
+        "course": data.get("course"),
+        "linked_notes": list(data.get("linked_notes", ())),
+        "subtasks": [_construct_subtask(st) for st in subtasks] if subtasks else [],
+    })
 
 
 def deserialize_course(data: dict) -> Course:
     """Deserialize a dict to Course model."""
     return Course.model_validate(data)
+
+
+def deserialize_dataset(data: DataSchema) -> Dataset:
+    """Build a Dataset from already-loaded record dicts.
+
+    The records come from our own store, so they are not re-validated
+    (see deserialize_note).
+
+    Args:
+        data: Data schema as returned by a store's load()
+
+    Returns:
+        Dataset with note and task models
+    """
+    return Dataset.model_construct(
+        notes=[deserialize_note(note, trusted=True) for note in data["notes"]],
+        tasks=[deserialize_task(task, trusted=True) for task in data["tasks"]],
+        courses=data["courses"],
+    )
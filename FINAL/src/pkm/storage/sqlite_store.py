@@ -0,0 +1,393 @@
+"""SQLite storage backend with the same load/save contract as JSONStore."""
+
+import json
+import sqlite3
+from collections.abc import Iterator
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import Any, cast
+
+from pkm.storage.changes import RECORD_KINDS, clone_data, diff_data, diff_records
+from pkm.storage.locking import (
+    VERSION_KEY,
+    FileLock,
+    StaleDataError,
+    set_version,
+)
+from pkm.storage.schema import (
+    PREVIEW_LENGTH,
+    DataSchema,
+    Dataset,
+    create_empty_schema,
+    deserialize_dataset,
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS notes (
+    id TEXT PRIMARY KEY,
+    content TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    modified_at TEXT NOT NULL,
+    course TEXT
+);
+CREATE TABLE IF NOT EXISTS topics (
+    note_id TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (note_id, topic)
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    due_date TEXT,
+    priority TEXT NOT NULL,
+    completed INTEGER NOT NULL DEFAULT 0,
+    completed_at TEXT,
+    course TEXT
+);
+CREATE TABLE IF NOT EXISTS subtasks (
+    task_id TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    completed INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (task_id, id)
+);
+CREATE TABLE IF NOT EXISTS links (
+    task_id TEXT NOT NULL,
+    note_id TEXT NOT NULL,
+    task_position INTEGER,
+    note_position INTEGER,
+    PRIMARY KEY (task_id, note_id)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_notes_course ON notes (course);
+CREATE INDEX IF NOT EXISTS idx_tasks_course ON tasks (course);
+CREATE INDEX IF NOT EXISTS idx_tasks_due_date ON tasks (due_date);
+CREATE INDEX IF NOT EXISTS idx_tasks_completed ON tasks (completed);
+CREATE INDEX IF NOT EXISTS idx_links_note ON links (note_id);
+"""
+
+NOTE_COLUMNS = ("id", "content", "created_at", "modified_at", "course")
+TASK_COLUMNS = (
+    "id", "title", "created_at", "due_date", "priority", "completed", "completed_at", "course"
+)
+
+
+class SQLiteStore:
+    """Stores notes and tasks in normalized SQLite tables.
+
+    Services still exchange whole datasets through load()/save(), but save()
+    only writes rows for records that changed since the last load. Updating
+    one field of one task (e.g. completing it) becomes a single-row UPDATE.
+
+    Topics, subtasks and note<->task links live in their own tables. Links
+    are one row per task/note pair, so a task's linked_notes and a note's
+    linked_from_tasks are always two views of the same relation. Top-level
+    keys other than notes/tasks (e.g. courses) are kept as JSON in `meta`.
+
+    As with JSONStore, saves stamp an increasing `_version` (kept in
+    `meta`) and fail with StaleDataError if another process saved since
+    the last load; locked() guards a whole load-modify-save cycle.
+    """
+
+    def __init__(self, db_file: Path) -> None:
+        """Initialize SQLite store.
+
+        Args:
+            db_file: Path to the SQLite database file
+        """
+        self.db_file = db_file
+        self._baseline: DataSchema | None = None
+
+    def locked(self) -> FileLock:
+        """Get the lock guarding this database against other processes.
+
+        Returns:
+            Reentrant file lock; use it as a context manager
+        """
+        return FileLock(self.db_file.with_suffix(".db.lock"))
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection with the schema in place, closing it afterwards."""
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        with closing(sqlite3.connect(self.db_file)) as conn:
+            conn.row_factory = sqlite3.Row
+            conn.executescript(SCHEMA)
+            yield conn
+
+    def exists(self) -> bool:
+        """Check if the database file exists."""
+        return self.db_file.exists()
+
+    def snapshot_key(self) -> int:
+        """Identify the stored data with one query.
+
+        Every save increments the version stamp in `meta`.
+
+        Returns:
+            Stored version stamp
+        """
+        with self._connect() as conn:
+            return self._stored_version(conn)
+
+    def load(self) -> DataSchema:
+        """Load all records from the database.
+
+        Returns:
+            Data schema with notes, tasks, and courses
+        """
+        data = create_empty_schema()
+        raw = cast(dict[str, Any], data)
+
+        with self._connect() as conn:
+            data["notes"].extend(self._iter_notes(conn))
+            data["tasks"].extend(self._iter_tasks(conn))
+
+            for row in conn.execute("SELECT key, value FROM meta"):
+                raw[row["key"]] = json.loads(row["value"])
+
+        self._baseline = clone_data(data)
+        return data
+
+    def iter_records(self, kind: str) -> Iterator[dict[str, Any]]:
+        """Iterate over the notes or tasks, fetching rows as they are consumed.
+
+        Args:
+            kind: Record kind ("notes" or "tasks")
+
+        Yields:
+            Record dicts in storage order
+        """
+        with self._connect() as conn:
+            yield from self._iter_notes(conn) if kind == "notes" else self._iter_tasks(conn)
+
+    def _iter_notes(self, conn: sqlite3.Connection) -> Iterator[dict[str, Any]]:
+        """Build note records row by row."""
+        topics, note_links = self._note_children(conn)
+        for row in conn.execute("SELECT * FROM notes ORDER BY rowid"):
+            note = {column: row[column] for column in NOTE_COLUMNS}
+            note["topics"] = topics.get(row["id"], [])
+            note["linked_from_tasks"] = note_links.get(row["id"], [])
+            yield note
+
+    def _iter_tasks(self, conn: sqlite3.Connection) -> Iterator[dict[str, Any]]:
+        """Build task records row by row."""
+        task_links = self._group(
+            conn,
+            "SELECT task_id, note_id FROM links ORDER BY task_position IS NULL, "
+            "task_position, rowid",
+        )
+        subtasks: dict[str, list[dict[str, Any]]] = {}
+        for row in conn.execute("SELECT * FROM subtasks ORDER BY task_id, id"):
+            subtasks.setdefault(row["task_id"], []).append(
+                {"id": row["id"], "title": row["title"], "completed": bool(row["completed"])}
+            )
+        for row in conn.execute("SELECT * FROM tasks ORDER BY rowid"):
+            task = {column: row[column] for column in TASK_COLUMNS}
+            task["completed"] = bool(task["completed"])
+            task["linked_notes"] = task_links.get(row["id"], [])
+            task["subtasks"] = subtasks.get(row["id"], [])
+            yield task
+
+    def load_typed(self) -> Dataset:
+        """Load the whole dataset as note and task models.
+
+        Returns:
+            Dataset with notes, tasks and courses
+        """
+        return deserialize_dataset(self.load())
+
+    def load_note_summaries(self) -> list[dict[str, Any]]:
+        """Load note metadata with a content preview, without note bodies.
+
+        Returns:
+            One summary dict per note, in storage order
+        """
+        summaries = []
+        with self._connect() as conn:
+            topics, note_links = self._note_children(conn)
+            for row in conn.execute(
+                "SELECT id, substr(content, 1, ?) AS preview, created_at, modified_at, course "
+                "FROM notes ORDER BY rowid",
+                (PREVIEW_LENGTH,),
+            ):
+                summary = dict(row)
+                summary["topics"] = topics.get(row["id"], [])
+                summary["linked_from_tasks"] = note_links.get(row["id"], [])
+                summaries.append(summary)
+        return summaries
+
+    def _note_children(
+        self, conn: sqlite3.Connection
+    ) -> tuple[dict[str, list[Any]], dict[str, list[Any]]]:
+        """Get topics and linking task IDs per note, in order."""
+        topics = self._group(conn, "SELECT note_id, topic FROM topics ORDER BY position")
+        note_links = self._group(
+            conn,
+            "SELECT note_id, task_id FROM links ORDER BY note_position IS NULL, "
+            "note_position, rowid",
+        )
+        return topics, note_links
+
+    @staticmethod
+    def _group(conn: sqlite3.Connection, query: str) -> dict[str, list[Any]]:
+        """Group the second column of a two-column query by the first."""
+        grouped: dict[str, list[Any]] = {}
+        for key, value in conn.execute(query):
+            grouped.setdefault(key, []).append(value)
+        return grouped
+
+    def save(self, data: DataSchema) -> None:
+        """Save data, writing only rows that changed since the last load.
+
+        Args:
+            data: Data schema to save
+
+        Raises:
+            StaleDataError: If another process saved since this store's last load
+        """
+        with self.locked():
+            self._save(data)
+
+    def _save(self, data: DataSchema) -> None:
+        """Write the changes since the baseline in one transaction."""
+        if self._baseline is None:
+            # Diff against what is actually in the database
+            self.load()
+        baseline = cast(dict[str, Any], self._baseline)
+
+        with self._connect() as conn, conn:
+            current = self._check_version(conn, baseline.get(VERSION_KEY, 0))
+            if not diff_data(cast(DataSchema, baseline), data):
+                return
+            set_version(data, current + 1)
+            new = cast(dict[str, Any], clone_data(data))
+
+            for kind in RECORD_KINDS:
+                old_records = {record["id"]: record for record in baseline.get(kind, [])}
+                upserts, deleted = diff_records(baseline.get(kind, []), new.get(kind, []))
+                for record_id in deleted:
+                    self._delete_record(conn, kind, record_id)
+                for record in upserts:
+                    self._write_record(conn, kind, record, old_records.get(record["id"]))
+
+            for key, value in new.items():
+                if key not in RECORD_KINDS and baseline.get(key) != value:
+                    conn.execute(
+                        "INSERT INTO meta (key, value) VALUES (?, ?) "
+                        "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                        (key, json.dumps(value, default=str)),
+                    )
+            for key in baseline:
+                if key not in RECORD_KINDS and key not in new:
+                    conn.execute("DELETE FROM meta WHERE key = ?", (key,))
+
+        self._baseline = cast(DataSchema, new)
+
+    @staticmethod
+    def _stored_version(conn: sqlite3.Connection) -> int:
+        """Get the version stamp stored in `meta` (0 if never saved)."""
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (VERSION_KEY,)).fetchone()
+        return int(json.loads(row["value"])) if row else 0
+
+    def _check_version(self, conn: sqlite3.Connection, loaded: int) -> int:
+        """Get the stored version, raising StaleDataError if it moved on."""
+        current = self._stored_version(conn)
+        if current != loaded:
+            raise StaleDataError(
+                f"{self.db_file} changed since it was loaded (version {loaded}, now {current})"
+            )
+        return current
+
+    def _write_record(
+        self,
+        conn: sqlite3.Connection,
+        kind: str,
+        record: dict[str, Any],
+        old: dict[str, Any] | None,
+    ) -> None:
+        """Insert or update one record and whichever child rows changed."""
+        old = old or {}
+        if kind == "notes":
+            self._upsert(conn, "notes", NOTE_COLUMNS, record, old)
+            if record.get("topics", []) != old.get("topics"):
+                conn.execute("DELETE FROM topics WHERE note_id = ?", (record["id"],))
+                conn.executemany(
+                    "INSERT OR IGNORE INTO topics (note_id, topic, position) VALUES (?, ?, ?)",
+                    [(record["id"], t, i) for i, t in enumerate(record.get("topics", []))],
+                )
+            if record.get("linked_from_tasks", []) != old.get("linked_from_tasks"):
+                self._write_links(conn, "note_id", record["id"], record["linked_from_tasks"])
+        else:
+            self._upsert(conn, "tasks", TASK_COLUMNS, record, old)
+            if record.get("subtasks", []) != old.get("subtasks"):
+                conn.execute("DELETE FROM subtasks WHERE task_id = ?", (record["id"],))
+                conn.executemany(
+                    "INSERT OR REPLACE INTO subtasks (task_id, id, title, completed) "
+                    "VALUES (?, ?, ?, ?)",
+                    [
+                        (record["id"], st["id"], st["title"], int(st.get("completed", False)))
+                        for st in record.get("subtasks", [])
+                    ],
+                )
+            if record.get("linked_notes", []) != old.get("linked_notes"):
+                self._write_links(conn, "task_id", record["id"], record["linked_notes"])
+
+    @staticmethod
+    def _upsert(
+        conn: sqlite3.Connection,
+        table: str,
+        columns: tuple[str, ...],
+        record: dict[str, Any],
+        old: dict[str, Any],
+    ) -> None:
+        """Insert a row, or UPDATE only the columns that changed."""
+        if not old:
+            placeholders = ", ".join("?" for _ in columns)
+            conn.execute(
+                f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+                [record.get(column) for column in columns],
+            )
+            return
+
+        changed = [c for c in columns if c != "id" and record.get(c) != old.get(c)]
+        if changed:
+            assignments = ", ".join(f"{column} = ?" for column in changed)
+            conn.execute(
+                f"UPDATE {table} SET {assignments} WHERE id = ?",
+                [record.get(column) for column in changed] + [record["id"]],
+            )
+
+    @staticmethod
+    def _write_links(
+        conn: sqlite3.Connection, side: str, record_id: str, linked_ids: list[str]
+    ) -> None:
+        """Make the link rows for one task or note match its list of links."""
+        other = "note_id" if side == "task_id" else "task_id"
+        position = side.replace("_id", "_position")
+        placeholders = ", ".join("?" for _ in linked_ids)
+        conn.execute(
+            f"DELETE FROM links WHERE {side} = ? AND {other} NOT IN ({placeholders})",
+            [record_id, *linked_ids],
+        )
+        conn.executemany(
+            f"INSERT INTO links ({side}, {other}, {position}) VALUES (?, ?, ?) "
+            f"ON CONFLICT(task_id, note_id) DO UPDATE SET {position} = excluded.{position}",
+            [(record_id, linked_id, i) for i, linked_id in enumerate(linked_ids)],
+        )
+
+    @staticmethod
+    def _delete_record(conn: sqlite3.Connection, kind: str, record_id: str) -> None:
+        """Delete one record and its child rows."""
+        if kind == "notes":
+            conn.execute("DELETE FROM notes WHERE id = ?", (record_id,))
+            conn.execute("DELETE FROM topics WHERE note_id = ?", (record_id,))
+        else:
+            conn.execute("DELETE FROM tasks WHERE id = ?", (record_id,))
+            conn.execute("DELETE FROM subtasks WHERE task_id = ?", (record_id,))
+            conn.execute("DELETE FROM links WHERE task_id = ?", (record_id,))
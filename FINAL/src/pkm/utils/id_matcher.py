@@ -1,5 +1,8 @@
 """Utility for flexible ID matching to make IDs easier to work with."""
 
+from bisect import bisect_left, insort
+from collections.abc import Iterable
+
 
 def find_matching_id(partial_id: str, available_ids: list[str]) -> str | None:
     """Find a matching ID from a partial ID input.
@@ -83,3 +86,172 @@ def get_match_suggestions(partial_id: str, available_ids: list[str], max_suggest
     ]
 
     return matches[:max_suggestions]
+
+
+# Sorts after every character, closing a prefix range in a sorted list
+_MAX_CHAR = "\U0010ffff"
+
+
+class IdMatcher:
+    """Resolves partial IDs against a set of IDs kept in sorted structures.
+
+    Gives the same answers as find_matching_id() and get_match_suggestions(),
+    but the IDs are lowercased once, exact and prefix lookups bisect a sorted
+    list, and suffix lookups bisect a sorted list of reversed IDs. Only the
+    rarely reached "contains" fallback still scans the IDs.
+
+    Keep one matcher for a set of IDs and update it with add() and remove()
+    as records are created and deleted, instead of rebuilding the ID list on
+    every lookup.
+
+    Example:
+        >>> matcher = IdMatcher(["n1", "n2", "n_20251123_154149_4xl"])
+        >>> matcher.resolve("4xl")
+        'n_20251123_154149_4xl'
+        >>> matcher.resolve_many(["N1", "n"])
+        {'N1': 'n1', 'n': None}
+    """
+
+    def __init__(self, ids: Iterable[str] = ()) -> None:
+        """Build the sorted structures.
+
+        Args:
+            ids: IDs in storage order (ties are resolved in this order)
+        """
+        self._ids: list[str] = []
+        self._lower: list[str] = []
+        # (key, insertion number, id), sorted; the number keeps storage order on ties
+        self._prefixes: list[tuple[str, int, str]] = []
+        self._suffixes: list[tuple[str, int, str]] = []
+        self._counter = 0
+        for id_str in ids:
+            self._append(id_str)
+        self._prefixes.sort()
+        self._suffixes.sort()
+
+    def __len__(self) -> int:
+        """Number of IDs in the matcher."""
+        return len(self._ids)
+
+    def is_built_from(self, ids: Iterable[str]) -> bool:
+        """Check if the matcher holds exactly these IDs in this order.
+
+        Args:
+            ids: IDs in storage order
+
+        Returns:
+            True if the matcher can be reused for these IDs
+        """
+        return list(ids) == self._ids
+
+    def _append(self, id_str: str) -> None:
+        """Record an ID at the end of the storage order (structures left unsorted)."""
+        lower = id_str.lower()
+        self._ids.append(id_str)
+        self._lower.append(lower)
+        self._prefixes.append((lower, self._counter, id_str))
+        self._suffixes.append((lower[::-1], self._counter, id_str))
+        self._counter += 1
+
+    def add(self, id_str: str) -> None:
+        """Add a newly created ID.
+
+        Args:
+            id_str: ID to add (it is last in storage order)
+        """
+        lower = id_str.lower()
+        self._ids.append(id_str)
+        self._lower.append(lower)
+        insort(self._prefixes, (lower, self._counter, id_str))
+        insort(self._suffixes, (lower[::-1], self._counter, id_str))
+        self._counter += 1
+
+    def remove(self, id_str: str) -> None:
+        """Remove a deleted ID; unknown IDs are ignored.
+
+        Args:
+            id_str: ID to remove
+        """
+        if id_str not in self._ids:
+            return
+        position = self._ids.index(id_str)
+        del self._ids[position]
+        del self._lower[position]
+        lower = id_str.lower()
+        for entries, key in ((self._prefixes, lower), (self._suffixes, lower[::-1])):
+            start = bisect_left(entries, (key,))
+            while entries[start][2] != id_str:
+                start += 1
+            del entries[start]
+
+    @staticmethod
+    def _range(entries: list[tuple[str, int, str]], key: str) -> list[tuple[str, int, str]]:
+        """Get the entries whose key starts with a string."""
+        return entries[bisect_left(entries, (key,)):bisect_left(entries, (key + _MAX_CHAR,))]
+
+    def resolve(self, partial_id: str) -> str | None:
+        """Find the ID a partial ID stands for.
+
+        Args:
+            partial_id: The partial or full ID to match
+
+        Returns:
+            The matched ID if found and unique, None otherwise
+        """
+        if not partial_id or not self._ids:
+            return None
+
+        partial_lower = partial_id.lower()
+
+        # Exact match (case-insensitive); the first such ID in storage order
+        prefix_matches = self._range(self._prefixes, partial_lower)
+        if prefix_matches and prefix_matches[0][0] == partial_lower:
+            return prefix_matches[0][2]
+
+        if len(prefix_matches) == 1:
+            return prefix_matches[0][2]
+        if len(prefix_matches) > 1:
+            return None
+
+        suffix_matches = self._range(self._suffixes, partial_lower[::-1])
+        if len(suffix_matches) == 1:
+            return suffix_matches[0][2]
+
+        contains_matches = self._contains(partial_lower, limit=2)
+        return contains_matches[0] if len(contains_matches) == 1 else None
+
+    def resolve_many(self, partial_ids: Iterable[str]) -> dict[str, str | None]:
+        """Resolve several partial IDs at once.
+
+        Args:
+            partial_ids: Partial or full IDs to match
+
+        Returns:
+            Dictionary mapping each partial ID to its match (None if there is
+            no unique match)
+        """
+        return {partial_id: self.resolve(partial_id) for partial_id in partial_ids}
+
+    def suggestions(self, partial_id: str, max_suggestions: int = 5) -> list[str]:
+        """Get the IDs that contain a partial ID, as get_match_suggestions() does.
+
+        Args:
+            partial_id: The partial ID that was ambiguous
+            max_suggestions: Maximum number of suggestions to return
+
+        Returns:
+            List of matching IDs in storage order (up to max_suggestions)
+        """
+        if not partial_id:
+            return []
+        return self._contains(partial_id.lower(), limit=max_suggestions)
+
+    def _contains(self, partial_lower: str, limit: int) -> list[str]:
+        """Get up to `limit` IDs containing a lowercase string, in storage order."""
+        matches: list[str] = []
+        for id_str, lower in zip(self._ids, self._lower):
+            if partial_lower in lower:
+                matches.append(id_str)
+                if len(matches) == limit:
+                    break
+        return matches
@@ -0,0 +1,90 @@
+"""Edge case tests for several pkm processes writing at once."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from pkm.storage.backends import open_store
+
+PROCESSES = 8
+
+
+def _run_parallel(data_dir: Path, backend: str, commands: list[list[str]]) -> None:
+    """Start one `python -m pkm` process per command and wait for all of them."""
+    env = {**os.environ, "PKM_BACKEND": backend}
+    procs = [
+        subprocess.Popen(
+            [sys.executable, "-m", "pkm", "--data-dir", str(data_dir), *command],
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        for command in commands
+    ]
+    for proc in procs:
+        _, stderr = proc.communicate(timeout=60)
+        assert proc.returncode == 0, stderr.decode()
+
+
+class TestConcurrentWrites:
+    """Tests that parallel commands never lose each other's changes."""
+
+    @pytest.mark.parametrize("backend", ["json", "journal", "sqlite", "directory"])
+    def test_parallel_adds_lose_nothing(self, temp_data_dir: Path, backend: str) -> None:
+        """Test that every task added by parallel processes is saved."""
+        _run_parallel(
+            temp_data_dir,
+            backend,
+            [["add", "task", f"Task {i}"] for i in range(PROCESSES)],
+        )
+
+        data = open_store(temp_data_dir, backend).load()
+        titles = sorted(task["title"] for task in data["tasks"])
+        assert titles == sorted(f"Task {i}" for i in range(PROCESSES))
+        # IDs are allocated under the lock, so none are handed out twice
+        assert len({task["id"] for task in data["tasks"]}) == PROCESSES
+        assert data["_version"] == PROCESSES  # type: ignore[typeddict-item]
+
+    def test_parallel_notes_and_tasks(self, temp_data_dir: Path) -> None:
+        """Test that mixed note and task adds all survive."""
+        commands = []
+        for i in range(PROCESSES // 2):
+            commands.append(["add", "note", f"Note {i}"])
+            commands.append(["add", "task", f"Task {i}"])
+        _run_parallel(temp_data_dir, "json", commands)
+
+        data = open_store(temp_data_dir).load()
+        assert len(data["notes"]) == PROCESSES // 2
+        assert len(data["tasks"]) == PROCESSES // 2
+
+
+class TestConcurrentIdAllocation:
+    """Tests that processes sharing a counter file never share an ID."""
+
+    @pytest.mark.parametrize("block_size", [1, 5])
+    def test_parallel_allocations_are_unique(self, temp_data_dir: Path, block_size: int) -> None:
+        """Test that IDs allocated by parallel processes are all distinct."""
+        script = (
+            "import sys; from pathlib import Path; from pkm.storage.ids import IdAllocator; "
+            f"ids = IdAllocator(Path(sys.argv[1]), block_size={block_size}); "
+            "print(*(ids.allocate('notes') for _ in range(25)))"
+        )
+        procs = [
+            subprocess.Popen(
+                [sys.executable, "-c", script, str(temp_data_dir / "ids.json")],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+            )
+            for _ in range(PROCESSES)
+        ]
+        numbers: list[int] = []
+        for proc in procs:
+            stdout, stderr = proc.communicate(timeout=60)
+            assert proc.returncode == 0, stderr.decode()
+            numbers.extend(int(number) for number in stdout.split())
+
+        assert len(numbers) == len(set(numbers)) == PROCESSES * 25
+
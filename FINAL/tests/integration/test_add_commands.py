@@ -2,9 +2,12 @@
 
 from pathlib import Path
 
+import pytest
 from click.testing import CliRunner
 
 from pkm.cli.main import cli
+from pkm.storage.json_store import JSONStore
+from pkm.storage.locking import StaleDataError
 
 
 class TestAddCommands:
@@ -94,3 +97,23 @@ class TestAddCommands:
 
         assert result.exit_code == 0
         assert "course 'Biology 101'" in result.output
+
+    def test_failed_save_is_not_reported_as_success(
+        self, temp_data_dir: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that a save that fails is reported as an error, not a success."""
+
+        def stale_save(self: JSONStore, data: object) -> None:
+            raise StaleDataError("data.json changed since it was loaded")
+
+        monkeypatch.setattr(JSONStore, "save", stale_save)
+        runner = CliRunner()
+        result = runner.invoke(
+            cli,
+            ["--data-dir", str(temp_data_dir), "add", "note", "Lost note"],
+        )
+
+        assert result.exit_code == 1
+        assert result.exception is None or isinstance(result.exception, SystemExit)
+        assert "Note created" not in result.output
+        assert "changed since it was loaded" in result.output
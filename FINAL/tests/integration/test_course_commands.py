@@ -158,3 +158,29 @@ class TestCourseCommands:
         # Should fail because course doesn't exist
         assert result.exit_code == 1
         assert "not found" in result.output.lower()
+
+    def test_rename_course(self, temp_data_dir: Path) -> None:
+        """Test renaming a course and reporting unknown courses."""
+        runner = CliRunner()
+        runner.invoke(
+            cli,
+            ["--data-dir", str(temp_data_dir), "add", "task", "Course task", "--course", "Bio"],
+        )
+
+        result = runner.invoke(
+            cli, ["--data-dir", str(temp_data_dir), "course", "rename", "Bio", "Biology"]
+        )
+        assert result.exit_code == 0
+        assert "renamed" in result.output.lower()
+
+        tasks_result = runner.invoke(
+            cli, ["--data-dir", str(temp_data_dir), "view", "course", "Biology"]
+        )
+        assert "Course task" in tasks_result.output
+
+        missing = runner.invoke(
+            cli, ["--data-dir", str(temp_data_dir), "course", "rename", "Bio", "Biology"]
+        )
+        assert missing.exit_code == 1
+        assert "not found" in missing.output.lower()
+
@@ -2,9 +2,11 @@
 
 from pathlib import Path
 
+import pytest
 from click.testing import CliRunner
 
 from pkm.cli.main import cli
+from pkm.services.note_service import NoteService
 
 
 class TestOrganizeCommands:
@@ -202,3 +204,49 @@ class TestOrganizeCommands:
 
         assert result.exit_code == 1
         assert "not found" in result.output.lower() or "note" in result.output.lower()
+
+    def test_rename_topic(self, temp_data_dir: Path) -> None:
+        """Test renaming a topic on every note that has it."""
+        runner = CliRunner()
+        for content in ("First ML note", "Second ML note"):
+            runner.invoke(
+                cli,
+                ["--data-dir", str(temp_data_dir), "add", "note", content, "--topics", "ML"],
+            )
+
+        result = runner.invoke(
+            cli,
+            ["--data-dir", str(temp_data_dir), "organize", "rename-topic", "ML", "Machine Learning"],
+        )
+        assert result.exit_code == 0
+        assert "2 notes" in result.output
+
+        topics_result = runner.invoke(cli, ["--data-dir", str(temp_data_dir), "view", "topics"])
+        assert "Machine Learning" in topics_result.output
+
+        missing = runner.invoke(
+            cli, ["--data-dir", str(temp_data_dir), "organize", "rename-topic", "ML", "AI"]
+        )
+        assert missing.exit_code == 1
+
+    def test_failed_organize_saves_nothing(
+        self, temp_data_dir: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that a command failing after its first change leaves the data as it was."""
+        runner = CliRunner()
+        base = ["--data-dir", str(temp_data_dir)]
+        note_result = runner.invoke(cli, [*base, "add", "note", "Inbox note"])
+        note_id = note_result.output.split("Note created: ")[1].split()[0]
+        before = (temp_data_dir / "data.json").read_bytes()
+
+        def broken_add_topics(self: NoteService, note_id: str, topics: list[str]) -> None:
+            raise OSError("topic index unavailable")
+
+        monkeypatch.setattr(NoteService, "add_topics", broken_add_topics)
+        result = runner.invoke(
+            cli, [*base, "organize", "note", note_id, "--course", "Biology", "--add-topics", "Cells"]
+        )
+
+        assert result.exit_code == 1
+        assert "Failed to organize note" in result.output
+        assert (temp_data_dir / "data.json").read_bytes() == before
@@ -0,0 +1,73 @@
+"""Integration tests for the --backend option."""
+
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from pkm.cli.main import cli
+
+
+@pytest.mark.parametrize("backend", ["json", "journal", "sqlite", "directory"])
+def test_workflow_on_backend(temp_data_dir: Path, backend: str) -> None:
+    """Test that a capture/organize/complete workflow works on each backend."""
+    runner = CliRunner()
+    base = ["--data-dir", str(temp_data_dir), "--backend", backend]
+
+    result = runner.invoke(cli, [*base, "add", "note", "Mitosis notes"])
+    assert result.exit_code == 0
+    result = runner.invoke(cli, [*base, "add", "task", "Lab report", "--priority", "high"])
+    assert result.exit_code == 0
+    result = runner.invoke(cli, [*base, "organize", "note", "n1", "--course", "BIO101"])
+    assert result.exit_code == 0
+    result = runner.invoke(cli, [*base, "task", "complete", "t1"])
+    assert result.exit_code == 0
+
+    result = runner.invoke(cli, [*base, "view", "courses"])
+    assert result.exit_code == 0
+    assert "BIO101" in result.output
+
+    result = runner.invoke(cli, [*base, "view", "tasks", "--status", "completed"])
+    assert "Lab report" in result.output
+
+
+def test_backend_from_environment(temp_data_dir: Path) -> None:
+    """Test that PKM_BACKEND selects the backend."""
+    runner = CliRunner(env={"PKM_BACKEND": "sqlite"})
+
+    result = runner.invoke(cli, ["--data-dir", str(temp_data_dir), "add", "note", "Hello"])
+
+    assert result.exit_code == 0
+    assert (temp_data_dir / "data.db").exists()
+    assert not (temp_data_dir / "data.json").exists()
+
+
+def test_sqlite_backend_migrates_existing_json(sample_data_file: Path) -> None:
+    """Test that switching to sqlite keeps existing data."""
+    runner = CliRunner()
+
+    result = runner.invoke(
+        cli,
+        ["--data-dir", str(sample_data_file.parent), "--backend", "sqlite", "view", "tasks"],
+    )
+
+    assert result.exit_code == 0
+    assert "Test task 1" in result.output
+
+
+def test_encoding_option(temp_data_dir: Path) -> None:
+    """Test that --encoding changes the file format but not the data."""
+    runner = CliRunner()
+    base = ["--data-dir", str(temp_data_dir)]
+
+    result = runner.invoke(cli, [*base, "--encoding", "gzip", "add", "note", "Compressed"])
+    assert result.exit_code == 0
+    assert (temp_data_dir / "data.json").read_bytes().startswith(b"\x1f\x8b")
+
+    # Read back without the option, then rewritten in the default encoding
+    result = runner.invoke(cli, [*base, "add", "task", "Plain again"])
+    assert result.exit_code == 0
+    assert (temp_data_dir / "data.json").read_bytes().startswith(b"{")
+
+    result = runner.invoke(cli, [*base, "view", "notes"])
+    assert "Compressed" in result.output
@@ -143,6 +143,31 @@ class TestViewCommands:
         assert "Due today" in result.output
         assert "Due tomorrow" not in result.output
 
+    def test_view_agenda_groups_tasks(self, temp_data_dir: Path) -> None:
+        """Test that view agenda shows every open task in its group."""
+        runner = CliRunner()
+        for title, due in [("Due soon", "in 3 days"), ("Due later", "in 30 days")]:
+            runner.invoke(
+                cli, ["--data-dir", str(temp_data_dir), "add", "task", title, "--due", due]
+            )
+        runner.invoke(cli, ["--data-dir", str(temp_data_dir), "add", "task", "No due date"])
+
+        result = runner.invoke(cli, ["--data-dir", str(temp_data_dir), "view", "agenda"])
+
+        assert result.exit_code == 0
+        assert "This Week (1)" in result.output
+        assert "Later (1)" in result.output
+        assert "No Due Date (1)" in result.output
+        assert "Overdue" not in result.output
+        assert "Total: 3 open tasks" in result.output
+
+    def test_view_agenda_empty(self, temp_data_dir: Path) -> None:
+        """Test view agenda with no tasks."""
+        result = CliRunner().invoke(cli, ["--data-dir", str(temp_data_dir), "view", "agenda"])
+
+        assert result.exit_code == 0
+        assert "No open tasks" in result.output
+
     def test_view_week_filters_correctly(self, temp_data_dir: Path) -> None:
         """Test US2-S3: View week shows tasks due within 7 days."""
         runner = CliRunner()
@@ -657,6 +682,52 @@ class TestViewCommands:
         # Task title might be truncated in display
         assert "Completed" in result.output or "t2" in result.output
 
+    def test_view_tasks_command_filter_by_due_range(self, temp_data_dir: Path) -> None:
+        """Test view tasks command with a due-date range, both days included."""
+        runner = CliRunner()
+        base = ["--data-dir", str(temp_data_dir)]
+        dates = [("First", "2030-01-02"), ("Last", "2030-01-05"), ("After", "2030-01-06")]
+        for title, due in dates:
+            runner.invoke(cli, [*base, "add", "task", title, "--due", due])
+        runner.invoke(cli, [*base, "add", "task", "Undated"])
+
+        result = runner.invoke(
+            cli, [*base, "view", "tasks", "--due-between", "2030-01-02", "2030-01-05"]
+        )
+
+        assert result.exit_code == 0
+        assert "First" in result.output
+        assert "Last" in result.output
+        assert "After" not in result.output
+        assert "Undated" not in result.output
+
+    def test_view_tasks_command_rejects_bad_due_range(self, temp_data_dir: Path) -> None:
+        """Test view tasks command with an unparseable due-date range."""
+        runner = CliRunner()
+
+        result = runner.invoke(
+            cli,
+            ["--data-dir", str(temp_data_dir), "view", "tasks", "--due-between", "soon", "later"],
+        )
+
+        assert result.exit_code == 1
+        assert "Could not parse due dates" in result.output
+
+    def test_view_tasks_command_rejects_reversed_due_range(self, temp_data_dir: Path) -> None:
+        """Test view tasks command with a due-date range that ends before it starts."""
+        runner = CliRunner()
+
+        result = runner.invoke(
+            cli,
+            [
+                "--data-dir", str(temp_data_dir),
+                "view", "tasks", "--due-between", "2030-01-05", "2030-01-02",
+            ],
+        )
+
+        assert result.exit_code == 2
+        assert "is after END" in result.output
+
     def test_view_topics_command_lists_all(self, temp_data_dir: Path) -> None:
         """Test view topics command lists all topics."""
         runner = CliRunner()
@@ -802,3 +873,25 @@ class TestViewCommands:
         assert "Topic not found: NonExistent" in result.output
         assert "Available topics:" in result.output
 
+    def test_view_graph_command(self, temp_data_dir: Path) -> None:
+        """Test view graph shows linked items up to the requested depth."""
+        runner = CliRunner()
+        base = ["--data-dir", str(temp_data_dir)]
+        runner.invoke(cli, [*base, "add", "note", "Cell biology"])
+        runner.invoke(cli, [*base, "add", "note", "DNA basics"])
+        runner.invoke(cli, [*base, "add", "task", "Study cells"])
+        runner.invoke(cli, [*base, "task", "link-note", "t1", "n1"])
+        runner.invoke(cli, [*base, "task", "link-note", "t1", "n2"])
+
+        result = runner.invoke(cli, [*base, "view", "graph", "n1"])
+        assert result.exit_code == 0
+        assert "Study cells" in result.output
+        assert "DNA basics" not in result.output
+
+        result = runner.invoke(cli, [*base, "view", "graph", "n1", "--depth", "2"])
+        assert result.exit_code == 0
+        assert "DNA basics" in result.output
+
+        result = runner.invoke(cli, [*base, "view", "graph", "n9"])
+        assert result.exit_code == 1
+        assert "not found" in result.output
@@ -1,6 +1,6 @@
 """Unit tests for ID matcher utility."""
 
-from pkm.utils.id_matcher import find_matching_id, get_match_suggestions
+from pkm.utils.id_matcher import IdMatcher, find_matching_id, get_match_suggestions
 
 
 class TestIDMatcher:
@@ -86,3 +86,61 @@ class TestIDMatcher:
         assert find_matching_id("abc", ids) == "t_20251123_154155_abc"
         assert find_matching_id("n1", ids) == "n1"
         assert find_matching_id("n2", ids) == "n2"
+
+
+class TestIdMatcherIndex:
+    """Tests for the sorted prefix/suffix matcher."""
+
+    IDS = [
+        "n_20251123_154149_4xl",
+        "n_20251123_155510_rw4",
+        "t_20251123_154155_abc",
+        "N1",
+        "n1",
+        "n10",
+        "n2",
+        "xab",
+    ]
+
+    def test_agrees_with_find_matching_id(self) -> None:
+        """Test that every kind of partial ID resolves as find_matching_id does."""
+        matcher = IdMatcher(self.IDS)
+        partials = [
+            "n1", "N1", "n", "n10", "n2", "4xl", "rw4", "abc", "ab", "154",
+            "20251123", "x", "b", "zzz", "T_", "_4XL", "0",
+        ]
+        for partial in partials:
+            assert matcher.resolve(partial) == find_matching_id(partial, self.IDS), partial
+            assert matcher.suggestions(partial) == get_match_suggestions(partial, self.IDS)
+
+    def test_resolve_many(self) -> None:
+        """Test resolving a batch of partial IDs."""
+        matcher = IdMatcher(self.IDS)
+        assert matcher.resolve_many(["4xl", "n", "xab"]) == {
+            "4xl": "n_20251123_154149_4xl",
+            "n": None,
+            "xab": "xab",
+        }
+
+    def test_add_and_remove(self) -> None:
+        """Test that updates keep answers in line with a rebuilt matcher."""
+        matcher = IdMatcher(["n1", "n2"])
+        assert matcher.resolve("n3") is None
+
+        matcher.add("n3")
+        matcher.add("n30")
+        matcher.remove("n1")
+        matcher.remove("missing")
+
+        assert len(matcher) == 3
+        assert matcher.is_built_from(["n2", "n3", "n30"])
+        assert matcher.resolve("n3") == "n3"
+        assert matcher.resolve("30") == "n30"
+        assert matcher.resolve("n1") is None
+        assert matcher.suggestions("n") == ["n2", "n3", "n30"]
+
+    def test_empty(self) -> None:
+        """Test an empty matcher and an empty partial ID."""
+        assert IdMatcher().resolve("n1") is None
+        assert IdMatcher(["n1"]).resolve("") is None
+        assert IdMatcher(["n1"]).suggestions("") == []
@@ -5,36 +5,12 @@ from datetime import datetime
 import pytest
 from pydantic import ValidationError
 
-from pkm.models.common import generate_id
 from pkm.models.course import Course
 from pkm.models.note import Note
+from pkm.models.records import SubtaskRecord, TaskRecord
 from pkm.models.task import Subtask, Task
 
 
-class TestIDGeneration:
-    """Tests for ID generation."""
-
-    def test_generate_note_id(self) -> None:
-        """Test generating a note ID."""
-        note_id = generate_id("n")
-        assert note_id.startswith("n")
-        # Format: n{number} (e.g., n1, n42)
-        assert note_id[1:].isdigit()
-        assert len(note_id) >= 2  # At least "n1"
-
-    def test_generate_task_id(self) -> None:
-        """Test generating a task ID."""
-        task_id = generate_id("t")
-        assert task_id.startswith("t")
-        assert task_id[1:].isdigit()
-        assert len(task_id) >= 2  # At least "t1"
-
-    def test_ids_are_unique(self) -> None:
-        """Test that generated IDs are unique."""
-        ids = [generate_id("n") for _ in range(100)]
-        assert len(ids) == len(set(ids))
-
-
 class TestNoteModel:
     """Tests for Note model."""
 
@@ -218,6 +194,29 @@ class TestTaskModel:
         )
         assert task.subtask_progress == pytest.approx(66.666, rel=0.01)
 
+    def test_task_record_properties_match_task(self) -> None:
+        """Test that the read-only record shares Task's due-date helpers."""
+        now = datetime.now()
+        task = Task(
+            id="t12",
+            title="Test",
+            created_at=now,
+            due_date=datetime(2020, 1, 1),
+            subtasks=[Subtask(id=1, title="Sub1", completed=True), Subtask(id=2, title="Sub2")],
+        )
+        record = TaskRecord(
+            "t12",
+            "Test",
+            now,
+            datetime(2020, 1, 1),
+            subtasks=(SubtaskRecord(1, "Sub1", True), SubtaskRecord(2, "Sub2")),
+        )
+
+        assert record.is_overdue == task.is_overdue
+        assert record.is_due_today == task.is_due_today
+        assert record.is_due_this_week == task.is_due_this_week
+        assert record.subtask_progress == task.subtask_progress == 50.0
+
     def test_task_subtask_unique_ids(self) -> None:
         """Test that duplicate subtask IDs are rejected."""
         with pytest.raises(ValidationError):
@@ -1,12 +1,21 @@
 """Unit tests for service layer methods."""
 
+from datetime import datetime, timedelta
 from pathlib import Path
 
 import pytest
 
+from pkm.models.records import TaskRecord
+from pkm.models.task import Task
 from pkm.services.course_service import CourseService
 from pkm.services.note_service import NoteService
 from pkm.services.task_service import TaskService
+from pkm.services.unit_of_work import UnitOfWork
+from pkm.storage.backends import open_store
+from pkm.storage.index import record_index
+from pkm.storage.json_store import JSONStore
+from pkm.storage.migrations import add_course_stats
+from pkm.storage.schema import DataSchema
 
 
 class TestNoteService:
@@ -61,10 +70,39 @@ class TestNoteService:
         assert result is True
         assert note_service.get_note(note.id) is None
 
+    def test_rename_topic_merges_duplicates(self, temp_data_dir: Path) -> None:
+        """Test that renaming onto an existing topic keeps one copy."""
+        service = NoteService(temp_data_dir)
+        both = service.create_note("Both", topics=["ML", "Machine Learning"])
+        single = service.create_note("Single", topics=["ML", "Python"])
+        service.create_note("Neither", topics=["Python"])
+
+        assert service.rename_topic("ML", "Machine Learning") == 2
+        assert service.get_note(both.id).topics == ["Machine Learning"]
+        assert service.get_note(single.id).topics == ["Machine Learning", "Python"]
+        assert service.rename_topic("ML", "Machine Learning") == 0
+
+        with pytest.raises(ValueError):
+            service.rename_topic("Python", "x" * 51)
+
 
 class TestTaskService:
     """Unit tests for TaskService methods."""
 
+    def test_list_views_return_read_only_records(self, temp_data_dir: Path) -> None:
+        """Test that bulk reads return records and mutations return models."""
+        service = TaskService(temp_data_dir)
+        task = service.create_task("Read me", priority="high")
+
+        inbox = service.get_inbox_tasks()
+        assert inbox == service.list_task_records()
+        assert isinstance(inbox[0], TaskRecord)
+        assert (inbox[0].id, inbox[0].title, inbox[0].priority) == (task.id, "Read me", "high")
+
+        organized = service.organize_task(task.id, "Biology")
+        assert isinstance(organized, Task)
+        assert [t.course for t in service.get_tasks_by_course("Biology")] == ["Biology"]
+
     def test_delete_task_removes_from_storage(self, temp_data_dir: Path) -> None:
         """Test that delete_task removes task from storage."""
         service = TaskService(temp_data_dir)
@@ -280,3 +318,446 @@ class TestCourseService:
         updated_task2 = task_service.get_task(task2.id)
         assert updated_task2.course is None
 
+    def test_rename_course(self, temp_data_dir: Path) -> None:
+        """Test that rename_course moves notes and tasks to the new name."""
+        note_service = NoteService(temp_data_dir)
+        task_service = TaskService(temp_data_dir)
+        course_service = CourseService(temp_data_dir)
+        note = note_service.create_note("Course note", course="Bio")
+        task = task_service.create_task("Course task", course="Bio")
+        other = task_service.create_task("Other task", course="Math")
+
+        counts = course_service.rename_course("Bio", "Biology 101")
+
+        assert counts == {"notes": 1, "tasks": 1}
+        assert note_service.get_note(note.id).course == "Biology 101"
+        assert task_service.get_task(task.id).course == "Biology 101"
+        assert task_service.get_task(other.id).course == "Math"
+        assert course_service.rename_course("Bio", "Biology 101") == {"notes": 0, "tasks": 0}
+
+    def test_rename_course_rejects_invalid_name(self, temp_data_dir: Path) -> None:
+        """Test that an invalid new name leaves the data untouched."""
+        task_service = TaskService(temp_data_dir)
+        task = task_service.create_task("Course task", course="Bio")
+
+        with pytest.raises(ValueError):
+            CourseService(temp_data_dir).rename_course("Bio", "")
+
+        assert task_service.get_task(task.id).course == "Bio"
+
+
+
+class TestRecordLookups:
+    """Tests for by-ID mutations going through the record index."""
+
+    def test_mutations_reuse_the_index(self, temp_data_dir: Path) -> None:
+        """Test that a series of by-ID changes builds the index once."""
+        uow = UnitOfWork(temp_data_dir)
+        notes = [uow.notes.create_note(f"Note {i}") for i in range(20)]
+        tasks = [uow.tasks.create_task(f"Task {i}") for i in range(20)]
+
+        uow.tasks.link_note(tasks[5].id, notes[7].id)
+        uow.tasks.complete_task(tasks[9].id)
+        uow.notes.add_topics(notes[3].id, ["Cells"])
+        uow.notes.update_note(notes[7].id, "Edited")
+
+        assert record_index(uow, "tasks").rebuilds == 1
+        assert record_index(uow, "notes").rebuilds == 1
+        assert uow.notes.get_note(notes[7].id).linked_from_tasks == [tasks[5].id]
+
+        assert uow.tasks.delete_task(tasks[5].id)
+        assert uow.notes.get_note(notes[7].id).linked_from_tasks == []
+        assert uow.tasks.get_task(tasks[19].id).title == "Task 19"
+        assert uow.tasks.complete_task("t99") is None
+
+    def test_partial_ids_reuse_the_matcher(self, temp_data_dir: Path) -> None:
+        """Test that partial-ID lookups keep one matcher across creates and deletes."""
+        service = NoteService(temp_data_dir)
+        first = service.create_note("First")
+        assert service.get_note(first.id).content == "First"
+        matcher = service._id_matcher
+
+        second = service.create_note("Second")
+        assert service.delete_note(first.id)
+        assert service.resolve_note_ids([first.id, second.id]) == {
+            first.id: None,
+            second.id: second.id,
+        }
+        assert service._id_matcher is matcher
+
+        # A note created by another service instance forces a rebuild
+        other = NoteService(temp_data_dir).create_note("Third")
+        assert service.suggest_note_ids(other.id) == [other.id]
+        assert service._id_matcher is not matcher
+
+    def test_matcher_follows_other_services_in_a_unit_of_work(
+        self, temp_data_dir: Path
+    ) -> None:
+        """Test that notes removed by another service are not matched afterwards."""
+        uow = UnitOfWork(temp_data_dir)
+        kept = uow.notes.create_note("Kept")
+        dropped = uow.notes.create_note("Dropped", course="BIO101")
+        assert uow.notes.resolve_note_ids([dropped.id]) == {dropped.id: dropped.id}
+        matcher = uow.notes._id_matcher
+
+        uow.courses.delete_course("BIO101", reassign_to_inbox=False)
+
+        assert uow.notes.resolve_note_ids([dropped.id, kept.id]) == {
+            dropped.id: None,
+            kept.id: kept.id,
+        }
+        assert uow.notes._id_matcher is not matcher
+
+    def test_resolve_task_ids(self, temp_data_dir: Path) -> None:
+        """Test resolving several partial task IDs with one call."""
+        service = TaskService(temp_data_dir)
+        tasks = [service.create_task(f"Task {i}") for i in range(12)]
+
+        resolved = service.resolve_task_ids(["t2", "t", "T12"])
+
+        assert resolved == {"t2": tasks[1].id, "t": None, "T12": tasks[11].id}
+        assert service.suggest_task_ids("t1")[:2] == [tasks[0].id, tasks[9].id]
+
+
+class TestIdCounters:
+    """Tests for the next-ID counters stored with the data."""
+
+    def test_ids_come_from_stored_counters(self, temp_data_dir: Path) -> None:
+        """Test that IDs advance a stored counter and are never reused."""
+        service = TaskService(temp_data_dir)
+        service.create_task("First")
+        second = service.create_task("Second")
+        service.delete_task(second.id)
+
+        assert service.create_task("Third").id == "t3"
+        assert service.store.load()["_next_ids"] == {"notes": 1, "tasks": 4}  # type: ignore[typeddict-item]
+
+    def test_counters_seeded_from_existing_ids(self, temp_data_dir: Path) -> None:
+        """Test that data written before the counters is scanned once."""
+        store = JSONStore(temp_data_dir / "data.json")
+        data = store.load()
+        data["notes"].append(
+            {"id": "n7", "content": "Old note", "created_at": "2025-11-23T10:00:00",
+             "modified_at": "2025-11-23T10:00:00", "course": None, "topics": [],
+             "linked_from_tasks": []}
+        )
+        store.save(data)
+
+        assert NoteService(temp_data_dir).create_note("New note").id == "n8"
+        assert TaskService(temp_data_dir).create_task("New task").id == "t1"
+
+    @pytest.mark.parametrize("backend", ["sqlite", "directory"])
+    def test_counters_persist_in_other_backends(self, temp_data_dir: Path, backend: str) -> None:
+        """Test that every backend keeps the counters between services."""
+        store = open_store(temp_data_dir, backend)
+        NoteService(temp_data_dir, store).create_note("First")
+        NoteService(temp_data_dir, open_store(temp_data_dir, backend)).delete_note("n1")
+
+        assert NoteService(temp_data_dir, open_store(temp_data_dir, backend)).create_note(
+            "Second"
+        ).id == "n2"
+
+
+class TestTopicIndex:
+    """Tests for the topic index stored with the data."""
+
+    def test_index_follows_topic_changes(self, temp_data_dir: Path) -> None:
+        """Test that every topic change updates the stored index."""
+        service = NoteService(temp_data_dir)
+        first = service.create_note("First", topics=["Cells"])
+        second = service.create_note("Second", topics=["Cells", "DNA"])
+        service.add_topics(first.id, ["Energy"])
+        service.remove_topic(second.id, "Cells")
+        service.rename_topic("DNA", "Genetics")
+
+        data = service.store.load()
+        assert data["_topic_index"] == {  # type: ignore[typeddict-item]
+            "Cells": [first.id],
+            "Energy": [first.id],
+            "Genetics": [second.id],
+        }
+
+        service.delete_note(first.id)
+        assert service.get_topic_counts() == {"Genetics": 1}
+        assert [n.id for n in service.get_notes_by_topic("Genetics")] == [second.id]
+        assert service.get_notes_by_topic("Cells") == []
+
+    def test_notes_keep_storage_order(self, temp_data_dir: Path) -> None:
+        """Test that topic queries list notes in storage order."""
+        service = NoteService(temp_data_dir)
+        first = service.create_note("First")
+        second = service.create_note("Second", topics=["Cells"])
+        service.add_topics(first.id, ["Cells"])
+
+        assert [n.id for n in service.get_notes_by_topic("Cells")] == [first.id, second.id]
+        assert [n.id for n in service.get_all_topics()["Cells"]] == [first.id, second.id]
+
+    def test_index_built_from_existing_notes(self, temp_data_dir: Path) -> None:
+        """Test that data written before the index is scanned once."""
+        store = JSONStore(temp_data_dir / "data.json")
+        data = store.load()
+        data["notes"].append(
+            {"id": "n7", "content": "Old note", "created_at": "2025-11-23T10:00:00",
+             "modified_at": "2025-11-23T10:00:00", "course": None, "topics": ["Cells"],
+             "linked_from_tasks": []}
+        )
+        store.save(data)
+
+        service = NoteService(temp_data_dir)
+        assert service.get_topic_counts() == {"Cells": 1}
+        service.add_topics("n7", ["Cells", "DNA"])
+        assert service.get_topic_counts() == {"Cells": 1, "DNA": 1}
+
+    def test_deleting_course_items_updates_index(self, temp_data_dir: Path) -> None:
+        """Test that deleting a course with its notes drops them from the index."""
+        notes = NoteService(temp_data_dir)
+        notes.create_note("Kept", topics=["Cells"])
+        notes.create_note("Dropped", course="BIO101", topics=["Cells", "DNA"])
+
+        CourseService(temp_data_dir).delete_course("BIO101", reassign_to_inbox=False)
+
+        assert notes.get_topic_counts() == {"Cells": 1}
+
+    def test_counts_skip_stale_entries(self, temp_data_dir: Path) -> None:
+        """Test that counts ignore index entries for notes that lost the topic."""
+        service = NoteService(temp_data_dir)
+        note = service.create_note("First", topics=["Cells"])
+
+        # Change the note behind the index's back
+        data = service.store.load()
+        data["notes"][0] = {**data["notes"][0], "topics": []}
+        service.store.save(data)
+
+        assert service.get_topic_counts() == {}
+        assert service.get_notes_by_topic("Cells") == []
+        assert data["_topic_index"] == {"Cells": [note.id]}  # type: ignore[typeddict-item]
+
+    def test_journal_writes_changed_members(self, temp_data_dir: Path) -> None:
+        """Test that adding a note to a topic journals only its ID."""
+        store = JSONStore(temp_data_dir / "data.json", journal=True)
+        service = NoteService(temp_data_dir, store)
+        first = service.create_note("First", topics=["Cells"])
+        second = service.create_note("Second", topics=["Cells"])
+
+        index_ops = [op for op in store.journal.read_ops() if op.get("key") == "_topic_index"]
+        assert index_ops[-1] == {
+            "op": "add", "key": "_topic_index", "field": "Cells", "value": [second.id]
+        }
+
+        service.remove_topic(first.id, "Cells")
+        index_ops = [op for op in store.journal.read_ops() if op.get("key") == "_topic_index"]
+        assert index_ops[-1] == {
+            "op": "remove", "key": "_topic_index", "field": "Cells", "value": [first.id]
+        }
+        loaded = JSONStore(temp_data_dir / "data.json").load()
+        assert loaded["_topic_index"] == {"Cells": [second.id]}  # type: ignore[typeddict-item]
+
+    @pytest.mark.parametrize("backend", ["sqlite", "directory"])
+    def test_index_persists_in_other_backends(self, temp_data_dir: Path, backend: str) -> None:
+        """Test that every backend keeps the index between services."""
+        NoteService(temp_data_dir, open_store(temp_data_dir, backend)).create_note(
+            "First", topics=["Cells"]
+        )
+
+        data = open_store(temp_data_dir, backend).load()
+        assert data["_topic_index"] == {"Cells": ["n1"]}  # type: ignore[typeddict-item]
+
+
+class TestCourseStats:
+    """Tests for the course counts stored with the data."""
+
+    def test_counts_follow_changes(self, temp_data_dir: Path) -> None:
+        """Test that creates, organizes, completes and deletes update the counts."""
+        uow = UnitOfWork(temp_data_dir)
+        yesterday = datetime.now() - timedelta(days=1)
+        note = uow.notes.create_note("Note", course="BIO101")
+        uow.notes.create_note("Inbox note")
+        late = uow.tasks.create_task("Late", due_date=yesterday, course="BIO101")
+        done = uow.tasks.create_task("Done", due_date=yesterday, course="BIO101")
+        later = uow.tasks.create_task("Later", due_date=yesterday + timedelta(days=9))
+        uow.tasks.organize_task(later.id, "BIO101")
+        uow.tasks.complete_task(done.id)
+
+        course = uow.courses.get_course("BIO101")
+        assert course is not None
+        assert (course.note_count, course.task_count) == (1, 3)
+        assert (course.open_task_count, course.overdue_task_count) == (2, 1)
+
+        uow.notes.organize_note(note.id, "CS301")
+        uow.tasks.delete_task(late.id)
+        course = uow.courses.get_course("BIO101")
+        assert course is not None
+        assert (course.note_count, course.task_count) == (0, 2)
+        assert (course.open_task_count, course.overdue_task_count) == (1, 0)
+        assert [c.name for c in uow.courses.list_courses()] == ["BIO101", "CS301"]
+
+    def test_counts_match_a_full_recount(self, temp_data_dir: Path) -> None:
+        """Test that renames and deletes leave counts equal to a recount."""
+        uow = UnitOfWork(temp_data_dir)
+        uow.notes.create_note("Note", course="BIO101")
+        uow.tasks.create_task("Task", course="BIO101")
+        uow.tasks.create_task("Other", course="CS301")
+        uow.courses.rename_course("BIO101", "CS301")
+        uow.notes.create_note("Gone", course="MATH")
+        uow.courses.delete_course("MATH", reassign_to_inbox=False)
+
+        data = uow.load()
+        assert data["_course_stats"] == add_course_stats(dict(data))[  # type: ignore[typeddict-item]
+            "_course_stats"
+        ]
+        course = uow.courses.get_course("CS301")
+        assert course is not None
+        assert (course.note_count, course.task_count) == (1, 2)
+        assert uow.courses.get_course("MATH") is None
+
+    def test_counts_built_from_existing_records(self, temp_data_dir: Path) -> None:
+        """Test that data written before the counts is counted once."""
+        store = JSONStore(temp_data_dir / "data.json")
+        data = store.load()
+        data["notes"].append(
+            {"id": "n7", "content": "Old note", "created_at": "2025-11-23T10:00:00",
+             "modified_at": "2025-11-23T10:00:00", "course": "BIO101", "topics": [],
+             "linked_from_tasks": []}
+        )
+        store.save(data)
+
+        service = NoteService(temp_data_dir)
+        service.organize_note("n7", "CS301")
+
+        assert [(c.name, c.note_count) for c in CourseService(temp_data_dir).list_courses()] == [
+            ("CS301", 1)
+        ]
+
+
+class TestGraphService:
+    """Tests for walks over the note/task link graph."""
+
+    @pytest.fixture
+    def uow(self, temp_data_dir: Path) -> UnitOfWork:
+        """Create a chain n1 - t1 - n2 - t2 plus an unlinked note."""
+        uow = UnitOfWork(temp_data_dir)
+        for content in ("Cells", "DNA", "Unlinked"):
+            uow.notes.create_note(content)
+        for title in ("Study", "Lab"):
+            uow.tasks.create_task(title)
+        uow.tasks.link_note("t1", "n1")
+        uow.tasks.link_note("t1", "n2")
+        uow.tasks.link_note("t2", "n2")
+        return uow
+
+    def test_neighborhood_by_depth(self, uow: UnitOfWork) -> None:
+        """Test that each depth adds the items one more link away."""
+        def walk(item_id: str, depth: int) -> list[tuple[int, str | None, str]]:
+            nodes = uow.graph.get_neighborhood(item_id, depth)
+            return [(node.depth, node.parent, node.record.id) for node in nodes]
+
+        assert walk("n1", 0) == [(0, None, "n1")]
+        assert walk("n1", 1) == [(0, None, "n1"), (1, "n1", "t1")]
+        assert walk("n1", 3) == [
+            (0, None, "n1"), (1, "n1", "t1"), (2, "t1", "n2"), (3, "n2", "t2")
+        ]
+        assert walk("t1", 1) == [(0, None, "t1"), (1, "t1", "n1"), (1, "t1", "n2")]
+        assert walk("n3", 5) == [(0, None, "n3")]
+
+    def test_neighborhood_of_unknown_item(self, uow: UnitOfWork) -> None:
+        """Test that a missing start item gives an empty walk."""
+        assert uow.graph.get_neighborhood("zz") == []
+        with pytest.raises(ValueError):
+            uow.graph.get_neighborhood("n1", -1)
+
+    def test_bulk_fetch_skips_missing(self, uow: UnitOfWork) -> None:
+        """Test fetching linked items by ID from one load."""
+        assert [n.id for n in uow.notes.get_notes(["n2", "n9", "n1"])] == ["n2", "n1"]
+        assert [t.title for t in uow.tasks.get_tasks(["t2", "t1"])] == ["Lab", "Study"]
+
+
+class CountingStore(JSONStore):
+    """JSONStore that counts how often it is written."""
+
+    def __init__(self, data_file: Path) -> None:
+        super().__init__(data_file)
+        self.saves = 0
+
+    def save(self, data: DataSchema) -> None:
+        self.saves += 1
+        super().save(data)
+
+
+class TestUnitOfWork:
+    """Tests for UnitOfWork."""
+
+    def test_multiple_changes_single_save(self, temp_data_dir: Path) -> None:
+        """Test that several service calls are committed with one save."""
+        note = NoteService(temp_data_dir).create_note("Cell biology")
+        store = CountingStore(temp_data_dir / "data.json")
+
+        with UnitOfWork(temp_data_dir, store) as uow:
+            uow.notes.organize_note(note.id, "Biology 101")
+            uow.notes.add_topics(note.id, ["Cells", "Mitosis"])
+            assert store.saves == 0
+
+        assert store.saves == 1
+        saved = NoteService(temp_data_dir).get_note(note.id)
+        assert saved.course == "Biology 101"
+        assert saved.topics == ["Cells", "Mitosis"]
+
+    def test_services_share_state(self, temp_data_dir: Path) -> None:
+        """Test that services of one unit of work see each other's changes."""
+        uow = UnitOfWork(temp_data_dir)
+        note = uow.notes.create_note("Linked note")
+        task = uow.tasks.create_task("Linked task")
+        uow.tasks.link_note(task.id, note.id)
+
+        assert uow.notes.get_note(note.id).linked_from_tasks == [task.id]
+        notes, tasks = uow.search.search("Linked")
+        assert [n.id for n in notes] == [note.id]
+        assert [t.id for t in tasks] == [task.id]
+        # Nothing is on disk until commit
+        assert NoteService(temp_data_dir).list_notes() == []
+
+        uow.commit()
+        assert not uow.has_changes
+        assert NoteService(temp_data_dir).get_note(note.id) is not None
+
+    def test_rollback_on_exception(self, temp_data_dir: Path) -> None:
+        """Test that changes are discarded if the block raises."""
+        store = CountingStore(temp_data_dir / "data.json")
+
+        with pytest.raises(RuntimeError):
+            with UnitOfWork(temp_data_dir, store) as uow:
+                uow.tasks.create_task("Never saved")
+                raise RuntimeError("boom")
+
+        assert store.saves == 0
+        assert TaskService(temp_data_dir).list_tasks() == []
+
+    def test_commit_without_changes_does_not_save(self, temp_data_dir: Path) -> None:
+        """Test that read-only work never writes the store."""
+        store = CountingStore(temp_data_dir / "data.json")
+        uow = UnitOfWork(temp_data_dir, store)
+        uow.notes.list_notes()
+        uow.commit()
+        assert store.saves == 0
+
+    def test_lock_held_from_first_change_until_commit(self, temp_data_dir: Path) -> None:
+        """Test that a unit of work reloads under the lock and keeps it."""
+        uow = UnitOfWork(temp_data_dir)
+        uow.notes.list_notes()
+
+        # Another writer saves after this unit of work first loaded
+        NoteService(temp_data_dir).create_note("Saved elsewhere")
+
+        uow.notes.create_note("Saved here")
+        assert uow._lock is not None
+        uow.commit()
+        assert uow._lock is None
+
+        contents = sorted(n.content for n in NoteService(temp_data_dir).list_notes())
+        assert contents == ["Saved elsewhere", "Saved here"]
+
+    def test_summaries_reflect_uncommitted_changes(self, temp_data_dir: Path) -> None:
+        """Test that note summaries come from memory once data is loaded."""
+        uow = UnitOfWork(temp_data_dir)
+        uow.notes.create_note("Not committed yet")
+
+        assert [n.preview for n in uow.notes.list_note_summaries()] == ["Not committed yet"]
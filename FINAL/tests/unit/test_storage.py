@@ -1,12 +1,44 @@
 """Unit tests for storage layer."""
 
 import json
+import os
+import time
+from datetime import datetime
 from pathlib import Path
+from typing import Any
 
 import pytest
+from pydantic import ValidationError
 
+from pkm.models.note import Note
+from pkm.models.task import Subtask, Task
+from pkm.services.note_service import NoteService
+from pkm.services.task_service import TaskService
+from pkm.storage.backends import open_store
+from pkm.storage.cache import snapshot_cache
+from pkm.storage.changes import apply_ops, clone_data, diff_data
+from pkm.storage.dictionary import PACKED_PREFIX, pack, unpack
+from pkm.storage.directory_store import DirectoryStore
+from pkm.storage.encodings import ENCODINGS, decode, detect_encoding, encode, iter_ndjson
+from pkm.storage.fragments import FragmentCache
+from pkm.storage.ids import IdAllocator
+from pkm.storage.index import RecordIndex
 from pkm.storage.json_store import JSONStore
-from pkm.storage.schema import create_empty_schema
+from pkm.storage.locking import FileLock, StaleDataError
+from pkm.storage.migrations import migrate_json_to_directory, migrate_json_to_sqlite
+from pkm.storage.schema import (
+    PREVIEW_LENGTH,
+    create_empty_schema,
+    deserialize_dataset,
+    deserialize_note,
+    deserialize_note_record,
+    deserialize_task,
+    deserialize_task_record,
+    serialize_note,
+    serialize_task,
+    summarize_note,
+)
+from pkm.storage.sqlite_store import SQLiteStore
 
 
 class TestJSONStore:
@@ -119,3 +151,1290 @@ class TestJSONStore:
 
         with pytest.raises(FileNotFoundError):
             store.restore_from_backup()
+
+
+def _note(note_id: str, content: str = "Test note") -> dict:
+    """Build a minimal note record for storage tests."""
+    return {
+        "id": note_id,
+        "content": content,
+        "created_at": "2025-11-23T10:00:00",
+        "modified_at": "2025-11-23T10:00:00",
+        "course": None,
+        "topics": [],
+        "linked_from_tasks": [],
+    }
+
+
+class TestJournalMode:
+    """Tests for JSONStore journal mode."""
+
+    def test_save_appends_only_changes(self, temp_data_dir: Path) -> None:
+        """Test that saves after a load append only changed records."""
+        store = JSONStore(temp_data_dir / "data.json", journal=True)
+        data = store.load()
+        data["notes"].append(_note("n1"))
+        store.save(data)
+
+        data = store.load()
+        data["notes"].append(_note("n2"))
+        store.save(data)
+
+        # No snapshot rewrite, one put plus the version stamp per save
+        assert not store.data_file.exists()
+        ops = store.journal.read_ops()
+        assert [op["op"] for op in ops] == ["put", "set", "put", "set"]
+        assert [op["record"]["id"] for op in ops if op["op"] == "put"] == ["n1", "n2"]
+        assert [op["value"] for op in ops if op["op"] == "set"] == [1, 2]
+
+    def test_load_replays_journal(self, temp_data_dir: Path) -> None:
+        """Test that a fresh store sees journaled changes."""
+        store = JSONStore(temp_data_dir / "data.json", journal=True)
+        data = store.load()
+        data["notes"].extend([_note("n1"), _note("n2")])
+        store.save(data)
+
+        data = store.load()
+        data["notes"][0] = _note("n1", "Edited")
+        del data["notes"][1]
+        data["courses"] = [{"name": "Biology"}]
+        store.save(data)
+
+        loaded = JSONStore(temp_data_dir / "data.json").load()
+        assert [n["id"] for n in loaded["notes"]] == ["n1"]
+        assert loaded["notes"][0]["content"] == "Edited"
+        assert loaded["courses"] == [{"name": "Biology"}]
+
+    def test_unchanged_save_writes_nothing(self, temp_data_dir: Path) -> None:
+        """Test that saving unchanged data does not grow the journal."""
+        store = JSONStore(temp_data_dir / "data.json", journal=True)
+        data = store.load()
+        store.save(data)
+
+        store.save(store.load())
+        assert store.journal.size() == 0
+
+    def test_compaction_folds_journal(self, temp_data_dir: Path) -> None:
+        """Test that passing the threshold folds the journal into the snapshot."""
+        store = JSONStore(
+            temp_data_dir / "data.json",
+            journal=True,
+            compact_threshold=1,
+            background_compaction=False,
+        )
+        store.save(store.load())
+
+        data = store.load()
+        data["notes"].append(_note("n1"))
+        store.save(data)
+
+        assert not store.journal.exists()
+        snapshot = json.loads(store.data_file.read_text())
+        assert snapshot["notes"][0]["id"] == "n1"
+
+    def test_background_compaction(self, temp_data_dir: Path) -> None:
+        """Test that background compaction produces the same data."""
+        store = JSONStore(temp_data_dir / "data.json", journal=True, compact_threshold=1)
+        store.save(store.load())
+
+        data = store.load()
+        data["notes"].append(_note("n1"))
+        store.save(data)
+        store.wait_for_compaction()
+
+        assert not store.journal.exists()
+        assert [n["id"] for n in store.load()["notes"]] == ["n1"]
+
+    def test_compaction_keeps_later_entries(self, temp_data_dir: Path) -> None:
+        """Test that entries appended past the compaction offset survive."""
+        store = JSONStore(temp_data_dir / "data.json", journal=True)
+        store.save(store.load())
+        store.journal.append([{"op": "put", "kind": "notes", "record": _note("n1")}])
+        offset = store.journal.size()
+        store.journal.append([{"op": "put", "kind": "notes", "record": _note("n2")}])
+
+        store.journal.discard_through(offset)
+
+        ops = store.journal.read_ops()
+        assert [op["record"]["id"] for op in ops] == ["n2"]
+
+    def test_torn_journal_line_is_ignored(self, temp_data_dir: Path) -> None:
+        """Test that a partially written final entry is skipped on replay."""
+        store = JSONStore(temp_data_dir / "data.json", journal=True)
+        store.save(store.load())
+        store.journal.append([{"op": "put", "kind": "notes", "record": _note("n1")}])
+        with open(store.journal.journal_file, "a") as f:
+            f.write('{"op": "put", "kind": "no')
+
+        loaded = store.load()
+        assert [n["id"] for n in loaded["notes"]] == ["n1"]
+
+    def test_full_save_clears_journal(self, temp_data_dir: Path) -> None:
+        """Test that a non-journal store folds a leftover journal on save."""
+        journaled = JSONStore(temp_data_dir / "data.json", journal=True)
+        journaled.save(journaled.load())
+        data = journaled.load()
+        data["notes"].append(_note("n1"))
+        journaled.save(data)
+
+        plain = JSONStore(temp_data_dir / "data.json")
+        plain.save(plain.load())
+
+        assert not plain.journal.exists()
+        assert [n["id"] for n in plain.load()["notes"]] == ["n1"]
+
+    def test_index_changes_journal_one_entry(self, temp_data_dir: Path) -> None:
+        """Test that a change to one entry of a stored dict journals that entry."""
+        store = JSONStore(temp_data_dir / "data.json", journal=True)
+        data = store.load()
+        data["_course_stats"] = {  # type: ignore[typeddict-item]
+            "BIO101": {"notes": 0, "tasks": 500, "open": 500},
+            "CS301": {"notes": 1, "tasks": 0, "open": 0},
+            "MATH": {"notes": 1, "tasks": 0, "open": 0},
+        }
+        store.save(data)
+
+        data = store.load()
+        data["_course_stats"] = {  # type: ignore[typeddict-item]
+            "BIO101": {"notes": 0, "tasks": 501, "open": 501},
+            "CS301": {"notes": 1, "tasks": 0, "open": 0},
+        }
+        store.save(data)
+
+        ops = store.journal.read_ops()[-3:]
+        assert [(op["op"], op.get("field")) for op in ops] == [
+            ("set", "BIO101"), ("unset", "MATH"), ("set", None)
+        ]
+        loaded = JSONStore(temp_data_dir / "data.json").load()
+        assert loaded["_course_stats"] == data["_course_stats"]  # type: ignore[typeddict-item]
+
+    def test_member_ops_replay_safely(self) -> None:
+        """Test that replaying list member ops twice gives the same result."""
+        old = {"notes": [], "tasks": [], "_topic_index": {"Cells": ["n1", "n2"]}}
+        new = {"notes": [], "tasks": [], "_topic_index": {"Cells": ["n2", "n3"]}}
+        ops = diff_data(old, new)  # type: ignore[arg-type]
+
+        assert [op["op"] for op in ops] == ["remove", "add"]
+        data = apply_ops(apply_ops(clone_data(old), ops), ops)
+        assert data == new
+        assert old["_topic_index"] == {"Cells": ["n1", "n2"]}
+
+
+class TestSQLiteStore:
+    """Tests for the SQLite backend."""
+
+    def test_load_empty_database(self, temp_data_dir: Path) -> None:
+        """Test that a new database loads as an empty schema."""
+        store = SQLiteStore(temp_data_dir / "data.db")
+        assert store.load() == create_empty_schema()
+
+    def test_round_trip_through_services(self, temp_data_dir: Path) -> None:
+        """Test that service operations round-trip through SQLite."""
+        store = SQLiteStore(temp_data_dir / "data.db")
+        notes = NoteService(temp_data_dir, store)
+        tasks = TaskService(temp_data_dir, store)
+
+        note = notes.create_note("Cell biology", course="BIO101", topics=["Cells", "DNA"])
+        task = tasks.create_task("Read chapter", priority="high")
+        tasks.add_subtask(task.id, "Section 1")
+        tasks.link_note(task.id, note.id)
+        tasks.complete_subtask(task.id, 1)
+
+        fresh = SQLiteStore(temp_data_dir / "data.db")
+        loaded_note = NoteService(temp_data_dir, fresh).get_note(note.id)
+        loaded_task = TaskService(temp_data_dir, fresh).get_task(task.id)
+
+        assert loaded_note is not None
+        assert loaded_note.topics == ["Cells", "DNA"]
+        assert loaded_note.linked_from_tasks == [task.id]
+        assert loaded_task is not None
+        assert loaded_task.priority == "high"
+        assert loaded_task.linked_notes == [note.id]
+        assert loaded_task.subtasks[0].completed is True
+
+    def test_delete_removes_child_rows(self, temp_data_dir: Path) -> None:
+        """Test that deleting records removes their rows."""
+        store = SQLiteStore(temp_data_dir / "data.db")
+        notes = NoteService(temp_data_dir, store)
+        tasks = TaskService(temp_data_dir, store)
+        note = notes.create_note("Reference", topics=["A"])
+        task = tasks.create_task("Task")
+        tasks.link_note(task.id, note.id)
+
+        tasks.delete_task(task.id)
+
+        data = SQLiteStore(temp_data_dir / "data.db").load()
+        assert data["tasks"] == []
+        assert data["notes"][0]["linked_from_tasks"] == []
+
+    def test_single_field_change_is_one_update(
+        self, temp_data_dir: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that completing a task issues a single-row UPDATE only."""
+        import sqlite3
+
+        store = SQLiteStore(temp_data_dir / "data.db")
+        tasks = TaskService(temp_data_dir, store)
+        task = tasks.create_task("Task")
+        tasks.add_subtask(task.id, "Step")
+        tasks.create_task("Other task")
+
+        statements: list[str] = []
+        real_connect = sqlite3.connect
+
+        def tracing_connect(*args: object, **kwargs: object) -> sqlite3.Connection:
+            conn = real_connect(*args, **kwargs)  # type: ignore[arg-type]
+            conn.set_trace_callback(statements.append)
+            return conn
+
+        monkeypatch.setattr(sqlite3, "connect", tracing_connect)
+        tasks.complete_task(task.id)
+
+        writes = [s for s in statements if s.split()[0] in ("INSERT", "UPDATE", "DELETE")]
+        # The row update plus the version stamp
+        assert len(writes) == 2
+        assert writes[0].startswith("UPDATE tasks SET completed = 1")
+        assert "INTO meta" in writes[1]
+
+    def test_meta_keys_round_trip(self, temp_data_dir: Path) -> None:
+        """Test that top-level keys other than notes/tasks are preserved."""
+        store = SQLiteStore(temp_data_dir / "data.db")
+        data = store.load()
+        data["courses"] = [{"name": "Biology"}]
+        store.save(data)
+
+        assert SQLiteStore(temp_data_dir / "data.db").load()["courses"] == [{"name": "Biology"}]
+
+    def test_migrate_from_json(self, sample_data_file: Path) -> None:
+        """Test one-shot migration of an existing data.json."""
+        db_file = sample_data_file.parent / "data.db"
+
+        count = migrate_json_to_sqlite(sample_data_file, db_file)
+
+        assert count == 2
+        data = SQLiteStore(db_file).load()
+        assert data["notes"][0]["id"] == "n1"
+        assert data["tasks"][0]["id"] == "t1"
+        with pytest.raises(FileExistsError):
+            migrate_json_to_sqlite(sample_data_file, db_file)
+
+    def test_open_store_migrates_on_first_use(self, sample_data_file: Path) -> None:
+        """Test that selecting the sqlite backend migrates data.json once."""
+        store = open_store(sample_data_file.parent, "sqlite")
+
+        assert isinstance(store, SQLiteStore)
+        assert [n["id"] for n in store.load()["notes"]] == ["n1"]
+
+    def test_open_store_rejects_unknown_backend(self, temp_data_dir: Path) -> None:
+        """Test that an unknown backend name is an error."""
+        with pytest.raises(ValueError, match="Unknown storage backend"):
+            open_store(temp_data_dir, "csv")
+
+
+class TestSnapshotCache:
+    """Tests for the process-wide snapshot cache used by JSONStore."""
+
+    @pytest.fixture
+    def parse_count(self, monkeypatch: pytest.MonkeyPatch) -> list[int]:
+        """Count full parses of the data file."""
+        import pkm.storage.json_store as json_store_module
+
+        calls = [0]
+        real_decode = json_store_module.decode
+
+        def counting_decode(raw: bytes) -> object:
+            calls[0] += 1
+            return real_decode(raw)
+
+        monkeypatch.setattr(json_store_module, "decode", counting_decode)
+        return calls
+
+    def test_unchanged_file_is_parsed_once(
+        self, sample_data_file: Path, parse_count: list[int]
+    ) -> None:
+        """Test that repeated loads across store instances share one parse."""
+        JSONStore(sample_data_file).load()
+        JSONStore(sample_data_file).load()
+        JSONStore(sample_data_file).load()
+
+        assert parse_count[0] == 1
+
+    def test_services_share_snapshot(
+        self, sample_data_file: Path, parse_count: list[int]
+    ) -> None:
+        """Test that several services in one command parse the file once."""
+        notes = NoteService(sample_data_file.parent)
+        tasks = TaskService(sample_data_file.parent)
+        notes.get_inbox_notes()
+        tasks.get_inbox_tasks()
+        tasks.get_task("t1")
+
+        assert parse_count[0] == 1
+
+    def test_external_change_invalidates(self, sample_data_file: Path) -> None:
+        """Test that a file rewritten by someone else is re-read."""
+        store = JSONStore(sample_data_file)
+        store.load()
+
+        sample_data_file.write_text(json.dumps(create_empty_schema()))
+
+        assert store.load()["notes"] == []
+
+    def test_save_updates_cache(self, sample_data_file: Path, parse_count: list[int]) -> None:
+        """Test that a load after save is served without parsing."""
+        store = JSONStore(sample_data_file)
+        data = store.load()
+        data["notes"].append(_note("n2"))
+        store.save(data)
+
+        loaded = JSONStore(sample_data_file).load()
+
+        assert [n["id"] for n in loaded["notes"]] == ["n1", "n2"]
+        assert parse_count[0] == 1
+
+    def test_loaded_lists_are_private(self, sample_data_file: Path) -> None:
+        """Test that changing a loaded list does not leak into the cache."""
+        store = JSONStore(sample_data_file)
+        data = store.load()
+        data["notes"].clear()
+
+        assert len(store.load()["notes"]) == 1
+
+
+class TestSnapshotKey:
+    """Tests for the cheap identity of the stored data."""
+
+    @pytest.mark.parametrize("backend", ["json", "journal", "sqlite", "directory"])
+    def test_key_changes_only_on_save(self, temp_data_dir: Path, backend: str) -> None:
+        """Test that the key stays put across loads and moves on every save."""
+        store = open_store(temp_data_dir, backend)
+        data = store.load()
+        data["notes"].append(_note("n1"))
+        store.save(data)
+        key = store.snapshot_key()
+
+        store.load()
+        assert open_store(temp_data_dir, backend).snapshot_key() == key
+
+        data = store.load()
+        data["notes"].append(_note("n2"))
+        store.save(data)
+        assert store.snapshot_key() != key
+
+
+class TestLocking:
+    """Tests for file locking and version stamps."""
+
+    @pytest.mark.parametrize("backend", ["json", "journal", "sqlite", "directory"])
+    def test_save_increments_version(self, temp_data_dir: Path, backend: str) -> None:
+        """Test that every save bumps the version stamp."""
+        store = open_store(temp_data_dir, backend)
+        for expected in (1, 2):
+            data = store.load()
+            data["notes"].append(_note(f"n{expected}"))
+            store.save(data)
+            assert open_store(temp_data_dir, backend).load()["_version"] == expected  # type: ignore[typeddict-item]
+
+    @pytest.mark.parametrize("backend", ["json", "journal", "sqlite", "directory"])
+    def test_stale_save_raises(self, temp_data_dir: Path, backend: str) -> None:
+        """Test that saving over another writer's changes is refused."""
+        first = open_store(temp_data_dir, backend)
+        second = open_store(temp_data_dir, backend)
+        first_data = first.load()
+        second_data = second.load()
+
+        first_data["notes"].append(_note("n1"))
+        first.save(first_data)
+
+        second_data["notes"].append(_note("n2"))
+        with pytest.raises(StaleDataError):
+            second.save(second_data)
+
+        # Reloading picks up the other change and the save goes through
+        second_data = second.load()
+        second_data["notes"].append(_note("n2"))
+        second.save(second_data)
+        notes = open_store(temp_data_dir, backend).load()["notes"]
+        assert [n["id"] for n in notes] == ["n1", "n2"]
+
+    def test_lock_is_reentrant(self, temp_data_dir: Path) -> None:
+        """Test that nested locks on the same file do not deadlock."""
+        lock_file = temp_data_dir / "data.json.lock"
+        with FileLock(lock_file), FileLock(lock_file, timeout=0.1):
+            pass
+        with FileLock(lock_file, timeout=0.1):
+            pass
+
+    def test_lock_times_out_across_processes(self, temp_data_dir: Path) -> None:
+        """Test that a lock held by another process blocks until timeout."""
+        import subprocess
+        import sys
+
+        lock_file = temp_data_dir / "data.json.lock"
+        holder = subprocess.Popen(
+            [
+                sys.executable,
+                "-c",
+                "import sys, time; from pathlib import Path;"
+                "from pkm.storage.locking import FileLock;"
+                f"lock = FileLock(Path({str(lock_file)!r})); lock.acquire();"
+                "print('locked', flush=True); time.sleep(5)",
+            ],
+            stdout=subprocess.PIPE,
+        )
+        try:
+            assert holder.stdout is not None
+            assert holder.stdout.readline().strip() == b"locked"
+            with pytest.raises(TimeoutError):
+                FileLock(lock_file, timeout=0.1).acquire()
+        finally:
+            holder.kill()
+            holder.wait()
+
+        # Released by the OS when the holder dies
+        with FileLock(lock_file, timeout=5):
+            pass
+
+    def test_services_reseed_ids_under_lock(self, temp_data_dir: Path) -> None:
+        """Test that a long-lived service does not reuse an ID taken elsewhere."""
+        early = TaskService(temp_data_dir)
+
+        # Another process adds t1 without touching this process's ID counter
+        store = JSONStore(temp_data_dir / "data.json")
+        data = store.load()
+        data["tasks"].append(
+            {"id": "t1", "title": "Elsewhere", "created_at": "2025-11-23T10:00:00"}
+        )
+        store.save(data)
+
+        task = early.create_task("Created later")
+        assert task.id == "t2"
+
+
+class TestDirectoryStore:
+    """Tests for DirectoryStore."""
+
+    def test_round_trip(self, temp_data_dir: Path) -> None:
+        """Test that records and top-level keys survive a save/load."""
+        store = DirectoryStore(temp_data_dir)
+        data = store.load()
+        data["notes"].extend([_note("n1"), _note("n2")])
+        data["courses"] = [{"name": "Biology"}]
+        store.save(data)
+
+        loaded = DirectoryStore(temp_data_dir).load()
+        assert [n["id"] for n in loaded["notes"]] == ["n1", "n2"]
+        assert loaded["notes"][0] == _note("n1")
+        assert loaded["courses"] == [{"name": "Biology"}]
+        assert (temp_data_dir / "notes" / "n1.1.json").exists()
+
+    def test_manifest_holds_listing_fields_only(self, temp_data_dir: Path) -> None:
+        """Test that only a preview of note content goes into the manifest."""
+        body = "Long body text. " * 50
+        store = DirectoryStore(temp_data_dir)
+        data = store.load()
+        data["notes"].append(_note("n1", body))
+        store.save(data)
+
+        manifest = store.load_manifest()
+        assert manifest["notes"] == [
+            {
+                "id": "n1",
+                "course": None,
+                "topics": [],
+                "created_at": "2025-11-23T10:00:00",
+                "modified_at": "2025-11-23T10:00:00",
+                "linked_from_tasks": [],
+                "preview": body[:PREVIEW_LENGTH],
+                "rev": 1,
+            }
+        ]
+        assert body not in store.manifest_file.read_text()
+
+    def test_edit_rewrites_one_record_file(self, temp_data_dir: Path) -> None:
+        """Test that editing one note leaves other record files untouched."""
+        service = NoteService(temp_data_dir, DirectoryStore(temp_data_dir))
+        first = service.create_note("First")
+        second = service.create_note("Second")
+        other_file = temp_data_dir / "notes" / f"{first.id}.1.json"
+        before = other_file.stat()
+
+        service.update_note(second.id, "Second, edited")
+
+        after = other_file.stat()
+        assert (after.st_ino, after.st_mtime_ns) == (before.st_ino, before.st_mtime_ns)
+        assert "Second, edited" in (temp_data_dir / "notes" / f"{second.id}.3.json").read_text()
+        assert not (temp_data_dir / "notes" / f"{second.id}.2.json").exists()
+
+    def test_delete_removes_record_file(self, temp_data_dir: Path) -> None:
+        """Test that deleting a task removes its file."""
+        service = TaskService(temp_data_dir, DirectoryStore(temp_data_dir))
+        task = service.create_task("Temporary")
+        task_file = temp_data_dir / "tasks" / f"{task.id}.1.json"
+        assert task_file.exists()
+
+        service.delete_task(task.id)
+
+        assert not task_file.exists()
+        assert DirectoryStore(temp_data_dir).load_manifest()["tasks"] == []
+
+    def test_missing_record_file_raises(self, temp_data_dir: Path) -> None:
+        """Test that a manifest entry without a file is reported."""
+        store = DirectoryStore(temp_data_dir)
+        data = store.load()
+        data["notes"].append(_note("n1"))
+        store.save(data)
+        (temp_data_dir / "notes" / "n1.1.json").unlink()
+        snapshot_cache.clear()
+
+        with pytest.raises(ValueError, match="Missing record file"):
+            DirectoryStore(temp_data_dir).load()
+
+    def test_interrupted_save_keeps_listed_files(
+        self, temp_data_dir: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that a save interrupted before the manifest leaves the data as it was."""
+        import pkm.storage.directory_store as directory_store_module
+
+        store = DirectoryStore(temp_data_dir)
+        data = store.load()
+        data["notes"].append(_note("n1", "Original"))
+        store.save(data)
+
+        def fail_on_manifest(path: Path, obj: Any, indent: int | None = None) -> None:
+            if path == store.manifest_file:
+                raise OSError("disk full")
+            write_json(path, obj, indent)
+
+        write_json = directory_store_module._write_json
+        monkeypatch.setattr(directory_store_module, "_write_json", fail_on_manifest)
+        data = store.load()
+        data["notes"][0] = _note("n1", "Edited")
+        with pytest.raises(OSError):
+            store.save(data)
+        snapshot_cache.clear()
+
+        assert DirectoryStore(temp_data_dir).load()["notes"][0]["content"] == "Original"
+
+    def test_reads_files_without_revision(self, temp_data_dir: Path) -> None:
+        """Test that manifest entries without a revision use the plain file name."""
+        store = DirectoryStore(temp_data_dir)
+        data = store.load()
+        data["notes"].append(_note("n1"))
+        store.save(data)
+        manifest = store.load_manifest()
+        del manifest["notes"][0]["rev"]
+        store.manifest_file.write_text(json.dumps(manifest))
+        (temp_data_dir / "notes" / "n1.1.json").rename(temp_data_dir / "notes" / "n1.json")
+        snapshot_cache.clear()
+
+        store = DirectoryStore(temp_data_dir)
+        data = store.load()
+        assert data["notes"][0] == _note("n1")
+        data["notes"][0] = _note("n1", "Edited")
+        store.save(data)
+        assert not (temp_data_dir / "notes" / "n1.json").exists()
+        assert (temp_data_dir / "notes" / "n1.2.json").exists()
+
+    def test_migrates_existing_json(self, sample_data_file: Path) -> None:
+        """Test that opening the directory backend splits data.json."""
+        store = open_store(sample_data_file.parent, "directory")
+
+        data = store.load()
+        assert [n["id"] for n in data["notes"]] == ["n1"]
+        assert [t["id"] for t in data["tasks"]] == ["t1"]
+        with pytest.raises(FileExistsError):
+            migrate_json_to_directory(sample_data_file, sample_data_file.parent)
+
+
+class TestNoteSummaries:
+    """Tests for loading note metadata without note bodies."""
+
+    @pytest.mark.parametrize("backend", ["json", "journal", "sqlite", "directory"])
+    def test_summaries_match_notes(self, temp_data_dir: Path, backend: str) -> None:
+        """Test that every backend returns metadata plus a preview."""
+        store = open_store(temp_data_dir, backend)
+        body = "x" * (PREVIEW_LENGTH * 3)
+        data = store.load()
+        data["notes"].extend([_note("n1", body), {**_note("n2"), "topics": ["Cells"]}])
+        store.save(data)
+
+        summaries = open_store(temp_data_dir, backend).load_note_summaries()
+
+        assert [s["id"] for s in summaries] == ["n1", "n2"]
+        assert summaries[0]["preview"] == body[:PREVIEW_LENGTH]
+        assert "content" not in summaries[0]
+        assert summaries[1]["topics"] == ["Cells"]
+
+    def test_directory_summaries_skip_note_files(self, temp_data_dir: Path) -> None:
+        """Test that the directory backend lists notes from the manifest only."""
+        service = NoteService(temp_data_dir, DirectoryStore(temp_data_dir))
+        note = service.create_note("Only the manifest is read")
+        (temp_data_dir / "notes" / f"{note.id}.1.json").unlink()
+
+        summaries = service.list_note_summaries()
+
+        assert [s.preview for s in summaries] == ["Only the manifest is read"]
+
+    def test_list_views_use_summaries(self, temp_data_dir: Path) -> None:
+        """Test that the filtered note lists return summaries."""
+        service = NoteService(temp_data_dir)
+        service.create_note("Inbox note", topics=["Cells"])
+        service.create_note("Course note", course="BIO101")
+
+        inbox = service.get_inbox_notes()
+        assert [n.preview for n in inbox] == ["Inbox note"]
+        assert not hasattr(inbox[0], "content")
+        assert [n.preview for n in service.get_notes_by_course("BIO101")] == ["Course note"]
+        assert [n.preview for n in service.get_all_topics()["Cells"]] == ["Inbox note"]
+
+
+class TestEncodings:
+    """Tests for snapshot encodings."""
+
+    @pytest.mark.parametrize("encoding", ENCODINGS)
+    def test_round_trip(self, encoding: str) -> None:
+        """Test that every encoding decodes to the original data."""
+        data = {"notes": [_note("n1", "Café ☕")], "tasks": [], "courses": []}
+
+        raw = encode(data, encoding)
+
+        assert decode(raw) == data
+
+    def test_detects_encoding_from_header(self) -> None:
+        """Test that the header identifies each binary encoding."""
+        data = {"notes": []}
+        assert detect_encoding(encode(data, "json")) == "json"
+        assert detect_encoding(encode(data, "compact")) == "json"
+        assert detect_encoding(encode(data, "gzip")) == "gzip"
+        assert detect_encoding(encode(data, "lzma")) == "lzma"
+        assert detect_encoding(encode(data, "marshal")) == "marshal"
+        assert detect_encoding(encode(data, "ndjson")) == "ndjson"
+
+    def test_compact_is_smaller(self) -> None:
+        """Test that compact JSON drops the indentation."""
+        data = {"notes": [_note(f"n{i}") for i in range(20)]}
+        assert len(encode(data, "compact")) < len(encode(data, "json"))
+        assert len(encode(data, "gzip")) < len(encode(data, "compact"))
+
+    def test_unknown_encoding_raises(self) -> None:
+        """Test that an unknown encoding name is rejected."""
+        with pytest.raises(ValueError, match="Unknown encoding"):
+            encode({}, "yaml")
+
+    def test_corrupted_binary_raises_value_error(self) -> None:
+        """Test that truncated compressed data is reported as corrupted."""
+        raw = encode({"notes": [_note("n1")]}, "gzip")
+        with pytest.raises(ValueError):
+            decode(raw[:10])
+
+    @pytest.mark.parametrize("encoding", ENCODINGS)
+    def test_store_reads_any_encoding(self, temp_data_dir: Path, encoding: str) -> None:
+        """Test that a store reads a file written in another encoding."""
+        writer = JSONStore(temp_data_dir / "data.json", encoding=encoding)
+        data = writer.load()
+        data["notes"].append(_note("n1"))
+        writer.save(data)
+        snapshot_cache.clear()
+
+        loaded = JSONStore(temp_data_dir / "data.json").load()
+
+        assert loaded["notes"] == [_note("n1")]
+
+    def test_corrupted_compressed_file_uses_backup(self, temp_data_dir: Path) -> None:
+        """Test backup recovery for a compressed data file."""
+        store = JSONStore(temp_data_dir / "data.json", encoding="lzma")
+        for note_id in ("n1", "n2"):
+            data = store.load()
+            data["notes"].append(_note(note_id))
+            store.save(data)
+        store.data_file.write_bytes(store.data_file.read_bytes()[:20])
+        snapshot_cache.clear()
+
+        loaded = JSONStore(temp_data_dir / "data.json").load()
+
+        assert [n["id"] for n in loaded["notes"]] == ["n1"]
+
+
+class TestBackupRotation:
+    """Tests for hard-link backup generations."""
+
+    @staticmethod
+    def _save_versions(store: JSONStore, count: int) -> None:
+        """Save `count` versions, each adding one note."""
+        for i in range(1, count + 1):
+            data = store.load()
+            data["notes"].append(_note(f"n{i}"))
+            store.save(data)
+
+    @staticmethod
+    def _note_count(path: Path) -> int:
+        """Count the notes in a backup file."""
+        return len(json.loads(path.read_text())["notes"])
+
+    def test_backup_is_hard_link_of_replaced_file(self, temp_data_dir: Path) -> None:
+        """Test that the outgoing data file becomes the backup without a copy."""
+        store = JSONStore(temp_data_dir / "data.json")
+        self._save_versions(store, 1)
+        old_inode = store.data_file.stat().st_ino
+
+        self._save_versions(store, 1)
+
+        assert store.bak_file.stat().st_ino == old_inode
+        assert store.data_file.stat().st_ino != old_inode
+
+    def test_keeps_n_generations(self, temp_data_dir: Path) -> None:
+        """Test that older backups are shifted and the oldest dropped."""
+        store = JSONStore(temp_data_dir / "data.json", backups=3)
+        self._save_versions(store, 5)
+
+        assert [self._note_count(p) for p in store.backup_files()] == [4, 3, 2]
+        assert not store.bak_file.with_name("data.json.bak.3").exists()
+
+    def test_zero_backups(self, temp_data_dir: Path) -> None:
+        """Test that backups can be disabled."""
+        store = JSONStore(temp_data_dir / "data.json", backups=0)
+        self._save_versions(store, 2)
+
+        assert not store.backup_exists()
+
+    def test_backup_interval_limits_generations(self, temp_data_dir: Path) -> None:
+        """Test that a new generation starts only once the newest is old enough."""
+        store = JSONStore(temp_data_dir / "data.json", backups=2, backup_interval=3600)
+        self._save_versions(store, 2)
+        assert self._note_count(store.bak_file) == 1
+
+        # Recent backup: further saves leave it alone
+        self._save_versions(store, 3)
+        assert self._note_count(store.bak_file) == 1
+
+        # An hour later the next save rotates
+        stale = time.time() - 3601
+        os.utime(store.bak_stamp_file, (stale, stale))
+        self._save_versions(store, 1)
+        assert [self._note_count(p) for p in store.backup_files()] == [5, 1]
+
+    def test_backup_interval_counts_from_last_rotation(self, temp_data_dir: Path) -> None:
+        """Test that an old data file does not make every save rotate."""
+        store = JSONStore(temp_data_dir / "data.json", backups=2, backup_interval=3600)
+        self._save_versions(store, 1)
+
+        # Data written long ago: the first save backs it up
+        stale = time.time() - 86400
+        os.utime(store.data_file, (stale, stale))
+        self._save_versions(store, 1)
+        assert self._note_count(store.bak_file) == 1
+
+        # The rotation was just now, so a burst of saves keeps that backup
+        self._save_versions(store, 3)
+        assert self._note_count(store.bak_file) == 1
+        assert not store.backup_files()[1].exists()
+
+    def test_restore_does_not_link_backup(self, temp_data_dir: Path) -> None:
+        """Test that restoring copies, so the backup survives later saves."""
+        store = JSONStore(temp_data_dir / "data.json")
+        self._save_versions(store, 2)
+        store.restore_from_backup()
+
+        assert store.data_file.stat().st_ino != store.bak_file.stat().st_ino
+        assert [n["id"] for n in store.load()["notes"]] == ["n1"]
+
+
+class TestStreaming:
+    """Tests for NDJSON snapshots and record iteration."""
+
+    def _ndjson_store(self, temp_data_dir: Path) -> JSONStore:
+        """Create an NDJSON store holding two notes and one task."""
+        store = JSONStore(temp_data_dir / "data.json", encoding="ndjson")
+        data = store.load()
+        data["notes"].extend([_note("n1"), {**_note("n2"), "course": "Biology"}])
+        data["tasks"].append(
+            {"id": "t1", "title": "Task", "created_at": "2025-11-23T10:00:00"}
+        )
+        store.save(data)
+        snapshot_cache.clear()
+        return store
+
+    def test_ndjson_layout(self, temp_data_dir: Path) -> None:
+        """Test that each record is one line tagged with its type."""
+        store = self._ndjson_store(temp_data_dir)
+
+        lines = [json.loads(line) for line in store.data_file.read_text().splitlines()]
+
+        assert [line["type"] for line in lines] == ["header", "note", "note", "task"]
+        assert lines[0]["data"]["courses"] == ["Biology"]
+        assert lines[2]["record"]["course"] == 0
+        assert lines[3]["record"]["id"] == "t1"
+
+    def test_iter_ndjson_skips_other_kinds_undecoded(self) -> None:
+        """Test that lines of other record kinds are not parsed."""
+        lines = [
+            b'{"type":"header","data":{}}',
+            b'{"type":"note",NOT JSON',
+            b'{"type":"task","record":{"id":"t1"}}',
+        ]
+
+        assert list(iter_ndjson(lines, "tasks")) == [("header", {}), ("tasks", {"id": "t1"})]
+        with pytest.raises(ValueError):
+            list(iter_ndjson(lines))
+
+    def test_iter_records_streams_without_full_parse(
+        self, temp_data_dir: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that an NDJSON snapshot is scanned without decoding the whole file."""
+        import pkm.storage.json_store as json_store_module
+
+        store = self._ndjson_store(temp_data_dir)
+
+        def no_full_parse(raw: bytes) -> object:
+            raise AssertionError("whole snapshot parsed")
+
+        monkeypatch.setattr(json_store_module, "decode", no_full_parse)
+
+        assert [r["id"] for r in store.iter_records("notes")] == ["n1", "n2"]
+        assert [t.id for t in TaskService(temp_data_dir, store).get_inbox_tasks()] == ["t1"]
+
+    def test_iter_records_replays_pending_journal(self, temp_data_dir: Path) -> None:
+        """Test that journaled changes are included when iterating."""
+        self._ndjson_store(temp_data_dir)
+        store = JSONStore(temp_data_dir / "data.json", journal=True, encoding="ndjson")
+        data = store.load()
+        data["notes"].append(_note("n3"))
+        store.save(data)
+        snapshot_cache.clear()
+
+        assert [r["id"] for r in store.iter_records("notes")] == ["n1", "n2", "n3"]
+
+    @pytest.mark.parametrize("backend", ["json", "journal", "sqlite", "directory"])
+    def test_iter_records_matches_load(self, temp_data_dir: Path, backend: str) -> None:
+        """Test that every backend iterates the same records it loads."""
+        store = open_store(temp_data_dir, backend)
+        data = store.load()
+        data["notes"].append(_note("n1"))
+        data["tasks"].append(
+            {"id": "t1", "title": "Task", "created_at": "2025-11-23T10:00:00",
+             "priority": "high", "completed": False, "linked_notes": ["n1"], "subtasks": []}
+        )
+        store.save(data)
+        snapshot_cache.clear()
+
+        fresh = open_store(temp_data_dir, backend)
+        loaded = fresh.load()
+        for kind in ("notes", "tasks"):
+            assert list(open_store(temp_data_dir, backend).iter_records(kind)) == loaded[kind]
+
+
+class TestTrustedDeserialization:
+    """Tests for the unvalidated read path of records from our own store."""
+
+    def _task(self) -> dict:
+        """Build a fully populated task dict as the services write it."""
+        return serialize_task(
+            Task(
+                id="t1",
+                title="Lab report",
+                created_at=datetime(2025, 11, 23, 10, 0, 0, 123456),
+                due_date=datetime(2025, 12, 1, 23, 59),
+                priority="high",
+                completed=True,
+                completed_at=datetime(2025, 11, 30, 9, 0),
+                course="Biology",
+                linked_notes=["n1"],
+                subtasks=[Subtask(id=1, title="Draft", completed=True)],
+            )
+        )
+
+    def test_trusted_task_matches_validated(self) -> None:
+        """Test that a trusted task equals the validated one."""
+        data = self._task()
+
+        trusted = deserialize_task(data, trusted=True)
+
+        assert trusted == deserialize_task(data)
+        assert serialize_task(trusted) == data
+
+    def test_trusted_note_matches_validated(self) -> None:
+        """Test that a trusted note equals the validated one."""
+        data = serialize_note(
+            Note(
+                id="n1",
+                content="Photosynthesis",
+                created_at=datetime(2025, 11, 23, 10, 0),
+                modified_at=datetime(2025, 11, 24, 10, 0),
+                topics=["Plants"],
+            )
+        )
+
+        assert deserialize_note(data, trusted=True) == deserialize_note(data)
+
+    def test_task_record_matches_model(self) -> None:
+        """Test that a read-only task record carries the model's values."""
+        data = self._task()
+        task = deserialize_task(data)
+
+        record = deserialize_task_record(data)
+
+        assert record.due_date == task.due_date
+        assert record.completed_at == task.completed_at
+        assert record.linked_notes == ("n1",)
+        assert record.subtasks[0].title == "Draft" and record.subtasks[0].completed
+        assert record.subtask_progress == task.subtask_progress
+        assert record.is_overdue == task.is_overdue
+
+    def test_records_are_read_only(self) -> None:
+        """Test that records cannot be modified."""
+        record = deserialize_task_record(self._task())
+        note = deserialize_note_record(
+            summarize_note({**_note("n1"), "topics": ["Cells"]})
+        )
+
+        with pytest.raises(AttributeError):
+            record.title = "Changed"  # type: ignore[misc]
+        with pytest.raises(AttributeError):
+            note.topics.append("Mitosis")  # type: ignore[attr-defined]
+        assert not hasattr(record, "__dict__")
+
+    def test_trusted_models_do_not_share_lists(self) -> None:
+        """Test that mutating a trusted model leaves the stored record alone."""
+        data = self._task()
+
+        task = deserialize_task(data, trusted=True)
+        task.linked_notes.append("n2")
+
+        assert data["linked_notes"] == ["n1"]
+
+    def test_trusted_skips_validation(self) -> None:
+        """Test that only the default path validates."""
+        data = {**self._task(), "id": "bogus"}
+
+        assert deserialize_task(data, trusted=True).id == "bogus"
+        with pytest.raises(ValidationError):
+            deserialize_task(data)
+
+    def test_service_writes_stay_validated(self, temp_data_dir: Path) -> None:
+        """Test that updating an invalid stored record is still rejected."""
+        store = JSONStore(temp_data_dir / "data.json")
+        data = store.load()
+        data["tasks"].append({**self._task(), "title": ""})
+        store.save(data)
+        service = TaskService(temp_data_dir, store)
+
+        assert service.get_task("t1") is not None
+        with pytest.raises(ValidationError):
+            service.organize_task("t1", "Chemistry")
+
+
+class TestTypedLoad:
+    """Tests for loading the dataset as models in one pass."""
+
+    def _store(self, temp_data_dir: Path, **kwargs: Any) -> JSONStore:
+        """Create a store holding one note and one task."""
+        store = JSONStore(temp_data_dir / "data.json", **kwargs)
+        data = store.load()
+        data["notes"].append(_note("n1", "Café notes"))
+        data["tasks"].append(
+            {"id": "t1", "title": "Task", "created_at": "2025-11-23T10:00:00"}
+        )
+        store.save(data)
+        snapshot_cache.clear()
+        return store
+
+    def test_plain_json_validated_in_one_pass(
+        self, temp_data_dir: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that a JSON file goes straight to the type adapter."""
+        import pkm.storage.json_store as json_store_module
+
+        store = self._store(temp_data_dir)
+        expected = deserialize_dataset(store.load())
+        snapshot_cache.clear()
+
+        def no_dicts(data: object) -> object:
+            raise AssertionError("dict path used")
+
+        monkeypatch.setattr(json_store_module, "deserialize_dataset", no_dicts)
+        dataset = store.load_typed()
+
+        assert dataset.notes == expected.notes
+        assert dataset.tasks == expected.tasks
+        assert dataset.tasks[0].priority == "medium"
+
+    def test_json_written_as_utf8(self, temp_data_dir: Path) -> None:
+        """Test that snapshots are written by pydantic as UTF-8 JSON."""
+        store = self._store(temp_data_dir)
+
+        assert "Café notes" in store.data_file.read_text(encoding="utf-8")
+        assert store.data_file.read_text().startswith('{\n  "notes": [')
+
+    @pytest.mark.parametrize(
+        "kwargs", [{"encoding": "marshal"}, {"journal": True}, {"encoding": "ndjson"}]
+    )
+    def test_other_formats_fall_back_to_load(
+        self, temp_data_dir: Path, kwargs: dict[str, Any]
+    ) -> None:
+        """Test that non-JSON snapshots and journals still load as models."""
+        store = self._store(temp_data_dir, **kwargs)
+        data = store.load()
+        data["notes"].append(_note("n2"))
+        store.save(data)
+        snapshot_cache.clear()
+
+        assert [note.id for note in store.load_typed().notes] == ["n1", "n2"]
+
+    def test_corrupted_file_recovers_from_backup(self, temp_data_dir: Path) -> None:
+        """Test that a corrupted snapshot falls back to backup recovery."""
+        store = self._store(temp_data_dir)
+        data = store.load()
+        data["notes"].append(_note("n2"))
+        store.save(data)
+        store.data_file.write_text("{ not json")
+        snapshot_cache.clear()
+
+        assert [note.id for note in store.load_typed().notes] == ["n1"]
+
+    @pytest.mark.parametrize("backend", ["sqlite", "directory"])
+    def test_other_backends(self, temp_data_dir: Path, backend: str) -> None:
+        """Test that every backend provides a typed load."""
+        store = open_store(temp_data_dir, backend)
+        data = store.load()
+        data["notes"].append(_note("n1"))
+        store.save(data)
+
+        assert [note.id for note in store.load_typed().notes] == ["n1"]
+
+
+class TestDictionary:
+    """Tests for the course and topic dictionary of compact snapshots."""
+
+    def _dataset(self) -> dict:
+        """Build a dataset where every course and topic is used twice."""
+        data = create_empty_schema()
+        for i in range(4):
+            note = _note(f"n{i}")
+            note["course"] = "Biology 101" if i % 2 else None
+            note["topics"] = ["Cells", "Mitosis"][: i % 3]
+            data["notes"].append(note)
+        data["tasks"].append(
+            {"id": "t1", "title": "Lab", "created_at": "2025-11-23T10:00:00",
+             "course": "Biology 101"}
+        )
+        return data
+
+    def test_pack_round_trip(self) -> None:
+        """Test that unpacking a packed dataset restores every record."""
+        data = self._dataset()
+        packed = pack(data)
+
+        assert packed["courses"] == ["Biology 101"]
+        assert packed["topics"] == ["Cells", "Mitosis"]
+        assert [note["course"] for note in packed["notes"]] == [None, 0, None, 0]
+        assert packed["notes"][2]["topics"] == [0, 1]
+        assert data["notes"][1]["course"] == "Biology 101"  # input untouched
+
+        unpacked = unpack(json.loads(json.dumps(packed)))
+        assert unpacked["notes"] == data["notes"]
+        assert unpacked["tasks"] == data["tasks"]
+        assert unpacked["courses"] == []
+        assert "_schema" not in unpacked
+
+    def test_unpacked_records_share_names(self) -> None:
+        """Test that every record gets the same string object for a name."""
+        unpacked = unpack(json.loads(json.dumps(pack(self._dataset()))))
+
+        assert unpacked["notes"][1]["course"] is unpacked["tasks"][0]["course"]
+        assert unpacked["notes"][1]["topics"][0] is unpacked["notes"][2]["topics"][0]
+
+    def test_compact_snapshot_is_packed(self, temp_data_dir: Path) -> None:
+        """Test that compact snapshots are packed and indented JSON is not."""
+        compact = JSONStore(temp_data_dir / "compact.json", encoding="compact")
+        plain = JSONStore(temp_data_dir / "plain.json")
+        compact.save(self._dataset())
+        plain.save(self._dataset())
+        snapshot_cache.clear()
+
+        assert compact.data_file.read_bytes().startswith(PACKED_PREFIX)
+        assert '"course": "Biology 101"' in plain.data_file.read_text()
+        assert compact.load()["notes"] == plain.load()["notes"]
+        assert [note.course for note in compact.load_typed().notes] == [
+            None, "Biology 101", None, "Biology 101"
+        ]
+
+    def test_unpacked_compact_file_still_loads(self, temp_data_dir: Path) -> None:
+        """Test that snapshots written before the dictionary are read as is."""
+        store = JSONStore(temp_data_dir / "data.json", encoding="compact")
+        store.data_file.write_bytes(encode(self._dataset(), "compact"))
+
+        assert store.load()["notes"][1]["course"] == "Biology 101"
+
+        store.save(store.load())
+        assert store.data_file.read_bytes().startswith(PACKED_PREFIX)
+
+    def test_ndjson_streams_names(self, temp_data_dir: Path) -> None:
+        """Test that streamed NDJSON records carry names, not ids."""
+        store = JSONStore(temp_data_dir / "data.json", encoding="ndjson")
+        store.save(self._dataset())
+        snapshot_cache.clear()
+
+        notes = list(store.iter_records("notes"))
+        assert notes[2]["topics"] == ["Cells", "Mitosis"]
+        assert [task["course"] for task in store.iter_records("tasks")] == ["Biology 101"]
+
+
+class TestFragmentCache:
+    """Tests for saves that re-encode only replaced records."""
+
+    def _dataset(self) -> dict:
+        """Build a dataset with courses, topics and an unknown top-level key."""
+        data = create_empty_schema()
+        for i in range(6):
+            note = _note(f"n{i}", content=f"Line one\nline {i}")
+            note["course"] = ("Biology", "Chemistry", None)[i % 3]
+            note["topics"] = ["Cells", "Atoms"][: i % 3]
+            data["notes"].append(note)
+        data["tasks"] = [
+            {"id": f"t{i}", "title": f"Task {i}", "created_at": "2025-11-23T10:00:00",
+             "course": "Biology" if i % 2 else None, "subtasks": [{"id": 1}]}
+            for i in range(4)
+        ]
+        data["plugin_settings"] = {"notes": []}  # type: ignore[typeddict-unknown-key]
+        return data
+
+    @pytest.mark.parametrize("encoding", ENCODINGS)
+    def test_first_save_matches_encode(self, encoding: str) -> None:
+        """Test that a cold cache writes exactly what encode() does."""
+        data = self._dataset()
+        expected = encode(data if encoding == "json" else pack(data), encoding)
+
+        assert FragmentCache().encode(data, encoding) == expected
+
+    @pytest.mark.parametrize("encoding", ["json", "compact", "gzip", "ndjson"])
+    def test_only_replaced_records_are_encoded(self, encoding: str) -> None:
+        """Test that a save after one replacement encodes one record."""
+        data = self._dataset()
+        fragments = FragmentCache()
+        fragments.encode(data, encoding)
+
+        data["tasks"][1] = {**data["tasks"][1], "title": "Renamed"}
+        raw = fragments.encode(data, encoding)
+
+        assert fragments.encoded_records == 1
+        assert unpack(decode(raw)) == unpack(decode(encode(pack(data), encoding)))
+        if encoding == "json":
+            assert raw == encode(data, "json")
+
+    def test_new_names_keep_existing_ids(self) -> None:
+        """Test that a record moved to a new course leaves the others cached."""
+        data = self._dataset()
+        fragments = FragmentCache()
+        fragments.encode(data, "compact")
+
+        data["notes"][0] = {**data["notes"][0], "course": "Anatomy", "topics": ["Bones"]}
+        data["notes"].append(_note("n9"))
+        raw = fragments.encode(data, "compact")
+
+        assert fragments.encoded_records == 2
+        assert decode(raw)["courses"] == ["Biology", "Chemistry", "Anatomy"]
+        assert unpack(decode(raw))["notes"] == data["notes"]
+
+    def test_placeholder_collision_falls_back(self) -> None:
+        """Test that a value equal to a placeholder is still written correctly."""
+        data = self._dataset()
+        data["notes"][0] = {**data["notes"][0], "content": "\x00fragments:tasks"}
+
+        raw = FragmentCache().encode(data, "json")
+
+        assert raw == encode(data, "json")
+
+    def test_store_saves_reuse_fragments(self, temp_data_dir: Path) -> None:
+        """Test that JSONStore saves go through the cache and stay loadable."""
+        store = JSONStore(temp_data_dir / "data.json", encoding="compact")
+        store.save(self._dataset())
+        data = store.load()
+        data["tasks"][0] = {**data["tasks"][0], "completed": True}
+        store.save(data)
+        snapshot_cache.clear()
+
+        assert store._fragments.encoded_records == 1
+        assert store.load()["tasks"][0]["completed"] is True
+        assert store.load()["notes"] == self._dataset()["notes"]
+
+
+class TestIdAllocator:
+    """Tests for the shared ID counter file."""
+
+    def test_allocates_consecutive_numbers_per_kind(self, temp_data_dir: Path) -> None:
+        """Test that each kind counts on its own and the file persists."""
+        ids = IdAllocator(temp_data_dir / "ids.json")
+
+        assert [ids.allocate("notes") for _ in range(3)] == [1, 2, 3]
+        assert ids.allocate("tasks") == 1
+        assert IdAllocator(temp_data_dir / "ids.json").allocate("notes") == 4
+        assert json.loads((temp_data_dir / "ids.json").read_text()) == {"notes": 5, "tasks": 2}
+
+    def test_block_leases(self, temp_data_dir: Path) -> None:
+        """Test that leased blocks are served from memory and never overlap."""
+        first = IdAllocator(temp_data_dir / "ids.json", block_size=10)
+        second = IdAllocator(temp_data_dir / "ids.json", block_size=10)
+
+        assert [first.allocate("notes") for _ in range(3)] == [1, 2, 3]
+        assert second.allocate("notes") == 11
+        assert json.loads((temp_data_dir / "ids.json").read_text()) == {"notes": 21}
+        with pytest.raises(ValueError):
+            IdAllocator(temp_data_dir / "ids.json", block_size=0)
+
+    def test_floor_skips_numbers_in_use(self, temp_data_dir: Path) -> None:
+        """Test that a stale or damaged counter file cannot reissue IDs."""
+        (temp_data_dir / "ids.json").write_text("{ damaged")
+        ids = IdAllocator(temp_data_dir / "ids.json")
+
+        assert ids.allocate("notes", floor=42) == 42
+        assert ids.allocate("notes", floor=1) == 43
+
+    def test_services_share_the_counter_file(self, temp_data_dir: Path) -> None:
+        """Test that a copied data file without counters keeps its IDs."""
+        NoteService(temp_data_dir).create_note("First")
+        (temp_data_dir / "ids.json").unlink()
+
+        assert NoteService(temp_data_dir).create_note("Second").id == "n2"
+
+
+class TestRecordIndex:
+    """Tests for the ID -> position index."""
+
+    def test_positions_survive_copies_and_replacements(self) -> None:
+        """Test that an index built once serves later copies of the list."""
+        records = [_note(f"n{i}") for i in range(5)]
+        index = RecordIndex()
+
+        assert index.find(records, "n3") == 3
+        copy = list(records)
+        copy[3] = {**copy[3], "content": "Replaced"}
+        copy.append(_note("n9"))
+
+        assert index.find(copy, "n1") == 1
+        assert index.find(copy, "n3") == 3
+        assert index.rebuilds == 1
+
+    def test_stale_positions_are_rebuilt(self) -> None:
+        """Test that deletions and new records are found after one rebuild."""
+        records = [_note(f"n{i}") for i in range(5)]
+        index = RecordIndex()
+        index.find(records, "n0")
+
+        del records[1]
+        records.append(_note("n9"))
+
+        assert index.find(records, "n4") == 3
+        assert index.find(records, "n9") == 4
+        assert index.find(records, "n1") is None
+        assert index.rebuilds == 2
+
+    def test_missing_ids_do_not_rebuild_twice(self) -> None:
+        """Test that unknown IDs on an indexed list are answered from the index."""
+        records = [_note(f"n{i}") for i in range(5)]
+        index = RecordIndex()
+
+        assert index.find(records, "n7") is None
+        assert index.find(records, "n8") is None
+        assert index.rebuilds == 1
+
@@ -0,0 +1,220 @@
+"""Unit tests for the columnar task table."""
+
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from pkm.services.task_service import TaskService
+from pkm.services.task_table import TaskTable, iter_rows, to_epoch
+from pkm.services.unit_of_work import UnitOfWork
+
+START = datetime(2025, 11, 1, 9, 30)
+
+
+def _tasks(count: int = 60) -> list[dict]:
+    """Build task dicts covering every priority, course and due-date case."""
+    return [
+        {
+            "id": f"t{i}",
+            "title": f"Task {i}",
+            "created_at": START.isoformat(),
+            "due_date": (START + timedelta(hours=7 * i)).isoformat() if i % 4 else None,
+            "priority": ("high", "medium", "low")[i % 3],
+            "completed": i % 5 == 0,
+            "course": (None, "Biology", "Chemistry")[i % 3 if i % 2 else 0],
+        }
+        for i in range(count)
+    ]
+
+
+def _ids(table: TaskTable, mask: int) -> list[str]:
+    """Get the task IDs in a bitmap."""
+    return [record.id for record in table.records(mask)]
+
+
+def _due(task: dict) -> datetime | None:
+    """Parse a task dict's due date."""
+    return datetime.fromisoformat(task["due_date"]) if task["due_date"] else None
+
+
+class TestTaskTable:
+    """Tests for TaskTable bitmap filters."""
+
+    def test_iter_rows(self) -> None:
+        """Test that set bits are listed in ascending order."""
+        assert list(iter_rows(0)) == []
+        assert list(iter_rows(0b1011 | 1 << 70)) == [0, 1, 3, 70]
+
+    def test_single_filters_match_python_filters(self) -> None:
+        """Test each filter against a plain comprehension."""
+        tasks = _tasks()
+        table = TaskTable(tasks)
+
+        assert len(table) == len(tasks)
+        assert _ids(table, table.all) == [t["id"] for t in tasks]
+        assert _ids(table, table.open) == [t["id"] for t in tasks if not t["completed"]]
+        assert _ids(table, table.priority("low")) == [
+            t["id"] for t in tasks if t["priority"] == "low"
+        ]
+        assert _ids(table, table.course("Biology")) == [
+            t["id"] for t in tasks if t["course"] == "Biology"
+        ]
+        assert _ids(table, table.course(None)) == [t["id"] for t in tasks if t["course"] is None]
+
+    def test_combined_filters(self) -> None:
+        """Test that bitmaps combine like the predicates they stand for."""
+        tasks = _tasks()
+        table = TaskTable(tasks)
+        start, end = START + timedelta(days=2), START + timedelta(days=9)
+
+        mask = (
+            table.open
+            & (table.priority("high") | table.course("Chemistry"))
+            & table.due_between(start, end)
+        )
+
+        assert _ids(table, mask) == [
+            t["id"] for t in tasks
+            if not t["completed"]
+            and (t["priority"] == "high" or t["course"] == "Chemistry")
+            and _due(t) is not None and start <= _due(t) < end
+        ]
+        assert _ids(table, table.all & ~table.course("Biology")) == [
+            t["id"] for t in tasks if t["course"] != "Biology"
+        ]
+
+    def test_due_between_bounds(self) -> None:
+        """Test inclusive start, exclusive end and open-ended ranges."""
+        tasks = _tasks()
+        table = TaskTable(tasks)
+        exact = _due(tasks[1])
+        assert exact is not None
+
+        assert _ids(table, table.due_between(exact, exact + timedelta(seconds=1))) == ["t1"]
+        assert _ids(table, table.due_between(exact, exact)) == []
+        assert _ids(table, table.due_between(None, None)) == [
+            t["id"] for t in tasks if t["due_date"]
+        ]
+
+    def test_due_ranges_partition_dated_tasks(self) -> None:
+        """Test that due ranges split the dated tasks without gaps or overlaps."""
+        tasks = _tasks()
+        table = TaskTable(tasks)
+        bounds = [START + timedelta(days=2), START + timedelta(days=5), START + timedelta(days=9)]
+
+        ranges = table.due_ranges(bounds)
+
+        assert len(ranges) == 4
+        assert ranges[1] == table.due_between(bounds[0], bounds[1])
+        assert ranges[0] | ranges[1] | ranges[2] | ranges[3] == table.dated
+        assert ranges[0] & ranges[3] == 0
+        assert _ids(table, table.all & ~table.dated) == [
+            t["id"] for t in tasks if not t["due_date"]
+        ]
+
+    def test_unknown_values_match_nothing(self) -> None:
+        """Test that unknown courses and priorities give empty bitmaps."""
+        table = TaskTable(_tasks())
+
+        assert table.course("History") == 0
+        assert table.priority("urgent") == 0
+        assert TaskTable([]).records(TaskTable([]).all) == []
+
+    def test_aware_datetimes_compare_as_local_time(self) -> None:
+        """Test that aware datetimes are converted to local wall-clock time."""
+        moment = datetime(2025, 11, 1, 12, 0, tzinfo=timezone.utc)
+
+        assert to_epoch(moment) == to_epoch(moment.astimezone().replace(tzinfo=None))
+
+
+class TestTaskServiceQueries:
+    """Tests for the TaskService queries built on the table."""
+
+    @pytest.fixture
+    def service(self, temp_data_dir: Path) -> TaskService:
+        """Create a task service with tasks around today."""
+        service = TaskService(temp_data_dir)
+        today = datetime.combine(date.today(), datetime.min.time())
+        service.create_task("Yesterday", due_date=today - timedelta(minutes=1))
+        service.create_task("This morning", due_date=today, priority="high")
+        service.create_task("Tonight", due_date=today + timedelta(hours=23, minutes=59))
+        service.create_task("In a week", due_date=today + timedelta(days=7, hours=23))
+        service.create_task("In eight days", due_date=today + timedelta(days=8))
+        done = service.create_task("Done today", due_date=today + timedelta(hours=1))
+        service.complete_task(done.id)
+        return service
+
+    def test_date_queries(self, service: TaskService) -> None:
+        """Test the day boundaries of today, week and overdue."""
+        assert [t.title for t in service.get_tasks_today()] == ["This morning", "Tonight"]
+        assert [t.title for t in service.get_tasks_this_week()] == [
+            "This morning", "Tonight", "In a week"
+        ]
+        assert [t.title for t in service.get_tasks_overdue()] == ["Yesterday"]
+
+    def test_priority_excludes_completed(self, service: TaskService) -> None:
+        """Test that priority queries only list open tasks."""
+        assert [t.title for t in service.get_tasks_by_priority("high")] == ["This morning"]
+        assert len(service.get_inbox_tasks()) == 6
+
+    def test_table_reused_until_tasks_change(self, service: TaskService) -> None:
+        """Test that the snapshot is rebuilt only after the store changes."""
+        table = service.task_table()
+        assert service.task_table() is table
+
+        service.organize_task(service.get_tasks_overdue()[0].id, "Biology")
+
+        rebuilt = service.task_table()
+        assert rebuilt is not table
+        assert [t.title for t in service.get_tasks_by_course("Biology")] == ["Yesterday"]
+
+    def test_reuse_reads_no_tasks(
+        self, service: TaskService, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that queries on an unchanged store do not go over the tasks."""
+        service.task_table()
+
+        def no_iteration(kind: str) -> None:
+            raise AssertionError(f"{kind} were read again")
+
+        monkeypatch.setattr(service.store, "iter_records", no_iteration)
+        assert [t.title for t in service.get_tasks_overdue()] == ["Yesterday"]
+        assert len(service.get_agenda()["today"]) == 2
+
+    def test_table_follows_unit_of_work_changes(self, temp_data_dir: Path) -> None:
+        """Test that changes kept in memory by a unit of work rebuild the table."""
+        uow = UnitOfWork(temp_data_dir)
+        task = uow.tasks.create_task("Overdue", due_date=datetime.now() - timedelta(days=1))
+        assert [t.id for t in uow.tasks.get_tasks_overdue()] == [task.id]
+
+        uow.tasks.complete_task(task.id)
+
+        assert uow.tasks.get_tasks_overdue() == []
+
+    def test_agenda_buckets(self, service: TaskService) -> None:
+        """Test that every open task lands in exactly one agenda bucket."""
+        service.create_task("Someday")
+
+        agenda = service.get_agenda()
+
+        assert {bucket: [t.title for t in tasks] for bucket, tasks in agenda.items()} == {
+            "overdue": ["Yesterday"],
+            "today": ["This morning", "Tonight"],
+            "this_week": ["In a week"],
+            "later": ["In eight days"],
+            "no_date": ["Someday"],
+        }
+        assert service.get_agenda(date.today() - timedelta(days=1))["today"][0].title == "Yesterday"
+
+
+    def test_due_between_includes_completed(self, service: TaskService) -> None:
+        """Test that a due range lists every task in [start, end)."""
+        today = datetime.combine(date.today(), datetime.min.time())
+
+        tasks = service.get_tasks_due_between(today, today + timedelta(days=1))
+
+        assert [t.title for t in tasks] == ["This morning", "Tonight", "Done today"]
+        assert [t.title for t in service.get_tasks_due_between(None, today)] == ["Yesterday"]
+        later = service.get_tasks_due_between(today + timedelta(days=8), None)
+        assert [t.title for t in later] == ["In eight days"]